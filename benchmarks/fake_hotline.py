@@ -0,0 +1,110 @@
+"""
+Local Hotline-like marketplace for load tests
+
+Serves product pages whose offer list grows by infinite scroll: the page
+ships the first chunk of offers and a script fetches the next chunk from
+`/api/offers/<slug>` whenever the viewport nears the bottom, like the real
+site. Offer count, chunk size and response latency are configurable per
+server and can be overridden per page with query parameters, e.g.
+`/product/phone-1?offers=400&latency_ms=250`.
+
+    python -m benchmarks.fake_hotline --port 8001 --offers 200 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import random
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, Query
+from fastapi.responses import HTMLResponse
+
+from .fixtures import PAGE_TEMPLATE, offer_html
+
+SCROLL_SCRIPT = """
+<script>
+(() => {
+  const list = document.querySelector("#productOffersListContainer > div:nth-child(2)");
+  let next = %(next)d, loading = false;
+  const total = %(total)d;
+  window.addEventListener("scroll", async () => {
+    if (loading || next >= total) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 400) return;
+    loading = true;
+    const response = await fetch(`/api/offers/%(slug)s?start=${next}%(query)s`);
+    list.insertAdjacentHTML("beforeend", await response.text());
+    next += %(chunk)d;
+    loading = false;
+  });
+})();
+</script>"""
+
+
+def build_app(offers: int, chunk: int, latency_ms: float) -> FastAPI:
+    app = FastAPI(title="Fake Hotline")
+
+    def offers_html(slug: str, start: int, count: int) -> str:
+        # Same slug always renders the same offers
+        rng = random.Random(zlib.crc32(f"{slug}:{start}".encode()))
+        return "".join(offer_html(i, rng) for i in range(start, start + count))
+
+    @app.get("/product/{slug}", response_class=HTMLResponse)
+    async def product_page(
+        slug: str,
+        offers: int = Query(offers, ge=0),
+        chunk: int = Query(chunk, ge=1),
+        latency_ms: float = Query(latency_ms, ge=0),
+    ):
+        await asyncio.sleep(latency_ms / 1000)
+        first = min(chunk, offers)
+        query = f"&offers={offers}&chunk={chunk}&latency_ms={latency_ms:g}"
+        page = PAGE_TEMPLATE.format(
+            title=f"Fake product {slug}",
+            nav="".join(f'<a href="/c/{i}">Категорія {i}</a>' for i in range(50)),
+            offers=offers_html(slug, 0, first),
+            footer="<p>" + "Lorem ipsum " * 200 + "</p>",
+        )
+        script = SCROLL_SCRIPT % {
+            "next": first,
+            "total": offers,
+            "slug": slug,
+            "query": query,
+            "chunk": chunk,
+        }
+        return page.replace("</body>", f"{script}</body>")
+
+    @app.get("/api/offers/{slug}", response_class=HTMLResponse)
+    async def offers_chunk(
+        slug: str,
+        start: int = Query(0, ge=0),
+        offers: int = Query(offers, ge=0),
+        chunk: int = Query(chunk, ge=1),
+        latency_ms: float = Query(latency_ms, ge=0),
+    ):
+        await asyncio.sleep(latency_ms / 1000)
+        return offers_html(slug, start, max(0, min(chunk, offers - start)))
+
+    return app
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local Hotline-like server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--offers", type=int, default=100, help="Offers per page")
+    parser.add_argument("--chunk", type=int, default=20, help="Offers per scroll")
+    parser.add_argument(
+        "--latency-ms", type=float, default=50, help="Delay of every response"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(
+        build_app(args.offers, args.chunk, args.latency_ms),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
@@ -0,0 +1,127 @@
+"""
+Local forward proxy stand-in for egress pool tests
+
+Handles plain HTTP requests in absolute form and CONNECT tunnels. Each
+instance can add latency and answer a share of requests with 403 (a target
+blocking this address) or drop them (a dead proxy), so pool rotation,
+health scoring and ejection can be exercised without real proxies.
+
+    python -m benchmarks.fake_proxy --port 9001
+    python -m benchmarks.fake_proxy --port 9002 --block-rate 1
+    EGRESS_PROXIES='["http://127.0.0.1:9001", "http://127.0.0.1:9002"]' make run
+"""
+
+import argparse
+import asyncio
+import random
+from urllib.parse import urlsplit
+
+BLOCKED_RESPONSE = (
+    b"HTTP/1.1 403 Forbidden\r\nContent-Type: text/plain\r\n"
+    b"Content-Length: 7\r\nConnection: close\r\n\r\nblocked"
+)
+
+
+class FakeProxy:
+    def __init__(self, latency_ms: float, block_rate: float, drop_rate: float):
+        self.latency = latency_ms / 1000
+        self.block_rate = block_rate
+        self.drop_rate = drop_rate
+        self.stats = {"requests": 0, "blocked": 0, "dropped": 0}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        self.stats["requests"] += 1
+        await asyncio.sleep(self.latency)
+        if random.random() < self.drop_rate:
+            self.stats["dropped"] += 1
+            writer.close()
+            return
+        if random.random() < self.block_rate:
+            self.stats["blocked"] += 1
+            writer.write(BLOCKED_RESPONSE)
+            await writer.drain()
+            writer.close()
+            return
+
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        method, target, version = request_line.split(" ", 2)
+        try:
+            if method == "CONNECT":
+                host, port = target.rsplit(":", 1)
+                upstream_reader, upstream_writer = await asyncio.open_connection(
+                    host, int(port)
+                )
+                writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+                await writer.drain()
+            else:
+                url = urlsplit(target)
+                upstream_reader, upstream_writer = await asyncio.open_connection(
+                    url.hostname, url.port or 80
+                )
+                path = url.path or "/"
+                if url.query:
+                    path += f"?{url.query}"
+                headers = [
+                    line
+                    for line in header_lines
+                    if line and not line.lower().startswith(("proxy-", "connection:"))
+                ]
+                upstream_writer.write(
+                    "\r\n".join(
+                        [f"{method} {path} {version}", *headers, "Connection: close"]
+                    ).encode("latin-1")
+                    + b"\r\n\r\n"
+                )
+        except OSError:
+            writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return
+
+        await asyncio.gather(
+            self._pipe(reader, upstream_writer), self._pipe(upstream_reader, writer)
+        )
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    proxy = FakeProxy(args.latency_ms, args.block_rate, args.drop_rate)
+    server = await asyncio.start_server(proxy.handle, args.host, args.port)
+    print(f"Fake proxy on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local forward proxy stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument(
+        "--block-rate", type=float, default=0, help="Share answered with 403"
+    )
+    parser.add_argument(
+        "--drop-rate", type=float, default=0, help="Share of dropped connections"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
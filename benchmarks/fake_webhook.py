@@ -0,0 +1,79 @@
+"""
+Local webhook receiver for price alert deliveries
+
+Accepts alert POSTs, checks `X-Alert-Signature` when started with the same
+`--secret` as ALERT_WEBHOOK_SECRET, and answers a share of calls with 500 to
+exercise retries. `GET /received` lists what arrived (deduplicated on
+`X-Alert-Id`, with the number of attempts seen per alert).
+
+The API has to run with ALERT_WEBHOOK_ALLOW_PRIVATE=true to call it on
+127.0.0.1.
+
+    python -m benchmarks.fake_webhook --port 8002 --fail-rate 0.3
+    curl -X POST localhost:8000/alerts -H "X-API-Key: ..." \\
+        -d '{"product_url": "...", "threshold": 5000, "webhook_url": "http://127.0.0.1:8002/hook"}'
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import random
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+
+
+def build_app(fail_rate: float, secret: str) -> FastAPI:
+    app = FastAPI(title="Fake webhook")
+    received: Dict[str, Dict[str, Any]] = {}
+
+    @app.post("/hook")
+    async def hook(request: Request):
+        body = await request.body()
+        alert_id = request.headers.get("X-Alert-Id", "")
+        if secret:
+            expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            signature = request.headers.get("X-Alert-Signature", "")
+            if not hmac.compare_digest(signature, f"sha256={expected}"):
+                raise HTTPException(status_code=401, detail="Bad signature")
+
+        entry = received.setdefault(alert_id, {"attempts": 0, "payload": None})
+        entry["attempts"] += 1
+        if random.random() < fail_rate:
+            raise HTTPException(status_code=500, detail="Simulated failure")
+        entry["payload"] = json.loads(body)
+        print(
+            f"Alert {alert_id}: {entry['payload']['product_url']} "
+            f"{entry['payload']['price']} ({entry['payload']['direction']} "
+            f"{entry['payload']['threshold']})"
+        )
+        return {"ok": True}
+
+    @app.get("/received")
+    async def list_received():
+        return received
+
+    return app
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local alert webhook receiver")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument(
+        "--fail-rate", type=float, default=0, help="Share answered with 500"
+    )
+    parser.add_argument("--secret", default="", help="ALERT_WEBHOOK_SECRET to verify")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(
+        build_app(args.fail_rate, args.secret),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
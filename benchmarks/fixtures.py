@@ -0,0 +1,196 @@
+"""
+Deterministic Hotline-like HTML and news fixtures
+
+The markup mirrors what `HotlineProductParser._parse_offers` reads: offers
+are the children of `#productOffersListContainer > div[2]`, each with a
+`/go/price/` link (shop name), an `html-clamp` title block and a price span.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+SAVED_PAGES_DIR = FIXTURES_DIR / "saved"
+
+SHOPS = ["Rozetka", "Comfy", "Foxtrot", "Allo", "Citrus", "Eldorado", "MOYO"]
+
+OFFER_TEMPLATE = """
+<div class="list-item">
+  <div class="shop"><a href="/go/price/{offer_id}/" class="shop__title">{shop}</a></div>
+  <div class="list-item__title html-clamp"><span>{title}</span> <span>Оплата карткою</span></div>
+  <div class="price"><a class="zrhvSTwrLmXpudZJHe9F" href="/go/price/{offer_id}/">
+    <span class="_2FyrEE_quFxElmhGj53m">{price}</span> ₴</a></div>
+</div>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="uk"><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+<header><nav>{nav}</nav></header>
+<div id="productOffersListContainer">
+  <div class="filters">Фільтри</div>
+  <div class="offers">{offers}
+  </div>
+</div>
+<footer>{footer}</footer>
+</body></html>"""
+
+
+def format_price(value: int) -> str:
+    return f"{value:,}".replace(",", "\xa0")
+
+
+def offer_html(index: int, rng: random.Random) -> str:
+    used = rng.random() < 0.1
+    title = (
+        f"Товар {index} {'б/в' if used else 'новий'} гарантія {rng.randint(6, 36)} міс"
+    )
+    return OFFER_TEMPLATE.format(
+        offer_id=100000 + index,
+        shop=SHOPS[index % len(SHOPS)],
+        title=title,
+        price=format_price(rng.randint(500, 90000)),
+    )
+
+
+def product_page_html(offers: int, seed: int = 42) -> str:
+    """Product page with `offers` offer rows and some surrounding markup"""
+    rng = random.Random(seed)
+    return PAGE_TEMPLATE.format(
+        title=f"Product with {offers} offers",
+        nav="".join(f'<a href="/c/{i}">Категорія {i}</a>' for i in range(50)),
+        offers="".join(offer_html(i, rng) for i in range(offers)),
+        footer="<p>" + "Lorem ipsum " * 200 + "</p>",
+    )
+
+
+def product_page_fixture(offers: int) -> str:
+    """Load generated page from the fixtures directory, writing it on first use"""
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    path = FIXTURES_DIR / f"product_{offers}_offers.html"
+    if not path.exists():
+        path.write_text(product_page_html(offers), encoding="utf-8")
+    return path.read_text(encoding="utf-8")
+
+
+def har_archive(url: str, html: str) -> dict:
+    """Single-entry HAR 1.2 archive serving `html` for `url`, for replay runs"""
+    size = len(html.encode("utf-8"))
+    return {
+        "log": {
+            "version": "1.2",
+            "creator": {"name": "benchmarks", "version": "1.0"},
+            "pages": [],
+            "entries": [
+                {
+                    "startedDateTime": datetime(2024, 1, 15).isoformat() + "Z",
+                    "time": 0,
+                    "request": {
+                        "method": "GET",
+                        "url": url,
+                        "httpVersion": "HTTP/1.1",
+                        "cookies": [],
+                        "headers": [],
+                        "queryString": [],
+                        "headersSize": -1,
+                        "bodySize": 0,
+                    },
+                    "response": {
+                        "status": 200,
+                        "statusText": "OK",
+                        "httpVersion": "HTTP/1.1",
+                        "cookies": [],
+                        "headers": [
+                            {
+                                "name": "Content-Type",
+                                "value": "text/html; charset=utf-8",
+                            }
+                        ],
+                        "content": {
+                            "size": size,
+                            "mimeType": "text/html; charset=utf-8",
+                            "text": html,
+                        },
+                        "redirectURL": "",
+                        "headersSize": -1,
+                        "bodySize": size,
+                    },
+                    "cache": {},
+                    "timings": {"send": 0, "wait": 0, "receive": 0},
+                }
+            ],
+        }
+    }
+
+
+def saved_pages() -> List[Path]:
+    """Real pages saved by hand into fixtures/saved/*.html"""
+    return sorted(SAVED_PAGES_DIR.glob("*.html")) if SAVED_PAGES_DIR.exists() else []
+
+
+def news_items_json(
+    count: int, source: str = "pravda.com.ua", seed: int = 7
+) -> List[dict]:
+    """News items in the mock JSON shape read by `_create_news_objects_from_json`"""
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 15, 12, 0)
+    items = []
+    for i in range(count):
+        published = started - timedelta(minutes=17 * i)
+        items.append(
+            {
+                "url": f"https://www.{source}/news/{published:%Y/%m/%d}/{900000 + i}/",
+                "article_data": {
+                    "title": f"Новина {i}: "
+                    + " ".join(rng.choice(WORDS) for _ in range(8)),
+                    "content_body": " ".join(rng.choice(WORDS) for _ in range(400)),
+                    "image_urls": [
+                        f"https://www.{source}/images/{i}_{j}.jpg" for j in range(3)
+                    ],
+                    "published_at": published.isoformat(),
+                    "author": "Автор",
+                    "views": rng.randint(100, 50000),
+                    "comments": [
+                        " ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(5)
+                    ],
+                    "likes": rng.randint(0, 500),
+                    "dislikes": rng.randint(0, 50),
+                    "video_url": None,
+                },
+                "source": source,
+                "created_at": (published + timedelta(minutes=5)).isoformat(),
+            }
+        )
+    return items
+
+
+WORDS = [
+    "уряд",
+    "економіка",
+    "бюджет",
+    "реформа",
+    "ринок",
+    "інвестиції",
+    "банк",
+    "гривня",
+    "експорт",
+    "енергетика",
+    "парламент",
+    "закон",
+    "податки",
+    "війна",
+    "фронт",
+    "громада",
+    "регіон",
+    "освіта",
+    "медицина",
+    "транспорт",
+]
+
+
+if __name__ == "__main__":
+    for size in (10, 100, 1000):
+        print(size, len(product_page_fixture(size)))
+    print(json.dumps(news_items_json(1), ensure_ascii=False)[:200])
@@ -0,0 +1,130 @@
+"""Timing, statistics and baseline comparison for the benchmark suite"""
+
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+Setup = Callable[[], Any]
+Target = Callable[[Any], Any]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    min_ms: float
+    median_ms: float
+    mean_ms: float
+    p95_ms: float
+    ops_per_sec: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _call(target: Target, arg: Any):
+    result = target(arg)
+    if inspect.isawaitable(result):
+        await result
+
+
+async def measure(
+    name: str,
+    target: Target,
+    setup: Optional[Setup] = None,
+    iterations: int = 50,
+    warmup: int = 5,
+    max_seconds: float = 10.0,
+    **extra: Any,
+) -> BenchmarkResult:
+    """
+    Time `target(setup())` repeatedly
+
+    `setup` runs outside the timed region, so targets that consume or mutate
+    their input can get a fresh one each iteration. Stops early after
+    `max_seconds` so slow cases don't dominate the run.
+    """
+    for _ in range(warmup):
+        await _call(target, setup() if setup else None)
+
+    timings: List[float] = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(iterations):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        await _call(target, arg)
+        timings.append((time.perf_counter() - started) * 1000)
+        if time.perf_counter() > deadline and len(timings) >= 5:
+            break
+
+    median = statistics.median(timings)
+    return BenchmarkResult(
+        name=name,
+        iterations=len(timings),
+        min_ms=round(min(timings), 4),
+        median_ms=round(median, 4),
+        mean_ms=round(statistics.fmean(timings), 4),
+        p95_ms=round(percentile(timings, 95), 4),
+        ops_per_sec=round(1000 / median, 1) if median else 0.0,
+        extra=extra,
+    )
+
+
+def write_results(results: List[BenchmarkResult], path: Path, **meta: Any):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            **meta,
+        },
+        "results": {result.name: asdict(result) for result in results},
+    }
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+
+
+def compare(
+    results: List[BenchmarkResult], baseline_path: Path, threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare medians with the stored baseline
+
+    Returns one row per benchmark present in both; a row is a regression
+    when the median grew by more than `threshold` (0.25 = 25 %). The
+    baseline may override the threshold per benchmark via `thresholds`.
+    """
+    baseline = json.loads(baseline_path.read_text())
+    thresholds = baseline.get("thresholds", {})
+    rows = []
+    for result in results:
+        previous = baseline["results"].get(result.name)
+        if not previous:
+            continue
+        limit = thresholds.get(result.name, threshold)
+        ratio = result.median_ms / previous["median_ms"] if previous["median_ms"] else 1
+        rows.append(
+            {
+                "name": result.name,
+                "baseline_ms": previous["median_ms"],
+                "current_ms": result.median_ms,
+                "change": round(ratio - 1, 3),
+                "regression": ratio > 1 + limit,
+            }
+        )
+    return rows
+
+
+def run(coroutine: Awaitable) -> Any:
+    return asyncio.run(coroutine)
@@ -0,0 +1,298 @@
+"""
+Open-loop load generator for a running API node
+
+Sends requests at a fixed rate regardless of how fast the app answers, so
+queueing shows up as latency instead of silently lowering the load. The mix
+chooses between product cache hits (URLs parsed during warm-up), product
+misses (a fresh fake-marketplace URL every time, so each one drives a
+browser parse) and news lookups. While the test runs the app's RSS and its
+Chromium processes are sampled from /proc.
+
+    python -m benchmarks.fake_hotline --offers 200 &
+    SCHEDULER_ENABLED=false uvicorn src.main:app --port 8000 &
+    python -m benchmarks.loadtest --rps 20 --duration 60 --mix hit=0.7,miss=0.2,news=0.1
+
+Linux only (reads /proc). Creates its own API key with rate limits high
+enough for the test, using the admin key given by `--api-key`.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from .harness import percentile
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+RESULTS_DIR = Path(__file__).parent / "results"
+NEWS_SOURCE = "https://www.pravda.com.ua/news/"
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, weight = part.split("=")
+        if kind not in ("hit", "miss", "news"):
+            raise argparse.ArgumentTypeError(f"Unknown request kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def find_app_pid(port: int) -> Optional[int]:
+    """Process of the uvicorn server listening on `port`"""
+    for pid in _pids():
+        cmdline = _read(f"/proc/{pid}/cmdline").replace("\0", " ")
+        if "uvicorn" in cmdline and "src.main:app" in cmdline:
+            if f"--port {port}" in cmdline or (
+                port == 8000 and "--port" not in cmdline
+            ):
+                return pid
+    return None
+
+
+def _pids() -> List[int]:
+    return [int(name) for name in os.listdir("/proc") if name.isdigit()]
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def process_tree(root: int) -> List[int]:
+    """`root` and all its descendants"""
+    children = defaultdict(list)
+    for pid in _pids():
+        stat = _read(f"/proc/{pid}/stat")
+        if stat:
+            # Fields after the parenthesised command name; ppid is the second
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            children[ppid].append(pid)
+
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def sample_processes(root: int) -> Dict[str, float]:
+    rss = 0
+    browsers = 0
+    for pid in process_tree(root):
+        statm = _read(f"/proc/{pid}/statm")
+        if statm:
+            rss += int(statm.split()[1]) * PAGE_SIZE
+        if "chrom" in _read(f"/proc/{pid}/comm").lower():
+            browsers += 1
+    return {"rss_mb": rss / 2**20, "browser_processes": browsers}
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.samples: List[Dict[str, float]] = []
+        self.hit_urls: List[str] = []
+        self.miss_counter = itertools.count()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.in_flight = 0
+        self.skipped = 0
+
+    def product_url(self, name: str) -> str:
+        return f"{self.args.fake_url}/product/{name}?offers={self.args.offers}"
+
+    async def create_key(self, client: httpx.AsyncClient) -> str:
+        response = await client.post(
+            "/admin/api-keys",
+            json={
+                "name": f"loadtest-{self.run_id}",
+                "read_rate_per_minute": 10**7,
+                "read_burst": 10**6,
+                "parse_rate_per_minute": 10**7,
+                "parse_burst": 10**6,
+            },
+        )
+        response.raise_for_status()
+        return response.json()["key"]
+
+    async def warm_up(self, client: httpx.AsyncClient):
+        """Parse the cache-hit URLs once so later lookups are served from Mongo"""
+        self.hit_urls = [
+            self.product_url(f"hit-{self.run_id}-{i}")
+            for i in range(self.args.hit_urls)
+        ]
+        for url in self.hit_urls:
+            response = await client.post(
+                "/products", params={"url": url}, timeout=self.args.timeout
+            )
+            response.raise_for_status()
+
+    async def one(self, client: httpx.AsyncClient, kind: str):
+        if kind == "hit":
+            path, params = "/products", {"url": random.choice(self.hit_urls)}
+        elif kind == "miss":
+            name = f"miss-{self.run_id}-{next(self.miss_counter)}"
+            path, params = "/products", {"url": self.product_url(name)}
+        else:
+            until = (date.today() + timedelta(days=1)).isoformat()
+            path, params = "/news", {"url": NEWS_SOURCE, "until_date": until}
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await client.post(path, params=params, timeout=self.args.timeout)
+            status = str(response.status_code)
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        self.latencies[kind].append((time.perf_counter() - started) * 1000)
+        self.statuses[kind][status] += 1
+
+    async def sample(self, pid: int):
+        while True:
+            self.samples.append(
+                {**sample_processes(pid), "in_flight": float(self.in_flight)}
+            )
+            await asyncio.sleep(1)
+
+    async def run(self) -> dict:
+        args = self.args
+        limits = httpx.Limits(max_connections=args.max_in_flight)
+        async with httpx.AsyncClient(
+            base_url=args.url, headers={"X-API-Key": args.api_key}, limits=limits
+        ) as client:
+            client.headers["X-API-Key"] = await self.create_key(client)
+            await self.warm_up(client)
+
+            pid = args.app_pid or find_app_pid(httpx.URL(args.url).port or 80)
+            sampler = asyncio.create_task(self.sample(pid)) if pid else None
+
+            kinds, weights = zip(*args.mix.items())
+            tasks = set()
+            interval = 1 / args.rps
+            started = time.perf_counter()
+            for n in range(int(args.rps * args.duration)):
+                # Absolute schedule, a late tick doesn't shift the following ones
+                delay = started + n * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.in_flight >= args.max_in_flight:
+                    self.skipped += 1
+                    continue
+                kind = random.choices(kinds, weights)[0]
+                task = asyncio.create_task(self.one(client, kind))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+            if sampler:
+                sampler.cancel()
+
+        return self.report(elapsed, pid)
+
+    def report(self, elapsed: float, pid: Optional[int]) -> dict:
+        kinds = {}
+        for kind, latencies in self.latencies.items():
+            ok = self.statuses[kind].get("200", 0)
+            kinds[kind] = {
+                "requests": len(latencies),
+                "ok_per_sec": round(ok / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50), 1),
+                "p95_ms": round(percentile(latencies, 95), 1),
+                "p99_ms": round(percentile(latencies, 99), 1),
+                "statuses": dict(self.statuses[kind]),
+            }
+        total = sum(len(latencies) for latencies in self.latencies.values())
+        report = {
+            "target_rps": self.args.rps,
+            "mix": self.args.mix,
+            "duration_s": round(elapsed, 1),
+            "throughput_rps": round(total / elapsed, 2),
+            "skipped_at_max_in_flight": self.skipped,
+            "kinds": kinds,
+        }
+        if self.samples:
+            rss = [s["rss_mb"] for s in self.samples]
+            browsers = [s["browser_processes"] for s in self.samples]
+            report["process"] = {
+                "app_pid": pid,
+                "rss_mb_mean": round(statistics.fmean(rss), 1),
+                "rss_mb_peak": round(max(rss), 1),
+                "browser_processes_peak": int(max(browsers)),
+                "in_flight_peak": int(max(s["in_flight"] for s in self.samples)),
+            }
+        return report
+
+
+def print_report(report: dict):
+    print(
+        f"{report['throughput_rps']} req/s over {report['duration_s']} s "
+        f"(target {report['target_rps']}, skipped {report['skipped_at_max_in_flight']})"
+    )
+    print(
+        f"{'kind':<6} {'req':>6} {'ok/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for kind, stats in report["kinds"].items():
+        print(
+            f"{kind:<6} {stats['requests']:>6} {stats['ok_per_sec']:>8} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}  "
+            f"{stats['statuses']}"
+        )
+    if "process" in report:
+        process = report["process"]
+        print(
+            f"RSS mean {process['rss_mb_mean']} MB, peak {process['rss_mb_peak']} MB; "
+            f"browser processes peak {process['browser_processes_peak']}; "
+            f"in flight peak {process['in_flight_peak']}"
+        )
+    else:
+        print("App process not found, pass --app-pid for RSS and browser counts")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API node")
+    parser.add_argument("--fake-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--api-key", default="test-key-1", help="Admin API key")
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix("hit=0.7,miss=0.2,news=0.1")
+    )
+    parser.add_argument("--offers", type=int, default=100, help="Offers per page")
+    parser.add_argument("--hit-urls", type=int, default=20)
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--app-pid", type=int, help="Defaults to uvicorn on --url port")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(LoadTest(args).run())
+    print_report(report)
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"loadtest_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"Report saved to {path}")
@@ -0,0 +1,197 @@
+"""
+Request latency overhead of logging under concurrent load
+
+Runs a small ASGI app whose handler logs like the product/news hot paths
+(one info line per request plus per-item debug lines) under several logger
+configurations and reports latency percentiles for each. `--slow-sink-ms`
+makes every console write take that long, like a congested terminal or a
+container log pipe.
+
+    python -m benchmarks.logging_overhead --requests 2000 --concurrency 50
+    python -m benchmarks.logging_overhead --slow-sink-ms 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+import httpx
+from fastapi import FastAPI
+from loguru import logger
+
+from src.core import logger as app_logger
+from src.core.config import settings
+
+
+def build_app(items_per_request: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        app_logger.log.info("Handling request")
+        for i in range(items_per_request):
+            if app_logger.log_sampler.allow("bench_item"):
+                app_logger.log.debug(f"Parsed item {i}")
+            await asyncio.sleep(0)
+        return {"ok": True}
+
+    return app
+
+
+def configure_none():
+    logger.remove()
+
+
+def configure_sync():
+    """Previous setup: print-based console sink and file sink, no queue"""
+    logger.remove()
+    logger.add(sink=lambda msg: print(msg, end=""), level="INFO")
+    logger.add(sink="logs/bench_sync.log", level="DEBUG", rotation="10 MB")
+
+
+def configure_loguru_enqueue():
+    """Previous sinks with loguru's own `enqueue=True` (pickles every record)"""
+    logger.remove()
+    logger.add(sink=lambda msg: print(msg, end=""), level="INFO", enqueue=True)
+    logger.add(
+        sink="logs/bench_enqueue.log", level="DEBUG", rotation="10 MB", enqueue=True
+    )
+
+
+def configure_queued(json_output: bool) -> Callable[[], None]:
+    def configure():
+        settings.LOG_JSON = json_output
+        app_logger.setup_logger()
+
+    return configure
+
+
+SCENARIOS: Dict[str, Callable[[], None]] = {
+    "no_logging": configure_none,
+    "sync": configure_sync,
+    "loguru_enqueue": configure_loguru_enqueue,
+    "queued_text": configure_queued(False),
+    "queued_json": configure_queued(True),
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def drive(app: FastAPI, requests: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                await c.get("/work")
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+class SlowStream:
+    """Console stand-in where every write blocks for `delay` seconds"""
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text: str):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+@contextmanager
+def silenced_output(delay: float):
+    """Send console sinks to /dev/null so the terminal isn't the bottleneck"""
+    stdout, stderr = sys.stdout, sys.stderr
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = sys.stderr = SlowStream(devnull, delay)
+        try:
+            yield
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+
+def run_scenario(
+    name: str, requests: int, concurrency: int, items: int, slow_sink_ms: float
+) -> dict:
+    with silenced_output(slow_sink_ms / 1000):
+        SCENARIOS[name]()
+        app = build_app(items)
+        asyncio.run(drive(app, min(requests, 200), concurrency))  # warm-up
+        started = time.perf_counter()
+        latencies = asyncio.run(drive(app, requests, concurrency))
+        elapsed = time.perf_counter() - started
+        logger.remove()
+
+    return {
+        "scenario": name,
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--items", type=int, default=20, help="debug lines/request")
+    parser.add_argument("--slow-sink-ms", type=float, default=0.0)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--output", help="write JSON results to file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for name in args.scenario or SCENARIOS:
+                results.append(
+                    run_scenario(
+                        name,
+                        args.requests,
+                        args.concurrency,
+                        args.items,
+                        args.slow_sink_ms,
+                    )
+                )
+        finally:
+            os.chdir(cwd)
+
+    baseline = results[0]["p99_ms"]
+    for result in results:
+        result["p99_overhead_ms"] = round(result["p99_ms"] - baseline, 3)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Offline benchmark suite
+
+Times the hot paths without network: offer extraction over generated
+Hotline pages (plus any real pages saved in fixtures/saved/), news object
+construction, repository reads/writes, cache-hit latency of the /products
+and /news endpoints through the ASGI app and, when Chromium is installed,
+the whole browser parse replayed from a HAR archive. Mongo is
+mongomock-motor by default, `--mongo-url` points the repository cases at
+a real server.
+
+    python -m benchmarks.run                      # run and compare
+    python -m benchmarks.run --save-baseline      # refresh baseline.json
+    python -m benchmarks.run --only parse_offers --threshold 0.1
+
+Exits with status 1 when a median regressed past the threshold.
+"""
+
+import argparse
+import copy
+import json
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from loguru import logger
+from mongomock_motor import AsyncMongoMockClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.core.config import settings
+from src.core.database import db
+
+from .fixtures import har_archive, news_items_json, product_page_fixture, saved_pages
+from .harness import BenchmarkResult, compare, measure, run, write_results
+
+BENCH_DIR = Path(__file__).parent
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+RESULTS_DIR = BENCH_DIR / "results"
+BENCH_DATABASE = "hotline_parser_bench"
+
+OFFER_COUNTS = (10, 100, 1000)
+PRODUCT_URL = "https://hotline.ua/bench/product-{}"
+NEWS_SOURCE = "https://www.pravda.com.ua/news/"
+
+Suite = Callable[[argparse.Namespace], Awaitable[List[BenchmarkResult]]]
+
+
+def connect(mongo_url: str):
+    """Point the app's database handle at the benchmark database"""
+    db.client = AsyncIOMotorClient(mongo_url) if mongo_url else AsyncMongoMockClient()
+    db.database = db.client[BENCH_DATABASE]
+
+
+async def seed_news_cache():
+    """Store news the /news cache lookup finds, it matches on the source URL"""
+    from src.repositories.news_repository import news_repository
+    from src.services.news_parser import BaseNewsParser
+
+    if await news_repository.collection.count_documents({"url": NEWS_SOURCE}):
+        return
+
+    parser = BaseNewsParser()
+    await parser.close()
+    items = news_items_json(20)
+    for item in items:
+        item["url"] = NEWS_SOURCE
+    await news_repository.collection.insert_many(
+        [
+            {
+                "url": news.url,
+                "article_data": news.article_data.model_dump(),
+                "source": "pravda.com.ua",
+                "created_at": datetime.utcnow(),
+            }
+            for news in parser._create_news_objects_from_json(items)
+        ]
+    )
+
+
+async def parser_suite(args) -> List[BenchmarkResult]:
+    from src.services.product_parser import product_parser
+
+    pages = {f"{count}_offers": product_page_fixture(count) for count in OFFER_COUNTS}
+    for path in saved_pages():
+        pages[path.stem] = path.read_text(encoding="utf-8")
+
+    results = []
+    for name, html in pages.items():
+        offers = len(await product_parser._parse_offers(html))
+        results.append(
+            await measure(
+                f"parse_offers[{name}]",
+                lambda _, html=html: product_parser._parse_offers(html),
+                iterations=args.iterations,
+                offers=offers,
+                page_bytes=len(html.encode()),
+            )
+        )
+    return results
+
+
+async def news_suite(args) -> List[BenchmarkResult]:
+    from src.services.news_parser import BaseNewsParser
+
+    parser = BaseNewsParser()
+    items = news_items_json(100)
+    try:
+        # Conversion rewrites dates in place, so every run gets a fresh copy
+        return [
+            await measure(
+                "news_objects_from_json[100]",
+                parser._create_news_objects_from_json,
+                setup=lambda: copy.deepcopy(items),
+                iterations=args.iterations,
+            )
+        ]
+    finally:
+        await parser.close()
+
+
+async def repository_suite(args) -> List[BenchmarkResult]:
+    from src.repositories.news_repository import news_repository
+    from src.repositories.product_repository import product_repository
+    from src.schemas.product import ProductResponse
+    from src.services.news_parser import BaseNewsParser
+    from src.services.product_parser import product_parser
+
+    offers = await product_parser._parse_offers(product_page_fixture(100))
+    product = ProductResponse(url=PRODUCT_URL.format(0), offers=offers)
+    urls = [PRODUCT_URL.format(i) for i in range(100)]
+    for url in urls:
+        await product_repository.save_or_update_product(
+            product.model_copy(update={"url": url})
+        )
+
+    await seed_news_cache()
+    parser = BaseNewsParser()
+    await parser.close()
+    batches = iter(range(10**6))
+
+    def fresh_news():
+        # Unique URLs per batch so every call takes the insert path
+        items = news_items_json(50, seed=next(batches))
+        for item in items:
+            item["url"] += f"{next(batches)}/"
+        return parser._create_news_objects_from_json(items)
+
+    results = [
+        await measure(
+            "product_repository.get_product_by_url",
+            lambda _: product_repository.get_product_by_url(urls[0]),
+            iterations=args.iterations,
+        ),
+        await measure(
+            "product_repository.get_products_by_urls[100]",
+            lambda _: product_repository.get_products_by_urls(urls),
+            iterations=args.iterations,
+        ),
+        await measure(
+            "product_repository.save_or_update_product[100_offers]",
+            lambda _: product_repository.save_or_update_product(product),
+            iterations=args.iterations,
+        ),
+        await measure(
+            "news_repository.save_news_items[50]",
+            lambda news: news_repository.save_news_items(news, "pravda.com.ua"),
+            setup=fresh_news,
+            iterations=args.iterations,
+        ),
+        await measure(
+            "news_repository.get_news_by_source_and_date",
+            lambda _: news_repository.get_news_by_source_and_date(
+                NEWS_SOURCE, datetime.utcnow()
+            ),
+            iterations=args.iterations,
+        ),
+    ]
+    return results
+
+
+async def endpoint_suite(args) -> List[BenchmarkResult]:
+    from src.main import app, setup_scheduler_and_routers
+    from src.repositories.product_repository import product_repository
+    from src.schemas.product import ProductResponse
+    from src.services.product_parser import product_parser
+
+    settings.SCHEDULER_ENABLED = False
+    # Timing the handlers, not the limiter
+    settings.RATE_LIMIT_READ_PER_MINUTE = 10**9
+    settings.RATE_LIMIT_READ_BURST = 10**9
+    await setup_scheduler_and_routers()
+
+    product_url = PRODUCT_URL.format("endpoint")
+    offers = await product_parser._parse_offers(product_page_fixture(100))
+    await product_repository.save_or_update_product(
+        ProductResponse(url=product_url, offers=offers)
+    )
+
+    await seed_news_cache()
+
+    headers = {"X-API-Key": settings.API_KEYS[0]}
+    until = (datetime.utcnow() + timedelta(days=1)).date().isoformat()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers
+    ) as client:
+
+        async def request(path: str, params: Dict[str, str]):
+            response = await client.post(path, params=params)
+            response.raise_for_status()
+
+        return [
+            await measure(
+                "endpoint.products[cache_hit]",
+                lambda _: request("/products", {"url": product_url}),
+                iterations=args.iterations,
+            ),
+            await measure(
+                "endpoint.news[cache_hit]",
+                lambda _: request("/news", {"url": NEWS_SOURCE, "until_date": until}),
+                iterations=args.iterations,
+            ),
+        ]
+
+
+async def browser_suite(args) -> List[BenchmarkResult]:
+    """Full parse_product pipeline replayed from a HAR archive"""
+    from src.services.browser_client import browser_client
+    from src.services.har_recorder import HarMode, har_recorder
+    from src.services.product_parser import product_parser
+
+    try:
+        await browser_client.start()
+    except Exception as e:
+        print(f"Skipping browser suite, Chromium is not available: {e}")
+        return []
+
+    url = PRODUCT_URL.format("har")
+    with tempfile.TemporaryDirectory() as har_dir:
+        har_recorder.har_dir = Path(har_dir)
+        har_recorder.mode = HarMode.REPLAY
+        har_recorder.latency_ms = args.har_latency_ms
+        har_recorder.har_path(url).write_text(
+            json.dumps(har_archive(url, product_page_fixture(100))),
+            encoding="utf-8",
+        )
+        try:
+            return [
+                await measure(
+                    f"parse_product[har_replay,{args.har_latency_ms:g}ms]",
+                    lambda _: product_parser.parse_product(url),
+                    iterations=min(args.iterations, 10),
+                    warmup=1,
+                )
+            ]
+        finally:
+            await browser_client.close()
+
+
+SUITES: Dict[str, Suite] = {
+    "parse_offers": parser_suite,
+    "news": news_suite,
+    "repository": repository_suite,
+    "endpoint": endpoint_suite,
+    "browser": browser_suite,
+}
+
+
+async def main(args) -> int:
+    connect(args.mongo_url)
+    await db.client.drop_database(BENCH_DATABASE)
+    results: List[BenchmarkResult] = []
+    try:
+        for name, suite in SUITES.items():
+            if args.only and args.only not in name:
+                continue
+            results.extend(await suite(args))
+    finally:
+        await db.client.drop_database(BENCH_DATABASE)
+
+    print(f"{'benchmark':<55} {'median ms':>10} {'p95 ms':>10} {'ops/s':>10}")
+    for result in results:
+        print(
+            f"{result.name:<55} {result.median_ms:>10.3f} "
+            f"{result.p95_ms:>10.3f} {result.ops_per_sec:>10.1f}"
+        )
+
+    mongo = "real" if args.mongo_url else "mongomock"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    write_results(results, RESULTS_DIR / f"results_{stamp}.json", mongo=mongo)
+
+    if args.save_baseline:
+        write_results(results, BASELINE_PATH, mongo=mongo)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("No baseline found, run with --save-baseline first")
+        return 0
+
+    rows = compare(results, BASELINE_PATH, args.threshold)
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        marker = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<55} {row['baseline_ms']:>10.3f} -> "
+            f"{row['current_ms']:>10.3f} ({row['change']:+.1%}) {marker}"
+        )
+    return 1 if regressions else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", help="Run suites whose name contains this")
+    parser.add_argument("--mongo-url", help="Use a real MongoDB instead of mongomock")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed median slowdown before failing (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--har-latency-ms",
+        type=float,
+        default=50,
+        help="Delay added to every replayed response in the browser suite",
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    sys.exit(run(main(parse_args())))
@@ -0,0 +1,307 @@
+"""
+Maintenance commands, run against MONGODB_URL / DATABASE_NAME from settings
+
+    python -m src.cli compress-news [--batch-size 500] [--dry-run]
+    python -m src.cli storage-report
+    python -m src.cli export news --output news.ndjson [--resume]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from .core.database import db, init_db
+from .repositories.news_repository import news_repository
+from .schemas.export import ExportDataset, ExportFormat, ExportQuery
+from .services.export import export_service
+
+
+def _size(value: float) -> str:
+    """Human readable byte count"""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def _fitting_in_cache(stats: Dict[str, Any]) -> int:
+    """News documents the whole WiredTiger cache could hold at their size"""
+    if not stats["avg_document_bytes"]:
+        return 0
+    return int(stats["cache_max_bytes"] / stats["avg_document_bytes"])
+
+
+def print_storage(stats: Dict[str, Any], before: Optional[Dict[str, Any]] = None):
+    rows = [
+        ("data size", "data_bytes"),
+        ("avg document", "avg_document_bytes"),
+        ("storage size (on disk)", "storage_bytes"),
+        ("index size", "index_bytes"),
+        ("news in WiredTiger cache", "cache_bytes"),
+        ("search copies data size", "search_data_bytes"),
+        ("search index size", "search_index_bytes"),
+        ("search in WiredTiger cache", "search_cache_bytes"),
+        ("avg article incl. search", "avg_article_bytes"),
+    ]
+    print(
+        f"documents: {stats['documents']}, "
+        f"compressed: {stats['compressed_documents']}"
+    )
+    for label, key in rows:
+        line = f"{label:<28} {_size(stats[key]):>12}"
+        if before is not None:
+            line = f"{label:<28} {_size(before[key]):>12} -> {_size(stats[key]):>12}"
+            if before[key]:
+                line += f" ({stats[key] / before[key] - 1:+.0%})"
+        print(line)
+    fitting = f"{_fitting_in_cache(stats):,}"
+    if before is not None:
+        fitting = f"{_fitting_in_cache(before):,} -> {fitting}"
+    print(
+        f"{'documents fitting in cache':<28} {fitting} "
+        f"(cache {_size(stats['cache_max_bytes'])})"
+    )
+
+
+async def compress_news(args) -> int:
+    before = await news_repository.storage_stats()
+    moved = await news_repository.backfill_search(
+        batch_size=args.batch_size, dry_run=args.dry_run
+    )
+    if moved["moved_bytes"]:
+        print(
+            f"{'Would move' if args.dry_run else 'Moved'} "
+            f"{_size(moved['moved_bytes'])} of embedded search copies to news_search"
+        )
+    stats = await news_repository.compress_stored_articles(
+        batch_size=args.batch_size, dry_run=args.dry_run
+    )
+    saved = stats["plain_bytes"] - stats["compressed_bytes"]
+    print(
+        f"{'Would compress' if args.dry_run else 'Compressed'} "
+        f"{stats['documents']} documents: {_size(stats['plain_bytes'])} of bodies "
+        f"and comments -> {_size(stats['compressed_bytes'])} "
+        f"({_size(saved)} saved)"
+    )
+    if not args.dry_run:
+        print_storage(await news_repository.storage_stats(), before)
+        # WiredTiger reuses the freed space, compact returns it to the OS
+        print("Run the compact command on news to shrink the files on disk")
+    return 0
+
+
+async def storage_report(args) -> int:
+    print_storage(await news_repository.storage_stats())
+    return 0
+
+
+def _save_checkpoint(path: str, state: Dict[str, Any]):
+    """Replace the checkpoint atomically, a crash leaves the old or the new one"""
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(state, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def _part_path(output: str, part: Optional[int]) -> str:
+    """Parquet part file of an export, all of them for None"""
+    path = Path(output)
+    number = "*" if part is None else f"{part:05d}"
+    return str(path.with_name(f"{path.stem}-{number}{path.suffix}"))
+
+
+async def _export_text(request: ExportQuery, args, state: Dict[str, Any]) -> str:
+    """
+    NDJSON or CSV into one file
+
+    The checkpoint records the last exported id and the file size after its
+    batch was flushed; resuming truncates whatever was written past that.
+    """
+    encoder = export_service.encoder(request)
+    checkpoint = f"{args.output}.checkpoint"
+    with open(args.output, "r+b" if state["after"] else "wb") as file:
+        if state["after"]:
+            file.truncate(state["offset"])
+            file.seek(state["offset"])
+        else:
+            file.write(encoder.begin())
+        async for rows in export_service.batches(request, encoder.columns):
+            file.write(await asyncio.to_thread(encoder.encode, rows))
+            file.flush()
+            os.fsync(file.fileno())
+            state.update(
+                after=rows[-1]["id"], offset=file.tell(), rows=state["rows"] + len(rows)
+            )
+            _save_checkpoint(checkpoint, state)
+        file.write(encoder.end())
+    return args.output
+
+
+async def _export_parts(request: ExportQuery, args, state: Dict[str, Any]) -> str:
+    """
+    Parquet into part files of about --rows-per-file rows
+
+    A Parquet file is only readable once its footer is written, so the
+    checkpoint advances when a part is closed and resuming rewrites the
+    part that was open.
+    """
+    checkpoint = f"{args.output}.checkpoint"
+    columns = export_service.columns(request.dataset, request.columns)
+    file, encoder, part_rows = None, None, 0
+    async for rows in export_service.batches(request, columns):
+        if file is None:
+            encoder = export_service.encoder(request)
+            file = open(_part_path(args.output, state["part"]), "wb")
+            file.write(encoder.begin())
+        file.write(await asyncio.to_thread(encoder.encode, rows))
+        part_rows += len(rows)
+        if part_rows >= args.rows_per_file:
+            file.write(encoder.end())
+            file.close()
+            print(f"Wrote {_part_path(args.output, state['part'])}")
+            state.update(
+                after=rows[-1]["id"],
+                part=state["part"] + 1,
+                rows=state["rows"] + part_rows,
+            )
+            _save_checkpoint(checkpoint, state)
+            file, part_rows = None, 0
+    if file is not None:
+        file.write(encoder.end())
+        file.close()
+        state["rows"] += part_rows
+    return _part_path(args.output, None)
+
+
+def _output_intact(request: ExportQuery, args, state: Dict[str, Any]) -> bool:
+    """Whether what the checkpoint counts as exported is still on disk"""
+    if request.format == ExportFormat.PARQUET:
+        return all(
+            os.path.exists(_part_path(args.output, part))
+            for part in range(state["part"])
+        )
+    return (
+        os.path.exists(args.output) and os.path.getsize(args.output) >= state["offset"]
+    )
+
+
+def _format_of(output: str) -> ExportFormat:
+    suffix = Path(output).suffix.lstrip(".")
+    if suffix in {f.value for f in ExportFormat}:
+        return ExportFormat(suffix)
+    return ExportFormat.NDJSON
+
+
+async def export(args) -> int:
+    request = ExportQuery(
+        dataset=args.dataset,
+        format=args.format or _format_of(args.output),
+        source=args.source,
+        urls=args.url,
+        shop=args.shop,
+        since=args.since,
+        until=args.until,
+        columns=args.columns.split(",") if args.columns else None,
+    )
+    query = request.model_dump(mode="json", exclude={"after"})
+    checkpoint = f"{args.output}.checkpoint"
+    fresh = {"query": query, "after": None, "offset": 0, "part": 0, "rows": 0}
+    state = dict(fresh)
+    if args.resume and os.path.exists(checkpoint):
+        with open(checkpoint) as file:
+            state = json.load(file)
+        if state["query"] != query:
+            print(f"{checkpoint} belongs to another export: {state['query']}")
+            return 1
+        if _output_intact(request, args, state):
+            print(f"Resuming after {state['after']}, {state['rows']} rows exported")
+        else:
+            print(f"Output of {checkpoint} is missing, starting over")
+            state = fresh
+    request.after = state["after"]
+
+    try:
+        if request.format == ExportFormat.PARQUET:
+            written = await _export_parts(request, args, state)
+        else:
+            written = await _export_text(request, args, state)
+    except HTTPException as e:
+        print(e.detail)
+        return 1
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    print(f"Exported {state['rows']} rows to {written}")
+    return 0
+
+
+COMMANDS = {
+    "compress-news": compress_news,
+    "storage-report": storage_report,
+    "export": export,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    compress = commands.add_parser(
+        "compress-news",
+        help="Compress bodies and comments of stored news, move out search copies",
+    )
+    compress.add_argument("--batch-size", type=int, default=500)
+    compress.add_argument(
+        "--dry-run", action="store_true", help="Only report what would be saved"
+    )
+    commands.add_parser(
+        "storage-report",
+        help="Size of the news and search collections and their cache share",
+    )
+    export_parser = commands.add_parser(
+        "export", help="Export a collection to NDJSON, CSV or Parquet"
+    )
+    export_parser.add_argument("dataset", choices=[d.value for d in ExportDataset])
+    export_parser.add_argument("--output", "-o", required=True)
+    export_parser.add_argument(
+        "--format",
+        choices=[f.value for f in ExportFormat],
+        help="Defaults to the output file extension",
+    )
+    export_parser.add_argument("--source", help="News source domain")
+    export_parser.add_argument(
+        "--url", action="append", default=[], help="Article URL (news) or product URL"
+    )
+    export_parser.add_argument("--shop", help="Offers of this shop")
+    export_parser.add_argument("--since", type=datetime.fromisoformat)
+    export_parser.add_argument("--until", type=datetime.fromisoformat)
+    export_parser.add_argument("--columns", help="Comma separated columns")
+    export_parser.add_argument(
+        "--rows-per-file",
+        type=int,
+        default=1_000_000,
+        help="Rows per Parquet part file",
+    )
+    export_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the checkpoint left by an interrupted export",
+    )
+    return parser.parse_args()
+
+
+async def main(args) -> int:
+    await init_db()
+    try:
+        return await COMMANDS[args.command](args)
+    finally:
+        db.client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
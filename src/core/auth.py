@@ -1,15 +1,125 @@
-from fastapi import HTTPException, Security, status
+import hashlib
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Security, status
 from fastapi.security import APIKeyHeader
 
+from ..models.api_key import ApiKey
+from ..repositories.api_key_repository import api_key_repository
 from .config import settings
+from .rate_limit import rate_limiter
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
-async def get_api_key(api_key: str = Security(api_key_header)):
-    if api_key not in settings.API_KEYS:
+class Budget(str, Enum):
+    """Separate rate limit budgets per API key"""
+
+    READ = "read"  # any authenticated request, usually served from database
+    PARSE = "parse"  # live browser / HTTP parse on cache miss
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class ApiKeyCache:
+    """
+    Verified API keys by hash
+
+    Keys are re-read from database after `ttl_seconds` so revocations on
+    other nodes propagate. Unknown keys are remembered in a bounded LRU so
+    repeated bad keys don't each cost a database round trip.
+    """
+
+    def __init__(self, ttl_seconds: int, max_unknown: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_unknown = max_unknown
+        self._keys: Dict[str, Tuple[ApiKey, float]] = {}
+        self._unknown: "OrderedDict[str, float]" = OrderedDict()
+
+    def get(self, key_hash: str) -> Tuple[bool, Optional[ApiKey]]:
+        """Returns (cached, key), key is None for known-invalid hashes"""
+        now = time.monotonic()
+        entry = self._keys.get(key_hash)
+        if entry is not None and entry[1] > now:
+            return True, entry[0]
+        expires_at = self._unknown.get(key_hash)
+        if expires_at is not None and expires_at > now:
+            return True, None
+        return False, None
+
+    def set(self, key_hash: str, api_key: Optional[ApiKey]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        if api_key is not None:
+            self._keys[key_hash] = (api_key, expires_at)
+            self._unknown.pop(key_hash, None)
+            return
+        self._keys.pop(key_hash, None)
+        self._unknown[key_hash] = expires_at
+        self._unknown.move_to_end(key_hash)
+        while len(self._unknown) > self.max_unknown:
+            self._unknown.popitem(last=False)
+
+    def invalidate(self, key_hash: str):
+        self._keys.pop(key_hash, None)
+        self._unknown.pop(key_hash, None)
+
+
+api_key_cache = ApiKeyCache(ttl_seconds=settings.API_KEY_CACHE_TTL_SECONDS)
+
+
+async def resolve_api_key(api_key: Optional[str]) -> Optional[ApiKey]:
+    """Verify plaintext API key, hitting database only on cache miss"""
+    if not api_key:
+        return None
+    key_hash = hash_api_key(api_key)
+    cached, record = api_key_cache.get(key_hash)
+    if not cached:
+        record = await api_key_repository.get_by_hash(key_hash)
+        api_key_cache.set(key_hash, record)
+    return record
+
+
+def consume_budget(api_key: ApiKey, budget: Budget, cost: int = 1):
+    """Take tokens from key's budget or raise RateLimitException"""
+    if budget == Budget.PARSE:
+        rate = api_key.parse_rate_per_minute
+        burst = api_key.parse_burst
+        default_rate = settings.RATE_LIMIT_PARSE_PER_MINUTE
+        default_burst = settings.RATE_LIMIT_PARSE_BURST
+    else:
+        rate = api_key.read_rate_per_minute
+        burst = api_key.read_burst
+        default_rate = settings.RATE_LIMIT_READ_PER_MINUTE
+        default_burst = settings.RATE_LIMIT_READ_BURST
+
+    rate_limiter.check(
+        (api_key.id, budget.value),
+        rate_per_minute=default_rate if rate is None else rate,
+        burst=default_burst if burst is None else burst,
+        cost=cost,
+    )
+
+
+async def get_api_key(api_key: str = Security(api_key_header)) -> ApiKey:
+    record = await resolve_api_key(api_key)
+    if record is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API Key",
         )
+    consume_budget(record, Budget.READ)
+    return record
+
+
+async def require_admin(api_key: ApiKey = Depends(get_api_key)) -> ApiKey:
+    if not api_key.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API key required",
+        )
     return api_key
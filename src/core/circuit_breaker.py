@@ -0,0 +1,250 @@
+import asyncio
+import random
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from fastapi import HTTPException
+
+from .config import settings
+from .deadline import Deadline
+from .exceptions import CircuitOpenException
+from .logger import log
+from .metrics import CIRCUIT_BREAKER_STATE, PARSE_RETRIES
+from .rate_limit import TokenBucket
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+_STATE_GAUGE = {BreakerState.CLOSED: 0, BreakerState.HALF_OPEN: 1, BreakerState.OPEN: 2}
+
+
+def breaker_domain(url: str) -> str:
+    """Breaker key for URL, `www.` is the same target as the bare domain"""
+    domain = urlparse(url).netloc.lower() if "://" in url else url.lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def is_failure(error: BaseException) -> bool:
+    """Errors that say something about the target's health"""
+    if isinstance(error, HTTPException):
+        return error.status_code >= 500 or error.status_code == 408
+    return isinstance(error, Exception)
+
+
+class CircuitBreaker:
+    """
+    Error-rate and latency circuit breaker for one target domain
+
+    Outcomes of the last `window_size` calls are kept; once at least
+    `min_calls` are recorded the breaker opens when the failure share or the
+    share of slow calls reaches its threshold. Calls are slow when they take
+    `slow_call_seconds` or run into their deadline, whatever its length.
+    After `open_seconds` one probe call is let through (half-open): success
+    closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.state = BreakerState.CLOSED
+        self.opened_at = 0.0
+        self.window: Deque[Tuple[bool, bool]] = deque(
+            maxlen=settings.BREAKER_WINDOW_SIZE
+        )
+        self.probe_in_flight = False
+        # Retries draw from here so a failing target can't multiply its load
+        self.retry_budget = TokenBucket(
+            settings.RETRY_BUDGET_PER_MINUTE / 60, settings.RETRY_BUDGET_BURST
+        )
+        self._set_state(BreakerState.CLOSED)
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        if self.state != BreakerState.OPEN:
+            return 0.0
+        return max(
+            0.0, self.opened_at + settings.BREAKER_OPEN_SECONDS - time.monotonic()
+        )
+
+    def rates(self) -> Tuple[float, float]:
+        """Failure and slow call share of the current window"""
+        if not self.window:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self.window if failed)
+        slow = sum(1 for _, is_slow in self.window if is_slow)
+        return failures / len(self.window), slow / len(self.window)
+
+    def status(self) -> Dict[str, Any]:
+        failure_rate, slow_rate = self.rates()
+        # Refreshes the bucket without taking a token
+        self.retry_budget.consume(0)
+        return {
+            "domain": self.domain,
+            "state": self.state,
+            "calls": len(self.window),
+            "failure_rate": round(failure_rate, 3),
+            "slow_rate": round(slow_rate, 3),
+            "retry_after": round(self.retry_after, 1),
+            "retry_tokens": round(self.retry_budget.tokens, 2),
+        }
+
+    def acquire(self):
+        """Admit a call or raise CircuitOpenException"""
+        if self.state == BreakerState.OPEN:
+            if self.retry_after > 0:
+                raise CircuitOpenException(self.domain, self.retry_after)
+            self._set_state(BreakerState.HALF_OPEN)
+
+        if self.state == BreakerState.HALF_OPEN:
+            if self.probe_in_flight:
+                raise CircuitOpenException(self.domain, settings.BREAKER_OPEN_SECONDS)
+            self.probe_in_flight = True
+
+    def record(self, failed: bool, duration: float, deadline_hit: bool = False):
+        slow = deadline_hit or duration >= settings.BREAKER_SLOW_CALL_SECONDS
+        if self.state == BreakerState.HALF_OPEN:
+            self.probe_in_flight = False
+            if failed or slow:
+                self._open()
+            else:
+                self.window.clear()
+                self._set_state(BreakerState.CLOSED)
+                log.info(f"Circuit breaker closed for {self.domain}")
+            return
+
+        self.window.append((failed, slow))
+        if self.state == BreakerState.CLOSED and len(self.window) >= min(
+            settings.BREAKER_MIN_CALLS, self.window.maxlen
+        ):
+            failure_rate, slow_rate = self.rates()
+            if (
+                failure_rate >= settings.BREAKER_ERROR_RATE
+                or slow_rate >= settings.BREAKER_SLOW_CALL_RATE
+            ):
+                self._open()
+
+    def release(self):
+        """Give back a half-open probe slot that ended without an outcome"""
+        if self.state == BreakerState.HALF_OPEN:
+            self.probe_in_flight = False
+
+    def reset(self):
+        self.window.clear()
+        self.probe_in_flight = False
+        self._set_state(BreakerState.CLOSED)
+
+    def _open(self):
+        failure_rate, slow_rate = self.rates()
+        self.opened_at = time.monotonic()
+        self._set_state(BreakerState.OPEN)
+        log.warning(
+            f"Circuit breaker opened for {self.domain}: "
+            f"failures {failure_rate:.0%}, slow {slow_rate:.0%}"
+        )
+
+    def _set_state(self, state: BreakerState):
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(self.domain).set(_STATE_GAUGE[state])
+
+
+class CircuitBreakerRegistry:
+    """Breakers keyed by target domain, plus retries with exponential backoff"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        domain = breaker_domain(url)
+        breaker = self._breakers.get(domain)
+        if breaker is None:
+            breaker = self._breakers[domain] = CircuitBreaker(domain)
+        return breaker
+
+    def is_open(self, url: str) -> bool:
+        breaker = self._breakers.get(breaker_domain(url))
+        return breaker is not None and breaker.retry_after > 0
+
+    def all(self) -> Dict[str, CircuitBreaker]:
+        return dict(self._breakers)
+
+    def reset(self, domain: str) -> bool:
+        breaker = self._breakers.get(breaker_domain(domain))
+        if breaker is None:
+            return False
+        breaker.reset()
+        log.info(f"Circuit breaker reset for {breaker.domain}")
+        return True
+
+    async def call(
+        self,
+        url: str,
+        func: Callable[[], Awaitable[Any]],
+        deadline: Optional[Deadline] = None,
+        retries: Optional[int] = None,
+    ) -> Any:
+        """
+        Run `func` for the domain of `url` through its breaker
+
+        Failed calls are retried up to `retries` times with exponential
+        backoff and jitter, while the domain's retry budget has tokens and
+        the deadline leaves room for the wait. Raises CircuitOpenException
+        without calling `func` when the breaker is open.
+        """
+        breaker = self.get(url)
+        retries = settings.PARSE_RETRIES if retries is None else retries
+        deadline = deadline or Deadline()
+        # A call ending inside the parse reserve used up its deadline, it
+        # returned a partial result or is about to time out
+        reserve = deadline.reserve(settings.PARSE_DEADLINE_RESERVE_SECONDS)
+        attempt = 0
+        while True:
+            breaker.acquire()
+            started = time.monotonic()
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                failed = is_failure(e)
+                breaker.record(
+                    failed, time.monotonic() - started, deadline.expired(reserve)
+                )
+                if not failed or attempt >= retries:
+                    raise
+                if breaker.state == BreakerState.OPEN:
+                    raise
+
+                backoff = min(
+                    settings.RETRY_BACKOFF_MAX_SECONDS,
+                    settings.RETRY_BACKOFF_SECONDS * 2**attempt,
+                ) * random.uniform(0.5, 1.0)
+                remaining = deadline.remaining()
+                if remaining is not None and remaining <= backoff:
+                    raise
+                if breaker.retry_budget.consume() > 0:
+                    log.warning(f"Retry budget exhausted for {breaker.domain}")
+                    raise
+
+                attempt += 1
+                PARSE_RETRIES.labels(breaker.domain).inc()
+                log.warning(
+                    f"Retrying {url} in {backoff:.1f}s "
+                    f"(attempt {attempt}/{retries}): {str(e)}"
+                )
+                await asyncio.sleep(backoff)
+            else:
+                breaker.record(
+                    False, time.monotonic() - started, deadline.expired(reserve)
+                )
+                return result
+
+
+circuit_breakers = CircuitBreakerRegistry()
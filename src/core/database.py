@@ -2,6 +2,7 @@ from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from .config import settings
 from .logger import log
+from .metrics import MongoCommandMetrics
 
 
 class Database:
@@ -14,7 +15,9 @@ db = Database()
 
 async def init_db():
     try:
-        db.client = AsyncIOMotorClient(settings.MONGODB_URL)
+        db.client = AsyncIOMotorClient(
+            settings.MONGODB_URL, event_listeners=[MongoCommandMetrics()]
+        )
         db.database = db.client[settings.DATABASE_NAME]
         log.success("Database initialized successfully")
     except Exception as e:
@@ -26,7 +29,8 @@ async def close_db():
     from ..services.scheduler import scheduler_service
 
     if db.client:
-        # await scheduler_service.stop_scheduler()
+        if scheduler_service.scheduler.running:
+            await scheduler_service.stop_scheduler()
         db.client.close()
         log.info("Database connection closed")
 
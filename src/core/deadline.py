@@ -0,0 +1,44 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    Absolute time budget shared by every step of a request
+
+    Steps ask how much time is left instead of taking their own fixed
+    timeouts, so time spent waiting in one step is not granted again to the
+    next. `reserve` holds seconds back for steps that still have to run
+    afterwards. A deadline without a budget never expires.
+    """
+
+    __slots__ = ("budget", "expires_at")
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def reserve(self, seconds: float) -> float:
+        """`seconds` to hold back, at most a quarter of the budget"""
+        return min(seconds, (self.budget or 0) * 0.25)
+
+    def remaining(self, reserve: float = 0) -> Optional[float]:
+        """Seconds left before `reserve`, None when unlimited"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - reserve - time.monotonic()
+
+    def expired(self, reserve: float = 0) -> bool:
+        remaining = self.remaining(reserve)
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, reserve: float = 0) -> asyncio.Timeout:
+        """`async with` scope cancelled when the remaining time runs out"""
+        remaining = self.remaining(reserve)
+        return asyncio.timeout(None if remaining is None else max(0.0, remaining))
+
+    def timeout_ms(self, reserve: float = 0) -> Optional[float]:
+        """Remaining time for Playwright calls, which treat 0 as no timeout"""
+        remaining = self.remaining(reserve)
+        return None if remaining is None else max(1.0, remaining * 1000)
@@ -1,3 +1,6 @@
+import math
+from typing import Optional
+
 from fastapi import HTTPException, status
 
 
@@ -7,8 +10,38 @@ class TimeoutException(HTTPException):
 
 
 class RateLimitException(HTTPException):
-    def __init__(self, detail: str = "Rate limit exceeded"):
-        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail)
+    def __init__(
+        self,
+        detail: str = "Rate limit exceeded",
+        retry_after: Optional[float] = None,
+    ):
+        headers = None
+        if retry_after is not None and math.isfinite(retry_after):
+            headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers=headers,
+        )
+
+
+class CircuitOpenException(HTTPException):
+    """Target domain is failing, calls are rejected until the breaker probes it"""
+
+    def __init__(self, domain: str, retry_after: float):
+        self.domain = domain
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{domain} is temporarily unavailable",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class BlockedException(HTTPException):
+    """Target refused the request, usually because of the egress address"""
+
+    def __init__(self, detail: str = "Blocked by target site"):
+        super().__init__(status_code=status.HTTP_502_BAD_GATEWAY, detail=detail)
 
 
 class ParsingException(HTTPException):
@@ -16,3 +49,32 @@ class ParsingException(HTTPException):
         super().__init__(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail
         )
+
+
+class InvalidCursorException(HTTPException):
+    def __init__(self, detail: str = "Invalid pagination cursor"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class InvalidFieldsException(HTTPException):
+    def __init__(self, detail: str = "Unknown fields requested"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class TooManyBucketsException(HTTPException):
+    def __init__(self, detail: str = "Too many history buckets requested"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class FeatureUnavailableException(HTTPException):
+    """Optional dependency of the requested feature isn't installed"""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=detail)
+
+
+class UnsafeWebhookException(HTTPException):
+    """Webhook points at a loopback, private or otherwise internal address"""
+
+    def __init__(self, detail: str = "Webhook URL must point to a public address"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
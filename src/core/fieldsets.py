@@ -0,0 +1,86 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from fastapi import Response
+from pydantic_core import to_json
+
+from .exceptions import InvalidFieldsException
+
+
+class ResponseView(str, Enum):
+    """Named field presets of list responses"""
+
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class FieldSet:
+    """Fields of a resource clients may select, mapped to document paths"""
+
+    def __init__(self, paths: Dict[str, str], summary: List[str]):
+        self.paths = paths
+        self.presets = {ResponseView.SUMMARY: summary}
+
+    def resolve(
+        self, fields: Optional[str], view: ResponseView = ResponseView.FULL
+    ) -> Optional[List[str]]:
+        """
+        Document paths selected by a comma separated `fields` list or a view
+
+        `fields` wins over `view`. None means the whole document, unknown
+        names raise InvalidFieldsException.
+        """
+        if fields:
+            names = [name.strip() for name in fields.split(",") if name.strip()]
+            unknown = [name for name in names if name not in self.paths]
+            if unknown or not names:
+                raise InvalidFieldsException(
+                    f"Unknown fields: {', '.join(unknown)}. "
+                    f"Available: {', '.join(self.paths)}"
+                )
+        elif view in self.presets:
+            names = self.presets[view]
+        else:
+            return None
+        return list(dict.fromkeys(self.paths[name] for name in names))
+
+
+def projection(paths: List[str]) -> Dict[str, int]:
+    """Mongo projection returning only paths"""
+    # Parent and child of the same path collide in a projection
+    kept = [
+        path
+        for path in paths
+        if not any(path.startswith(f"{other}.") for other in paths)
+    ]
+    return {"_id": 0, **{path: 1 for path in kept}}
+
+
+def pick(document: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Nested subset of a document, like a Mongo projection of paths"""
+    picked: Dict[str, Any] = {}
+    nested: Dict[str, List[str]] = {}
+    for path in paths:
+        head, _, rest = path.partition(".")
+        if head not in document:
+            continue
+        if not rest:
+            picked[head] = document[head]
+        else:
+            nested.setdefault(head, []).append(rest)
+    for head, rests in nested.items():
+        if head in picked:
+            continue
+        value = document[head]
+        if isinstance(value, list):
+            picked[head] = [
+                pick(item, rests) if isinstance(item, dict) else item for item in value
+            ]
+        elif isinstance(value, dict):
+            picked[head] = pick(value, rests)
+    return picked
+
+
+def partial_response(content: Any) -> Response:
+    """JSON response of plain documents, serialized without model validation"""
+    return Response(to_json(content), media_type="application/json")
@@ -1,10 +1,192 @@
-import os
+import asyncio
+import json
+import queue
+import sys
+import threading
+import time
+import zipfile
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, Optional, TextIO
 
 from loguru import logger
 
 from .config import settings
+from .rate_limit import TokenBucket
+
+# Set per request by RequestIdMiddleware, attached to every record
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_STOP = object()
+
+
+def _add_request_id(record: dict):
+    record["extra"].setdefault("request_id", request_id_var.get() or "-")
+
+
+def _json_line(message) -> str:
+    record = message.record
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "module": record["module"],
+        "line": record["line"],
+        **record["extra"],
+    }
+    if record["exception"] is not None:
+        payload["exception"] = repr(record["exception"].value)
+    return json.dumps(payload, ensure_ascii=False, default=str) + "\n"
+
+
+class RotatingFileWriter:
+    """
+    Log file with size-based rotation, zip compression and retention
+
+    Sizes are counted in UTF-8 bytes, Cyrillic text takes two per character.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, retention_days: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self._file = open(path, "ab")
+        self._size = path.stat().st_size
+
+    def write(self, text: str):
+        if self._size >= self.max_bytes:
+            self._rotate()
+        data = text.encode("utf-8")
+        self._file.write(data)
+        self._size += len(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def _rotate(self):
+        self._file.close()
+        suffix = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        rotated = self.path.with_name(f"{self.path.stem}.{suffix}{self.path.suffix}")
+        self.path.rename(rotated)
+        with zipfile.ZipFile(f"{rotated}.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(rotated, rotated.name)
+        rotated.unlink()
+
+        cutoff = time.time() - self.retention_days * 86400
+        for old in self.path.parent.glob("hotline_parser_*"):
+            if old != self.path and old.stat().st_mtime < cutoff:
+                old.unlink(missing_ok=True)
+
+        self._file = open(self.path, "ab")
+        self._size = 0
+
+
+class QueuedSink:
+    """
+    Loguru sink that hands records to a writer thread
+
+    The caller only puts the formatted message on a bounded in-process queue
+    (no pickling, unlike `enqueue=True`); JSON encoding, writes, rotation and
+    compression happen in the writer thread, so a slow terminal or disk never
+    blocks the event loop. When the queue is full records are dropped and the
+    number of dropped records is logged once the writer catches up.
+    """
+
+    def __init__(self, stream: TextIO, serialize: bool = False, maxsize: int = 10000):
+        self.stream = stream
+        self.serialize = serialize
+        # Incremented by logging threads, reset by the writer thread
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < 1000:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            lines = []
+            waiters = []
+            stop = False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    lines.append(_json_line(item) if self.serialize else str(item))
+            with self._dropped_lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                lines.append(f"{dropped} log records dropped, log queue was full\n")
+
+            try:
+                if lines:
+                    self.stream.write("".join(lines))
+                    self.stream.flush()
+            except Exception:
+                pass
+
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def drain(self, timeout: float = 5.0):
+        """Block until records queued so far are written"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    async def complete(self):
+        await asyncio.to_thread(self.drain)
+
+    def stop(self):
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5.0)
+        if isinstance(self.stream, RotatingFileWriter):
+            self.stream.close()
+
+
+class LogSampler:
+    """
+    Rate-limited sampling for high-volume debug logs
+
+    `allow(key)` lets through at most `per_second` records per key (with a
+    small burst), so per-item logs in loops can't flood the sinks.
+    """
+
+    def __init__(self, per_second: float, burst: float):
+        self.per_second = per_second
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.per_second, self.burst)
+            return bucket.consume() == 0
 
 
 def setup_logger():
@@ -17,35 +199,44 @@ def setup_logger():
 
     # Remove default logger
     logger.remove()
+    logger.configure(patcher=_add_request_id)
 
     # Custom format
     format_string = (
         "<green>{time:DD.MM.YY HH:mm:ss}</green> | "
         "<level>{level: <8}</level> | "
         "[<cyan>{file}:{line}</cyan>] - "
+        "<cyan>{extra[request_id]}</cyan> - "
         "<level>{message}</level>"
     )
 
     # Console logging
     logger.add(
-        sink=lambda msg: print(msg, end=""),  # Print to console without extra newlines
-        format=format_string,
-        level="INFO",
-        colorize=True,
+        sink=QueuedSink(sys.stderr, serialize=settings.LOG_JSON),
+        format="{message}" if settings.LOG_JSON else format_string,
+        level=settings.LOG_LEVEL,
+        colorize=not settings.LOG_JSON,
     )
 
     # File logging
-    logger.add(
-        sink=log_file,
-        format=format_string,
-        level="DEBUG",
-        rotation="10 MB",
-        retention="7 days",
-        compression="zip",
-    )
+    if settings.LOG_FILE_ENABLED:
+        logger.add(
+            sink=QueuedSink(
+                RotatingFileWriter(
+                    log_file, max_bytes=10 * 1024 * 1024, retention_days=7
+                ),
+                serialize=settings.LOG_JSON,
+            ),
+            format="{message}" if settings.LOG_JSON else format_string,
+            level="DEBUG",
+            colorize=False,
+        )
 
     return logger
 
 
 # Initialize logger
 log = setup_logger()
+log_sampler = LogSampler(
+    per_second=settings.LOG_SAMPLE_PER_SECOND, burst=settings.LOG_SAMPLE_BURST
+)
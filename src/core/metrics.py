@@ -0,0 +1,104 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+PARSE_PHASE_SECONDS = Histogram(
+    "parse_phase_duration_seconds",
+    "Duration of product parse phases",
+    ["phase"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to response start per endpoint",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency",
+    ["command", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Stored data lookups before falling back to a live parse",
+    ["cache", "result"],
+)
+SCHEDULER_CYCLE_SECONDS = Histogram(
+    "scheduler_cycle_duration_seconds",
+    "Duration of watchlist dispatch cycles",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+SCHEDULER_ENTRIES = Counter(
+    "scheduler_entries_total",
+    "Watchlist entries processed by the dispatcher",
+    ["kind", "status"],
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Parse target breaker state (0 closed, 1 half-open, 2 open)",
+    ["domain"],
+)
+PARSE_RETRIES = Counter("parse_retries_total", "Retried parse attempts", ["domain"])
+EGRESS_REQUESTS = Counter(
+    "egress_requests_total", "Leases of egress proxies by outcome", ["proxy", "outcome"]
+)
+BROWSER_ASSET_BYTES = Counter(
+    "browser_asset_bytes_total",
+    "Static asset bytes handed to browser contexts",
+    ["source"],
+)
+HTTP_CACHE_RESPONSES = Counter(
+    "http_cache_responses_total",
+    "Conditional news fetches by result (changed, not_modified, same_body)",
+    ["result"],
+)
+HTTP_CACHE_BYTES_SAVED = Counter(
+    "http_cache_bytes_saved_total", "Body bytes not downloaded thanks to 304"
+)
+NEWS_DUPLICATES = Counter(
+    "news_duplicates_total",
+    "Saved news items linked to an existing story cluster",
+    ["source"],
+)
+ALERTS_TRIGGERED = Counter("alerts_triggered_total", "Price alerts queued")
+ALERT_DELIVERIES = Counter(
+    "alert_deliveries_total", "Alert webhook calls by outcome", ["outcome"]
+)
+BROWSERS_OPEN = Gauge("browser_instances_open", "Running browser instances")
+BROWSER_CONTEXTS_OPEN = Gauge("browser_contexts_open", "Open browser contexts")
+
+
+@contextmanager
+def observe_phase(phase: str):
+    """Time a block into the parse phase histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PARSE_PHASE_SECONDS.labels(phase).observe(time.perf_counter() - started)
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1):
+    if count:
+        CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Feeds driver command events into the Mongo latency histogram"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.labels(event.command_name, "success").observe(
+            event.duration_micros / 1e6
+        )
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.labels(event.command_name, "failure").observe(
+            event.duration_micros / 1e6
+        )
@@ -0,0 +1,161 @@
+import asyncio
+import re
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .auth import resolve_api_key
+from .logger import request_id_var
+from .metrics import HTTP_REQUEST_SECONDS
+from .profiling import ProfileMode, profiling_service
+
+REQUEST_ID_HEADER = b"x-request-id"
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Correlates log records with the request that produced them
+
+    Takes `X-Request-ID` from the client or generates one, exposes it to
+    loggers through a context variable and echoes it in the response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")
+                if not REQUEST_ID_PATTERN.match(request_id):
+                    request_id = None
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+        # Tag the request task so profiles and asyncio debug output show it
+        task = asyncio.current_task()
+        task_name = task.get_name() if task else None
+        if task:
+            task.set_name(f"request:{request_id}")
+
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+            if task:
+                task.set_name(task_name)
+
+
+class MetricsMiddleware:
+    """
+    Records time to response start per route template
+
+    The route template (not the raw path) is used as label so URLs with
+    path parameters don't create a series per value.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status: int):
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - started)
+
+        async def send_with_metrics(message: Message):
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            if not observed:
+                observe(500)
+            raise
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests on demand
+
+    A request is profiled when an admin API key sends `X-Profile: 1`
+    (`X-Profile: loop` samples the whole event loop instead of the request
+    task) or while profiling is armed through /admin/profile. The stored
+    profile id is returned in `X-Profile-Id`.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = await self._requested_mode(scope)
+        if mode is None and profiling_service.take_slot(scope["path"]):
+            mode = profiling_service.mode
+        profiler = profiling_service.start(mode) if mode else None
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = scope.get("state", {}).get("request_id") or uuid.uuid4().hex[:16]
+
+        async def send_with_profile_id(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await profiling_service.finish(
+                profiler, profile_id, scope["method"], scope["path"]
+            )
+
+    async def _requested_mode(self, scope: Scope):
+        profile_header = api_key = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                profile_header = value.decode("latin-1").lower()
+            elif name == b"x-api-key":
+                api_key = value.decode("latin-1")
+        if profile_header not in ("1", "true", "request", "loop"):
+            return None
+
+        record = await resolve_api_key(api_key)
+        if record is None or not record.is_admin:
+            return None
+        return ProfileMode.LOOP if profile_header == "loop" else ProfileMode.REQUEST
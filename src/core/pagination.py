@@ -0,0 +1,22 @@
+import base64
+from typing import Any, List
+
+from bson import json_util
+
+from .exceptions import InvalidCursorException
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor from the sort key values of a page's last item"""
+    return base64.urlsafe_b64encode(json_util.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort key values of a cursor, InvalidCursorException if it isn't one"""
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise InvalidCursorException()
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorException()
+    return values
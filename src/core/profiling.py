@@ -0,0 +1,161 @@
+import asyncio
+import json
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+from pyinstrument.session import Session
+
+from .config import settings
+from .logger import log
+
+
+class ProfileMode(str, Enum):
+    """What the sampling profiler attributes to a profiled request"""
+
+    # Only the request's own task, awaits shown as waiting time
+    REQUEST = "request"
+    # Everything the event loop thread runs while the request is in flight,
+    # so other tasks blocking the loop show up next to the request's frames
+    LOOP = "loop"
+
+
+class ProfileFormat(str, Enum):
+    SPEEDSCOPE = "speedscope"
+    HTML = "html"
+
+
+class ProfilingService:
+    """
+    Opt-in sampling profiler for individual requests
+
+    Requests are profiled when an admin key sends `X-Profile: 1` or while
+    the service is armed for the next N requests (optionally limited to a
+    path prefix). One request is profiled at a time to bound the overhead.
+    Sessions are stored on disk and rendered on retrieval.
+    """
+
+    def __init__(self, directory: str, max_profiles: int, interval: float):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self.interval = interval
+        self.remaining = 0
+        self.path_prefix: Optional[str] = None
+        self.mode = ProfileMode.REQUEST
+        self._active = False
+
+    def arm(
+        self,
+        requests: int,
+        path_prefix: Optional[str] = None,
+        mode: ProfileMode = ProfileMode.REQUEST,
+    ):
+        self.remaining = requests
+        self.path_prefix = path_prefix
+        self.mode = mode
+        log.info(f"Profiling armed for {requests} requests ({path_prefix or 'any'})")
+
+    def disarm(self):
+        self.remaining = 0
+        self.path_prefix = None
+
+    @property
+    def armed(self) -> bool:
+        return self.remaining > 0
+
+    def take_slot(self, path: str) -> bool:
+        """Consume one armed request if it matches the path prefix"""
+        if not self.armed or self._active:
+            return False
+        if self.path_prefix and not path.startswith(self.path_prefix):
+            return False
+        self.remaining -= 1
+        return True
+
+    def start(self, mode: Optional[ProfileMode] = None) -> Optional[Profiler]:
+        if self._active:
+            return None
+        mode = mode or self.mode
+        profiler = Profiler(
+            interval=self.interval,
+            async_mode="enabled" if mode == ProfileMode.REQUEST else "disabled",
+        )
+        self._active = True
+        profiler.start()
+        return profiler
+
+    async def finish(
+        self, profiler: Profiler, profile_id: str, method: str, path: str
+    ) -> Optional[Path]:
+        """Stop profiler and store session without blocking the event loop"""
+        try:
+            session = profiler.stop()
+        finally:
+            self._active = False
+
+        meta = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "duration": session.duration,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        try:
+            return await asyncio.to_thread(self._save, session, meta)
+        except Exception as e:
+            log.error(f"Failed to save profile {profile_id}: {str(e)}")
+            return None
+
+    def _save(self, session: Session, meta: dict) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        session_path = self.directory / f"{meta['id']}.pyisession"
+        session.save(session_path)
+        (self.directory / f"{meta['id']}.json").write_text(json.dumps(meta))
+
+        sessions = sorted(
+            self.directory.glob("*.pyisession"), key=lambda p: p.stat().st_mtime
+        )
+        for old in sessions[: max(0, len(sessions) - self.max_profiles)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".json").unlink(missing_ok=True)
+        return session_path
+
+    def list_profiles(self) -> List[dict]:
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                profiles.append(json.loads(meta_path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+    def render(self, profile_id: str, fmt: ProfileFormat) -> Optional[str]:
+        """Render stored session as speedscope JSON or flamegraph-style HTML"""
+        session_path = self.directory / f"{Path(profile_id).name}.pyisession"
+        if not session_path.exists():
+            return None
+        session = Session.load(session_path)
+        if fmt == ProfileFormat.SPEEDSCOPE:
+            return SpeedscopeRenderer().render(session)
+        return HTMLRenderer().render(session)
+
+    def status(self) -> dict:
+        return {
+            "armed": self.armed,
+            "remaining": self.remaining,
+            "path_prefix": self.path_prefix,
+            "mode": self.mode.value,
+            "active": self._active,
+        }
+
+
+profiling_service = ProfilingService(
+    directory=settings.PROFILE_DIR,
+    max_profiles=settings.PROFILE_MAX_FILES,
+    interval=settings.PROFILE_INTERVAL_MS / 1000,
+)
@@ -0,0 +1,62 @@
+import math
+import time
+from typing import Dict, Hashable
+
+from .exceptions import RateLimitException
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def consume(self, cost: float = 1) -> float:
+        """Take tokens, returns 0 when allowed or seconds until enough tokens"""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Keyed token buckets, e.g. one per (API key, budget)"""
+
+    def __init__(self):
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+
+    def consume(
+        self, key: Hashable, rate_per_minute: float, burst: float, cost: float = 1
+    ) -> float:
+        bucket = self._buckets.get(key)
+        rate = rate_per_minute / 60
+        if bucket is None or bucket.rate != rate or bucket.capacity != burst:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+        return bucket.consume(cost)
+
+    def check(
+        self, key: Hashable, rate_per_minute: float, burst: float, cost: float = 1
+    ):
+        """Consume tokens or raise RateLimitException with retry delay"""
+        retry_after = self.consume(key, rate_per_minute, burst, cost)
+        if retry_after:
+            raise RateLimitException(retry_after=retry_after)
+
+    def reset(self, key: Hashable):
+        self._buckets.pop(key, None)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,46 @@
+import asyncio
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from .config import settings
+from .exceptions import UnsafeWebhookException
+
+
+def is_public_address(address: str) -> bool:
+    """Globally routable unicast address, IPv4-mapped IPv6 judged as IPv4"""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_webhook_url(url: str):
+    """
+    Reject webhooks whose host resolves to a non-public address
+
+    Every address the host resolves to has to be public, so loopback,
+    private, link-local (cloud metadata) and reserved targets can't be
+    reached through alert deliveries. Resolution errors are raised as
+    OSError, the caller decides whether they are final.
+    ALERT_WEBHOOK_ALLOW_PRIVATE turns the check off for local receivers.
+    """
+    if settings.ALERT_WEBHOOK_ALLOW_PRIVATE:
+        return
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeWebhookException("Webhook URL must be an http(s) URL with a host")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        raise UnsafeWebhookException("Webhook URL has an invalid port")
+
+    addresses = await asyncio.get_running_loop().getaddrinfo(
+        parts.hostname, port, type=socket.SOCK_STREAM
+    )
+    for _, _, _, _, sockaddr in addresses:
+        if not is_public_address(sockaddr[0]):
+            raise UnsafeWebhookException(
+                f"Webhook host {parts.hostname} resolves to non-public "
+                f"address {sockaddr[0]}"
+            )
@@ -1,11 +1,14 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from .core.config import settings
 from .core.database import close_db, init_db
 from .core.logger import log
+from .core.middleware import MetricsMiddleware, ProfilingMiddleware, RequestIdMiddleware
 
 
 @asynccontextmanager
@@ -26,8 +29,16 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     try:
+        from .services.alerts import alert_dispatcher
+        from .services.browser_client import browser_client
+        from .services.egress_pool import egress_pool
+
+        await alert_dispatcher.stop()
+        await browser_client.close()
+        await egress_pool.close()
         await close_db()
         log.info("Application shutdown complete")
+        await log.complete()
     except Exception as e:
         log.error(f"Error during shutdown: {str(e)}")
 
@@ -39,6 +50,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -54,14 +69,79 @@ async def root():
     return {"message": "Hotline Parser API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # Import routers after app creation to avoid circular imports
 async def setup_scheduler_and_routers():
-    from .core.auth import get_api_key
-    from .routers import admin, news, products
+    from .core.auth import get_api_key, hash_api_key, require_admin
+    from .models.api_key import ApiKey
+    from .repositories.alert_outbox_repository import alert_outbox_repository
+    from .repositories.alert_rule_repository import alert_rule_repository
+    from .repositories.api_key_repository import api_key_repository
+    from .repositories.crawl_state_repository import crawl_state_repository
+    from .repositories.http_cache_repository import http_cache_repository
+    from .repositories.news_repository import news_repository
+    from .repositories.offer_repository import offer_repository
+    from .repositories.price_history_repository import price_history_repository
+    from .repositories.product_repository import product_repository
+    from .repositories.watchlist_repository import watchlist_repository
+    from .routers import admin, alerts, export, news, products, stream
+    from .services.alerts import alert_dispatcher
     from .services.scheduler import scheduler_service
 
+    await watchlist_repository.ensure_indexes()
+    await api_key_repository.ensure_indexes()
+    await news_repository.ensure_indexes()
+    await crawl_state_repository.ensure_indexes()
+    await http_cache_repository.ensure_indexes()
+    await price_history_repository.ensure_collection()
+    await offer_repository.ensure_indexes()
+    await alert_rule_repository.ensure_indexes()
+    await alert_outbox_repository.ensure_indexes()
+    await product_repository.ensure_indexes()
+    if not await offer_repository.collection.estimated_document_count():
+        # Products saved before the flat offers collection existed
+        app.state.offers_backfill = asyncio.create_task(
+            product_repository.backfill_offers()
+        )
+    elif await product_repository.collection.find_one(
+        {"offers_synced": False}, {"_id": 1}
+    ):
+        # Offer syncs that kept failing until the last shutdown
+        app.state.offers_backfill = asyncio.create_task(
+            product_repository.backfill_offers(unsynced_only=True)
+        )
+    if (
+        await news_repository.collection.estimated_document_count()
+        > await news_repository.search_collection.estimated_document_count()
+    ):
+        # News saved before search copies moved to news_search, or before
+        # search existed
+        app.state.news_search_backfill = asyncio.create_task(
+            news_repository.backfill_search()
+        )
+    # Keys from settings act as bootstrap admin keys
+    await api_key_repository.seed_keys(
+        [
+            ApiKey(
+                name=f"configured-{key[:4]}",
+                key_hash=hash_api_key(key),
+                prefix=key[:4],
+                is_admin=True,
+            )
+            for key in settings.API_KEYS
+        ]
+    )
+
+    await alert_dispatcher.start()
+
     # Import and initialize scheduler after database is ready
-    # await scheduler_service.start_scheduler()
+    if settings.SCHEDULER_ENABLED:
+        await scheduler_service.start_scheduler()
     # Include routers with dependencies
     app.include_router(
         products.router,
@@ -75,11 +155,24 @@ async def setup_scheduler_and_routers():
         tags=["news"],
         dependencies=[Depends(get_api_key)],
     )
+    app.include_router(
+        alerts.router,
+        prefix="/alerts",
+        tags=["alerts"],
+        dependencies=[Depends(get_api_key)],
+    )
+    app.include_router(
+        export.router,
+        prefix="/export",
+        tags=["export"],
+        dependencies=[Depends(get_api_key)],
+    )
+    app.include_router(stream.router, prefix="/stream", tags=["stream"])
     app.include_router(
         admin.router,
         prefix="/admin",
         tags=["admin"],
-        dependencies=[Depends(get_api_key)],
+        dependencies=[Depends(require_admin)],
     )
 
     log.success("Routers initialized successfully")
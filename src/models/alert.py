@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Annotated, Any, Dict, Optional
+
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+PyObjectId = Annotated[str, BeforeValidator(lambda x: str(x))]
+
+
+class AlertRule(BaseModel):
+    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    api_key_id: str
+    product_url: Optional[str] = None
+    shop: Optional[str] = None
+    threshold: float
+    direction: str
+    condition: str
+    include_new_offers: bool = False
+    webhook_url: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+    )
+
+
+class AlertDelivery(BaseModel):
+    """Outbox item: a triggered alert waiting for its webhook call"""
+
+    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    rule_id: str
+    webhook_url: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int = 0
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+    )
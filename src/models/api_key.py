@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Annotated, Optional
+
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+PyObjectId = Annotated[str, BeforeValidator(lambda x: str(x))]
+
+
+class ApiKey(BaseModel):
+    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    name: str
+    key_hash: str
+    prefix: str
+    is_admin: bool = False
+    revoked: bool = False
+    # Per-key overrides of the default budgets, None means use settings
+    read_rate_per_minute: Optional[int] = None
+    read_burst: Optional[int] = None
+    parse_rate_per_minute: Optional[int] = None
+    parse_burst: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+    )
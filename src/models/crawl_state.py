@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Annotated
+
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+PyObjectId = Annotated[str, BeforeValidator(lambda x: str(x))]
+
+
+class CrawlState(BaseModel):
+    """High-water mark of a news feed: newest item already ingested"""
+
+    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    source: str
+    last_published_at: datetime
+    last_url: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+    )
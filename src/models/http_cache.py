@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Annotated, Optional
+
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+PyObjectId = Annotated[str, BeforeValidator(lambda x: str(x))]
+
+
+class HttpCacheEntry(BaseModel):
+    """Validators of the last processed response of a URL"""
+
+    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: str
+    size: int
+    checked_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+    )
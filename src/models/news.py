@@ -51,6 +51,8 @@ class NewsItem(BaseModel):
     url: str
     article_data: ArticleData
     source: str
+    # _id of the first stored article of the same story
+    cluster_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Pydantic v2 configuration
@@ -59,3 +61,8 @@ class NewsItem(BaseModel):
         json_encoders={ObjectId: str},
         populate_by_name=True,  # Allows using both alias and field name
     )
+
+
+class NewsSearchHit(NewsItem):
+    # Text index relevance of the item for the query
+    score: float
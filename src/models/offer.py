@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Annotated
+
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+PyObjectId = Annotated[str, BeforeValidator(lambda x: str(x))]
+
+
+class ProductOffer(BaseModel):
+    """Current offer of a tracked product, one document per offer"""
+
+    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    product_url: str
+    key: str
+    url: str
+    original_url: str
+    title: str
+    shop: str
+    price: float
+    is_used: bool
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+    )
@@ -21,6 +21,9 @@ class Product(BaseModel):
     id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
     url: str
     offers: List[Offer]
+    partial: bool = False
+    # False while the flat offers collection missed the last offer change
+    offers_synced: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
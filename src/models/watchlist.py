@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Annotated, Optional
+
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+PyObjectId = Annotated[str, BeforeValidator(lambda x: str(x))]
+
+
+class WatchlistEntry(BaseModel):
+    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    url: str
+    kind: str
+    priority: int = 0
+    interval_minutes: int
+    enabled: bool = True
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+    )
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING
+
+from ..core.database import get_collection
+from ..core.logger import log
+from ..models.alert import AlertDelivery
+from ..schemas.alert import DeliveryStatus
+
+
+class AlertOutboxRepository:
+    """
+    Durable queue of triggered alerts
+
+    Alerts are written here in the same step as the product update that
+    triggered them and removed from the queue only once their webhook
+    accepted them, so a crash or a failing receiver doesn't lose them.
+    """
+
+    def __init__(self):
+        self.collection_name = "alert_outbox"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("next_attempt_at", ASCENDING)],
+            name="pending_next_attempt_at",
+            partialFilterExpression={"status": DeliveryStatus.PENDING.value},
+        )
+        await self.collection.create_index([("claim_id", ASCENDING)], sparse=True)
+
+    async def enqueue(self, deliveries: List[AlertDelivery]):
+        if not deliveries:
+            return
+        await self.collection.insert_many(
+            [
+                delivery.model_dump(by_alias=True, exclude={"id"})
+                for delivery in deliveries
+            ]
+        )
+
+    async def claim_due(self, limit: int, lease_seconds: int) -> List[AlertDelivery]:
+        """Lease up to `limit` pending deliveries that are due, oldest first"""
+        now = datetime.utcnow()
+        cursor = (
+            self.collection.find(
+                {
+                    "status": DeliveryStatus.PENDING.value,
+                    "next_attempt_at": {"$lte": now},
+                },
+                {"_id": 1},
+            )
+            .sort("next_attempt_at", ASCENDING)
+            .limit(limit)
+        )
+        ids = [delivery["_id"] async for delivery in cursor]
+        if not ids:
+            return []
+
+        claim_id = ObjectId()
+        await self.collection.update_many(
+            {"_id": {"$in": ids}, "next_attempt_at": {"$lte": now}},
+            {
+                "$set": {
+                    "claim_id": claim_id,
+                    "next_attempt_at": now + timedelta(seconds=lease_seconds),
+                }
+            },
+        )
+        cursor = self.collection.find({"claim_id": claim_id})
+        return [AlertDelivery(**delivery) async for delivery in cursor]
+
+    async def mark_sent(self, delivery: AlertDelivery):
+        await self.collection.update_one(
+            {"_id": ObjectId(delivery.id)},
+            {
+                "$set": {
+                    "status": DeliveryStatus.SENT.value,
+                    "sent_at": datetime.utcnow(),
+                    "last_error": None,
+                },
+                "$inc": {"attempts": 1},
+                "$unset": {"claim_id": ""},
+            },
+        )
+
+    async def mark_failed(
+        self, delivery: AlertDelivery, error: str, retry_in: Optional[float]
+    ):
+        """Record failed attempt, retried after `retry_in` seconds or given up"""
+        update = {"last_error": error}
+        if retry_in is None:
+            update["status"] = DeliveryStatus.FAILED.value
+            log.warning(f"Giving up alert delivery {delivery.id}: {error}")
+        else:
+            update["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=retry_in)
+        await self.collection.update_one(
+            {"_id": ObjectId(delivery.id)},
+            {"$set": update, "$inc": {"attempts": 1}, "$unset": {"claim_id": ""}},
+        )
+
+
+alert_outbox_repository = AlertOutboxRepository()
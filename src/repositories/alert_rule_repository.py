@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING
+
+from ..core.database import get_collection
+from ..models.alert import AlertRule
+
+
+class AlertRuleRepository:
+    def __init__(self):
+        self.collection_name = "alert_rules"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("api_key_id", ASCENDING)])
+
+    async def create_rule(self, rule: AlertRule) -> AlertRule:
+        rule_dict = rule.model_dump(by_alias=True, exclude={"id"})
+        result = await self.collection.insert_one(rule_dict)
+        rule_dict["_id"] = result.inserted_id
+        return AlertRule(**rule_dict)
+
+    async def list_rules(self, api_key_id: Optional[str] = None) -> List[AlertRule]:
+        """Rules of one API key, or all rules"""
+        query = {"api_key_id": api_key_id} if api_key_id else {}
+        return [AlertRule(**rule) async for rule in self.collection.find(query)]
+
+    async def delete_rule(self, rule_id: str, api_key_id: str) -> Optional[AlertRule]:
+        """Delete API key's rule, returns it or None if it wasn't found"""
+        if not ObjectId.is_valid(rule_id):
+            return None
+        rule = await self.collection.find_one_and_delete(
+            {"_id": ObjectId(rule_id), "api_key_id": api_key_id}
+        )
+        return AlertRule(**rule) if rule else None
+
+
+alert_rule_repository = AlertRuleRepository()
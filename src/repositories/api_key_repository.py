@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, ReturnDocument
+
+from ..core.database import get_collection
+from ..core.logger import log
+from ..models.api_key import ApiKey
+
+
+class ApiKeyRepository:
+    def __init__(self):
+        self.collection_name = "api_keys"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("key_hash", ASCENDING)], unique=True)
+
+    async def get_by_hash(self, key_hash: str) -> Optional[ApiKey]:
+        """Get active API key by its hash"""
+        key_data = await self.collection.find_one(
+            {"key_hash": key_hash, "revoked": False}
+        )
+        return ApiKey(**key_data) if key_data else None
+
+    async def create_key(self, api_key: ApiKey) -> ApiKey:
+        """Store hashed API key"""
+        key_dict = api_key.model_dump(by_alias=True, exclude={"id"})
+        result = await self.collection.insert_one(key_dict)
+        key_dict["_id"] = result.inserted_id
+        return ApiKey(**key_dict)
+
+    async def list_keys(self) -> List[ApiKey]:
+        cursor = self.collection.find().sort("created_at", ASCENDING)
+        return [ApiKey(**key_data) async for key_data in cursor]
+
+    async def revoke_key(self, key_id: str) -> Optional[ApiKey]:
+        """Mark API key as revoked, returns the revoked key"""
+        if not ObjectId.is_valid(key_id):
+            return None
+        key_data = await self.collection.find_one_and_update(
+            {"_id": ObjectId(key_id)},
+            {"$set": {"revoked": True}},
+            return_document=ReturnDocument.AFTER,
+        )
+        return ApiKey(**key_data) if key_data else None
+
+    async def seed_keys(self, keys: List[ApiKey]):
+        """Insert configured keys that are not stored yet"""
+        for api_key in keys:
+            await self.collection.update_one(
+                {"key_hash": api_key.key_hash},
+                {"$setOnInsert": api_key.model_dump(by_alias=True, exclude={"id"})},
+                upsert=True,
+            )
+        log.info(f"Seeded {len(keys)} configured API keys")
+
+
+api_key_repository = ApiKeyRepository()
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from ..core.database import get_collection
+from ..core.logger import log
+from ..models.crawl_state import CrawlState
+
+
+class CrawlStateRepository:
+    def __init__(self):
+        self.collection_name = "crawl_state"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("source", ASCENDING)], unique=True)
+
+    async def get_state(self, source: str) -> Optional[CrawlState]:
+        """Get high-water mark of a feed URL, None before its first crawl"""
+        state = await self.collection.find_one({"source": source})
+        return CrawlState(**state) if state else None
+
+    async def advance(self, source: str, published_at: datetime, url: str) -> bool:
+        """Move feed's mark forward, a mark that is already newer is kept"""
+        try:
+            await self.collection.update_one(
+                {"source": source, "last_published_at": {"$lt": published_at}},
+                {
+                    "$set": {
+                        "last_published_at": published_at,
+                        "last_url": url,
+                        "updated_at": datetime.utcnow(),
+                    }
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Filter missed because the stored mark is newer
+            return False
+        log.debug(f"Crawl mark of {source} advanced to {published_at}")
+        return True
+
+
+crawl_state_repository = CrawlStateRepository()
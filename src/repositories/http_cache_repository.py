@@ -0,0 +1,49 @@
+from typing import Iterable, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateOne
+
+from ..core.database import get_collection
+from ..core.logger import log
+from ..models.http_cache import HttpCacheEntry
+
+
+class HttpCacheRepository:
+    def __init__(self):
+        self.collection_name = "http_cache"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("url", ASCENDING)], unique=True)
+
+    async def get_entry(self, url: str) -> Optional[HttpCacheEntry]:
+        """Get stored validators of a URL"""
+        entry = await self.collection.find_one({"url": url})
+        return HttpCacheEntry(**entry) if entry else None
+
+    async def save_entries(self, entries: Iterable[HttpCacheEntry]):
+        """Upsert validators of several URLs in one bulk write"""
+        operations = [
+            UpdateOne(
+                {"url": entry.url},
+                {"$set": entry.model_dump(exclude={"id"})},
+                upsert=True,
+            )
+            for entry in entries
+        ]
+        if not operations:
+            return
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            log.error(f"Failed to save HTTP cache entries: {str(e)}")
+
+
+http_cache_repository = HttpCacheRepository()
@@ -1,19 +1,83 @@
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+import bson
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
 
+from ..core.config import settings
 from ..core.database import get_collection
+from ..core.exceptions import InvalidCursorException
+from ..core.fieldsets import projection
 from ..core.logger import log
-from ..models.news import ArticleData, NewsItem
-from ..schemas.news import ArticleDataSchema, NewsItemSchema
+from ..core.metrics import NEWS_DUPLICATES
+from ..core.pagination import decode_cursor, encode_cursor
+from ..models.news import NewsItem, NewsSearchHit
+from ..schemas.news import NewsItemSchema, NewsSearchSort
+from ..services.broadcaster import broadcaster, news_topic
+from ..services.news_compression import (
+    COMPRESSED_FIELDS,
+    compress_article,
+    compressed_paths,
+    inflate,
+)
+from ..services.news_dedup import (
+    MinHashIndex,
+    decode_signature,
+    lsh_bands,
+    minhash_signatures,
+)
+from ..services.news_search import search_fields, search_text
+
+# Dedup signatures (and search copies not yet moved out) stay in Mongo
+NEWS_PROJECTION = {"search": 0, "minhash": 0, "minhash_bands": 0}
+SEARCH_BACKFILL_BATCH = 500
+# What a search copy is built from
+SEARCH_SOURCE_PROJECTION = {
+    "source": 1,
+    "cluster_id": 1,
+    "article_data.title": 1,
+    "article_data.content_body": 1,
+    "article_data.published_at": 1,
+    "compressed.content_body": 1,
+    "search": 1,
+}
+
+
+def _search_document(news: dict) -> dict:
+    """
+    Search copy of a news document, stored in news_search under its _id
+
+    Keeps the normalized text and the fields search filters, sorts and
+    collapses on out of the news documents, which stay small in cache.
+    """
+    article_data = news["article_data"]
+    return {
+        "_id": news["_id"],
+        "source": news["source"],
+        "published_at": article_data.get("published_at"),
+        "cluster_id": news.get("cluster_id"),
+        **search_fields(article_data),
+    }
+
+
+def _storage_document(news: dict) -> dict:
+    """News document as stored, large article fields compressed"""
+    article_data, compressed = compress_article(news["article_data"])
+    document = {**news, "article_data": article_data}
+    if compressed:
+        document["compressed"] = compressed
+    return document
 
 
 class NewsRepository:
     def __init__(self):
         self.collection_name = "news"
+        self.search_collection_name = "news_search"
         self._collection: Optional[AsyncIOMotorCollection] = None
+        self._search_collection: Optional[AsyncIOMotorCollection] = None
 
     @property
     def collection(self) -> AsyncIOMotorCollection:
@@ -22,6 +86,34 @@ class NewsRepository:
             self._collection = get_collection(self.collection_name)
         return self._collection
 
+    @property
+    def search_collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of the search copies collection"""
+        if self._search_collection is None:
+            self._search_collection = get_collection(self.search_collection_name)
+        return self._search_collection
+
+    async def ensure_indexes(self):
+        """Create indexes for URL dedup, per-source reads, search and clustering"""
+        await self.collection.create_index([("url", ASCENDING)])
+        await self.collection.create_index(
+            [("source", ASCENDING), ("article_data.published_at", DESCENDING)]
+        )
+        if "news_search" in await self.collection.index_information():
+            # The text index lives on the news_search collection now
+            await self.collection.drop_index("news_search")
+        # Stems come from news_search, Mongo only splits words and folds case
+        await self.search_collection.create_index(
+            [("title", TEXT), ("body", TEXT)],
+            weights={"title": 10, "body": 1},
+            default_language="none",
+            language_override="search_language",
+            name="news_search",
+        )
+        await self.collection.create_index(
+            [("minhash_bands", ASCENDING), ("created_at", DESCENDING)]
+        )
+
     async def save_news_items(
         self, items: List[NewsItemSchema], source: str
     ) -> List[str]:
@@ -31,13 +123,17 @@ class NewsRepository:
 
         news_dicts = []
         saved_count = 0
+        # One round trip for the whole batch instead of a lookup per item
+        seen = await self.existing_urls(str(item.url) for item in items)
 
         for item in items:
-            # Check if news already exists
-            if not await self.news_exists(str(item.url)):
+            url = str(item.url)
+            if url not in seen:
+                seen.add(url)
+                article_data = item.article_data.model_dump()
                 news_dict = {
-                    "url": str(item.url),
-                    "article_data": item.article_data.model_dump(),
+                    "url": url,
+                    "article_data": article_data,
                     "source": source,
                     "created_at": datetime.utcnow(),
                 }
@@ -46,8 +142,40 @@ class NewsRepository:
 
         if news_dicts:
             try:
-                result = await self.collection.insert_many(news_dicts)
+                duplicates = await self._assign_clusters(news_dicts)
+                # Search copies go first: a cluster merge that can see the
+                # news can then also see, and update, their copies
+                await self.search_collection.insert_many(
+                    [_search_document(news) for news in news_dicts]
+                )
+                try:
+                    result = await self.collection.insert_many(
+                        [_storage_document(news) for news in news_dicts]
+                    )
+                except Exception:
+                    await self.search_collection.delete_many(
+                        {"_id": {"$in": [news["_id"] for news in news_dicts]}}
+                    )
+                    raise
+                duplicates += await self._merge_concurrent_clusters(news_dicts)
+                if duplicates:
+                    NEWS_DUPLICATES.labels(source).inc(duplicates)
                 log.success(f"Saved {saved_count} news items from {source}")
+                broadcaster.publish(
+                    news_topic(source),
+                    {
+                        "type": "news",
+                        "source": source,
+                        "items": [
+                            {
+                                "url": news["url"],
+                                "article_data": news["article_data"],
+                                "cluster_id": news["cluster_id"],
+                            }
+                            for news in news_dicts
+                        ],
+                    },
+                )
                 return [str(id) for id in result.inserted_ids]
             except Exception as e:
                 log.error(f"Failed to save news items: {str(e)}")
@@ -56,6 +184,120 @@ class NewsRepository:
         log.info(f"No new news items to save from {source}")
         return []
 
+    async def _assign_clusters(self, news_dicts: List[dict]) -> int:
+        """
+        Link each new item to the story cluster of its nearest duplicate
+
+        MinHash signatures of the whole batch are computed in a worker
+        thread. Candidates are news stored in the last
+        NEWS_DEDUP_WINDOW_HOURS sharing an LSH band with any item of the
+        batch (one query) and earlier items of the batch itself. Items
+        without a duplicate start a cluster of their own. Returns the number
+        of duplicates found.
+        """
+        signatures = await asyncio.to_thread(
+            minhash_signatures,
+            [
+                f"{news['article_data']['title']}\n"
+                f"{news['article_data']['content_body']}"
+                for news in news_dicts
+            ],
+        )
+        bands = [lsh_bands(sig) if sig is not None else [] for sig in signatures]
+        index = MinHashIndex(settings.NEWS_DEDUP_SIMILARITY)
+        keys = list({band for item_bands in bands for band in item_bands})
+        if keys:
+            since = datetime.utcnow() - timedelta(
+                hours=settings.NEWS_DEDUP_WINDOW_HOURS
+            )
+            cursor = self.collection.find(
+                {"minhash_bands": {"$in": keys}, "created_at": {"$gte": since}},
+                {"minhash": 1, "minhash_bands": 1, "cluster_id": 1},
+            )
+            async for doc in cursor:
+                index.add(
+                    decode_signature(doc["minhash"]),
+                    doc["cluster_id"],
+                    doc["minhash_bands"],
+                )
+
+        duplicates = 0
+        for news, signature, item_bands in zip(news_dicts, signatures, bands):
+            news["_id"] = ObjectId()
+            news["cluster_id"] = str(news["_id"])
+            if signature is None:
+                continue
+            nearest = index.nearest(signature, item_bands)
+            if nearest:
+                news["cluster_id"] = nearest[0]
+                news["duplicate"] = True
+                duplicates += 1
+            news["minhash"] = signature.tobytes()
+            news["minhash_bands"] = item_bands
+            index.add(signature, news["cluster_id"], item_bands)
+        return duplicates
+
+    async def _merge_concurrent_clusters(self, news_dicts: List[dict]) -> int:
+        """
+        Re-check the clusters a saved batch started against other batches
+
+        Candidates are read before the insert, so batches of different
+        sources saved at the same time can't see each other there. Once the
+        batch is stored, every item that started a cluster looks again at
+        the other news sharing its bands. On a match, both clusters are
+        merged into the one with the smaller id; concurrent batches that
+        both find the match make the same merge. Returns the number of the
+        batch's items that became duplicates.
+        """
+        started = {
+            news["cluster_id"]: news
+            for news in news_dicts
+            if "minhash" in news and news["cluster_id"] == str(news["_id"])
+        }
+        if not started:
+            return 0
+        keys = list(
+            {band for news in started.values() for band in news["minhash_bands"]}
+        )
+        since = datetime.utcnow() - timedelta(hours=settings.NEWS_DEDUP_WINDOW_HOURS)
+        index = MinHashIndex(settings.NEWS_DEDUP_SIMILARITY)
+        cursor = self.collection.find(
+            {
+                "minhash_bands": {"$in": keys},
+                "created_at": {"$gte": since},
+                "_id": {"$nin": [news["_id"] for news in news_dicts]},
+            },
+            {"minhash": 1, "minhash_bands": 1, "cluster_id": 1},
+        )
+        async for doc in cursor:
+            index.add(
+                decode_signature(doc["minhash"]),
+                doc["cluster_id"],
+                doc["minhash_bands"],
+            )
+
+        merged = 0
+        for cluster_id, news in started.items():
+            nearest = index.nearest(
+                decode_signature(news["minhash"]), news["minhash_bands"]
+            )
+            if not nearest or nearest[0] == cluster_id:
+                continue
+            keep, drop = sorted((cluster_id, nearest[0]))
+            await self.collection.update_many(
+                {"cluster_id": drop},
+                {"$set": {"cluster_id": keep, "duplicate": True}},
+            )
+            await self.search_collection.update_many(
+                {"cluster_id": drop}, {"$set": {"cluster_id": keep}}
+            )
+            for item in news_dicts:
+                if item["cluster_id"] == drop:
+                    item["cluster_id"] = keep
+                    merged += not item.get("duplicate")
+                    item["duplicate"] = True
+        return merged
+
     async def get_news_by_source_and_date(
         self, url: str, until_date: datetime, limit: int = 100
     ) -> List[NewsItem]:
@@ -66,7 +308,8 @@ class NewsRepository:
                     {
                         "url": url,
                         "article_data.published_at": {"$lte": until_date},
-                    }
+                    },
+                    NEWS_PROJECTION,
                 )
                 .sort("article_data.published_at", -1)
                 .limit(limit)
@@ -75,10 +318,9 @@ class NewsRepository:
             news_items = []
             async for item in cursor:
                 try:
-
                     if "_id" in item and isinstance(item["_id"], ObjectId):
                         item["_id"] = str(item["_id"])
-                    news_items.append(NewsItem(**item))
+                    news_items.append(NewsItem(**inflate(item)))
                 except Exception as e:
                     log.warning(f"Failed to parse news item from DB: {str(e)}")
                     continue
@@ -90,6 +332,309 @@ class NewsRepository:
             log.error(f"Failed to get news from database: {str(e)}")
             return []
 
+    async def get_news_fields_by_source_and_date(
+        self, url: str, until_date: datetime, paths: List[str], limit: int = 100
+    ) -> List[dict]:
+        """
+        Selected fields of news by url and date, as plain documents
+
+        Only the requested paths are read from Mongo and nothing is
+        validated, for list views that don't need article bodies.
+        """
+        try:
+            cursor = (
+                self.collection.find(
+                    {
+                        "url": url,
+                        "article_data.published_at": {"$lte": until_date},
+                    },
+                    # Bodies are decompressed only when they were asked for
+                    projection(compressed_paths(paths)),
+                )
+                .sort("article_data.published_at", -1)
+                .limit(limit)
+            )
+            return [inflate(doc) for doc in await cursor.to_list(limit)]
+        except Exception as e:
+            log.error(f"Failed to get news fields from database: {str(e)}")
+            return []
+
+    async def get_latest_news_by_source(
+        self, source: str, until_date: datetime, limit: int = 100
+    ) -> List[NewsItem]:
+        """Get most recent stored news of a source domain"""
+        try:
+            cursor = (
+                self.collection.find(
+                    {
+                        "source": source,
+                        "article_data.published_at": {"$lte": until_date},
+                    },
+                    NEWS_PROJECTION,
+                )
+                .sort("article_data.published_at", -1)
+                .limit(limit)
+            )
+            return [
+                NewsItem(**{**inflate(item), "_id": str(item["_id"])})
+                async for item in cursor
+            ]
+        except Exception as e:
+            log.error(f"Failed to get stored news for {source}: {str(e)}")
+            return []
+
+    async def search_news(
+        self,
+        query: str,
+        source: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        sort: NewsSearchSort = NewsSearchSort.RELEVANCE,
+        collapse: bool = False,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[NewsSearchHit], Optional[str]]:
+        """
+        Stored news matching the words of query, one page at a time
+
+        Served by the text index of the news_search collection over
+        normalized title and body, title matches weigh more; only the news
+        of the returned page are read from the news collection. Ordered by
+        relevance or newest first, with ties broken by _id, and
+        keyset-paginated on that order: `cursor` is the `next_cursor` of the
+        previous page. With `collapse` only the best
+        ranked matching article of every story cluster is returned.
+        """
+        terms = search_text(query)
+        if not terms:
+            return [], None
+
+        match: Dict[str, Any] = {"$text": {"$search": terms}}
+        if source:
+            match["source"] = source
+        published: Dict[str, datetime] = {}
+        if since:
+            published["$gte"] = since
+        if until:
+            published["$lte"] = until
+        if published:
+            match["published_at"] = published
+
+        key = "score" if sort == NewsSearchSort.RELEVANCE else "published_at"
+        order = {key: DESCENDING, "_id": DESCENDING}
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": match},
+            {
+                "$project": {
+                    "score": {"$meta": "textScore"},
+                    "published_at": 1,
+                    "cluster_id": 1,
+                }
+            },
+        ]
+        if collapse:
+            # Collapsed after filtering, so a story shows up as long as any
+            # of its articles matches; the best ranked one represents it.
+            # The cursor applies to the representatives, pages don't overlap
+            pipeline += [
+                {"$sort": order},
+                {
+                    "$group": {
+                        "_id": {"$ifNull": ["$cluster_id", "$_id"]},
+                        "hit": {"$first": "$$ROOT"},
+                    }
+                },
+                {"$replaceRoot": {"newRoot": "$hit"}},
+            ]
+        if cursor:
+            cursor_sort, last_value, last_id = decode_cursor(cursor, 3)
+            if cursor_sort != sort.value:
+                raise InvalidCursorException()
+            pipeline.append(
+                {
+                    "$match": {
+                        "$or": [
+                            {key: {"$lt": last_value}},
+                            {key: last_value, "_id": {"$lt": last_id}},
+                        ]
+                    }
+                }
+            )
+        pipeline += [{"$sort": order}, {"$limit": limit + 1}]
+
+        documents = await self.search_collection.aggregate(
+            pipeline, allowDiskUse=collapse
+        ).to_list(limit + 1)
+        page = documents[:limit]
+        news = {
+            doc["_id"]: doc
+            async for doc in self.collection.find(
+                {"_id": {"$in": [doc["_id"] for doc in page]}}, NEWS_PROJECTION
+            )
+        }
+        hits = [
+            NewsSearchHit(
+                **{
+                    **inflate(news[doc["_id"]]),
+                    "_id": str(doc["_id"]),
+                    "score": doc["score"],
+                }
+            )
+            for doc in page
+            if doc["_id"] in news
+        ]
+        next_cursor = None
+        if len(documents) > limit:
+            last = documents[limit - 1]
+            next_cursor = encode_cursor(sort.value, last[key], last["_id"])
+        return hits, next_cursor
+
+    async def backfill_search(
+        self, batch_size: int = SEARCH_BACKFILL_BATCH, dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Give every stored news its copy in news_search
+
+        Covers news stored before search existed, news whose copy is still
+        embedded in the document (it is moved out) and saves whose copy got
+        lost. Safe to interrupt and run again. Returns copies created and
+        BSON bytes of the embedded copies removed from news documents.
+        """
+        stats = {"documents": 0, "moved_bytes": 0}
+        batch: List[dict] = []
+        cursor = self.collection.find(
+            {}, SEARCH_SOURCE_PROJECTION, sort=[("_id", ASCENDING)]
+        ).batch_size(batch_size)
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await self._backfill_search_batch(batch, stats, dry_run)
+                batch = []
+        if batch:
+            await self._backfill_search_batch(batch, stats, dry_run)
+        log.info(
+            f"{'Would create' if dry_run else 'Created'} search copies "
+            f"of {stats['documents']} news items"
+        )
+        return stats
+
+    async def _backfill_search_batch(
+        self, batch: List[dict], stats: Dict[str, int], dry_run: bool
+    ):
+        ids = [doc["_id"] for doc in batch]
+        existing = {
+            doc["_id"]
+            async for doc in self.search_collection.find(
+                {"_id": {"$in": ids}}, {"_id": 1}
+            )
+        }
+        missing = [inflate(doc) for doc in batch if doc["_id"] not in existing]
+        embedded = [doc for doc in batch if "search" in doc]
+        stats["documents"] += len(missing)
+        stats["moved_bytes"] += sum(
+            len(bson.encode({"search": doc["search"]})) for doc in embedded
+        )
+        if dry_run:
+            return
+        if missing:
+            await self.search_collection.insert_many(
+                [_search_document(doc) for doc in missing], ordered=False
+            )
+        if embedded:
+            await self.collection.update_many(
+                {"_id": {"$in": [doc["_id"] for doc in embedded]}},
+                {"$unset": {"search": ""}},
+            )
+
+    async def compress_stored_articles(
+        self, batch_size: int = 500, dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Compress bodies and comments of news stored as plain text
+
+        Safe to interrupt and run again, compressed documents are skipped.
+        Returns documents changed and BSON bytes of the fields before and
+        after compression.
+        """
+        stats = {"documents": 0, "plain_bytes": 0, "compressed_bytes": 0}
+        batch: List[UpdateOne] = []
+        cursor = self.collection.find(
+            {"compressed": {"$exists": False}},
+            {f"article_data.{field}": 1 for field in COMPRESSED_FIELDS},
+        )
+        async for doc in cursor:
+            article_data = doc.get("article_data", {})
+            _, compressed = compress_article(article_data)
+            if not compressed:
+                continue
+            stats["documents"] += 1
+            stats["plain_bytes"] += len(
+                bson.encode({field: article_data[field] for field in compressed})
+            )
+            stats["compressed_bytes"] += len(bson.encode(compressed))
+            batch.append(
+                UpdateOne(
+                    {"_id": doc["_id"], "compressed": {"$exists": False}},
+                    {
+                        "$set": {"compressed": compressed},
+                        "$unset": {f"article_data.{field}": "" for field in compressed},
+                    },
+                )
+            )
+            if len(batch) >= batch_size:
+                if not dry_run:
+                    await self.collection.bulk_write(batch, ordered=False)
+                batch = []
+        if batch and not dry_run:
+            await self.collection.bulk_write(batch, ordered=False)
+        log.info(
+            f"{'Would compress' if dry_run else 'Compressed'} "
+            f"{stats['documents']} news items"
+        )
+        return stats
+
+    @staticmethod
+    async def _collection_stats(collection: AsyncIOMotorCollection) -> dict:
+        collection_stats = await collection.aggregate(
+            [{"$collStats": {"storageStats": {}}}]
+        ).to_list(None)
+        return collection_stats[0]["storageStats"] if collection_stats else {}
+
+    async def storage_stats(self) -> Dict[str, Any]:
+        """
+        Size of the news collection and its share of the WiredTiger cache
+
+        The search copies in news_search are reported next to it, and
+        `avg_article_bytes` counts both, the real storage cost of an article.
+        """
+        storage = await self._collection_stats(self.collection)
+        search = await self._collection_stats(self.search_collection)
+        server = await self.collection.database.command("serverStatus")
+        cache = storage.get("wiredTiger", {}).get("cache", {})
+        search_cache = search.get("wiredTiger", {}).get("cache", {})
+        server_cache = server.get("wiredTiger", {}).get("cache", {})
+        documents = storage.get("count", 0)
+        return {
+            "documents": documents,
+            "compressed_documents": await self.collection.count_documents(
+                {"compressed": {"$exists": True}}
+            ),
+            "data_bytes": storage.get("size", 0),
+            "avg_document_bytes": storage.get("avgObjSize", 0),
+            "storage_bytes": storage.get("storageSize", 0),
+            "index_bytes": storage.get("totalIndexSize", 0),
+            "cache_bytes": cache.get("bytes currently in the cache", 0),
+            "search_data_bytes": search.get("size", 0),
+            "search_index_bytes": search.get("totalIndexSize", 0),
+            "search_cache_bytes": search_cache.get("bytes currently in the cache", 0),
+            "avg_article_bytes": (
+                (storage.get("size", 0) + search.get("size", 0)) / documents
+                if documents
+                else 0
+            ),
+            "cache_max_bytes": server_cache.get("maximum bytes configured", 0),
+        }
+
     # async def get_cached_news(
     #     self, source: str, until_date: datetime, cache_minutes: int = 15
     # ) -> Optional[List[NewsItemSchema]]:
@@ -134,6 +679,14 @@ class NewsRepository:
             log.error(f"Failed to check if news exists: {str(e)}")
             return False
 
+    async def existing_urls(self, urls: Iterable[str]) -> Set[str]:
+        """Subset of URLs already stored, in a single query"""
+        urls = list(set(urls))
+        if not urls:
+            return set()
+        cursor = self.collection.find({"url": {"$in": urls}}, {"url": 1, "_id": 0})
+        return {doc["url"] async for doc in cursor}
+
     # async def cleanup_old_news(self, days: int = 7):
     #     """Cleanup news older than specified days"""
     #     try:
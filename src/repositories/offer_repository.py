@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, DeleteMany, UpdateOne
+
+from ..core.database import get_collection
+from ..core.logger import log
+from ..core.pagination import decode_cursor, encode_cursor
+from ..models.offer import ProductOffer
+from ..services.offer_diff import offer_key
+
+OFFER_SYNC_ATTEMPTS = 3
+
+
+class OfferRepository:
+    """
+    Flat copy of current product offers for cross-product queries
+
+    Product documents stay the source of truth; ProductRepository replaces a
+    product's offers here whenever they change, so shop and price queries
+    hit an index instead of scanning the embedded offer arrays.
+    """
+
+    def __init__(self):
+        self.collection_name = "offers"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_indexes(self):
+        """Create sync key and query indexes, the latter end in the sort keys"""
+        await self.collection.create_index(
+            [("product_url", ASCENDING), ("key", ASCENDING)], unique=True
+        )
+        await self.collection.create_index(
+            [("shop", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)]
+        )
+        await self.collection.create_index(
+            [("is_used", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)]
+        )
+        await self.collection.create_index([("price", ASCENDING), ("_id", ASCENDING)])
+
+    async def replace_offers(
+        self,
+        product_url: str,
+        offers: List[dict],
+        changed_keys: Optional[Set[str]] = None,
+    ) -> bool:
+        """
+        Make the product's mirrored offers exactly `offers`
+
+        Current offers are upserted and rows of the product with any other
+        key are deleted, so every sync repairs whatever an earlier failed one
+        left behind. `updated_at` moves for `changed_keys` only (all offers
+        when None). Failed writes are retried; returns False if all failed.
+        """
+        now = datetime.utcnow()
+        keys = [offer_key(offer) for offer in offers]
+        operations: List[Any] = []
+        for key, offer in zip(keys, offers):
+            fields = {
+                "url": offer["url"],
+                "original_url": offer["original_url"],
+                "title": offer["title"],
+                "shop": offer["shop"],
+                "price": offer["price"],
+                "is_used": offer["is_used"],
+            }
+            update: Dict[str, Any] = {"$set": fields}
+            if changed_keys is None or key in changed_keys:
+                fields["updated_at"] = now
+            else:
+                update["$setOnInsert"] = {"updated_at": now}
+            operations.append(
+                UpdateOne({"product_url": product_url, "key": key}, update, upsert=True)
+            )
+        operations.append(
+            DeleteMany({"product_url": product_url, "key": {"$nin": keys}})
+        )
+
+        for attempt in range(OFFER_SYNC_ATTEMPTS):
+            try:
+                await self.collection.bulk_write(operations, ordered=False)
+                return True
+            except Exception as e:
+                log.warning(
+                    f"Failed to sync offers of {product_url} "
+                    f"(attempt {attempt + 1}/{OFFER_SYNC_ATTEMPTS}): {str(e)}"
+                )
+                if attempt + 1 < OFFER_SYNC_ATTEMPTS:
+                    await asyncio.sleep(0.5 * 2**attempt)
+        log.error(f"Offers of {product_url} are out of sync")
+        return False
+
+    async def find_offers(
+        self,
+        shop: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        is_used: Optional[bool] = None,
+        descending: bool = False,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[ProductOffer], Optional[str]]:
+        """
+        Offers matching the filters ordered by price, one page at a time
+
+        Pages are keyset-paginated on (price, _id): `cursor` is the
+        `next_cursor` of the previous page, so deep pages cost the same as
+        the first one.
+        """
+        query: Dict[str, Any] = {}
+        if shop:
+            query["shop"] = shop
+        if is_used is not None:
+            query["is_used"] = is_used
+        price: Dict[str, float] = {}
+        if min_price is not None:
+            price["$gte"] = min_price
+        if max_price is not None:
+            price["$lte"] = max_price
+        if price:
+            query["price"] = price
+
+        after = "$lt" if descending else "$gt"
+        if cursor:
+            last_price, last_id = decode_cursor(cursor, 2)
+            query = {
+                "$and": [
+                    query,
+                    {
+                        "$or": [
+                            {"price": {after: last_price}},
+                            {"price": last_price, "_id": {after: last_id}},
+                        ]
+                    },
+                ]
+            }
+
+        direction = DESCENDING if descending else ASCENDING
+        documents = (
+            await self.collection.find(query)
+            .sort([("price", direction), ("_id", direction)])
+            .limit(limit + 1)
+            .to_list(limit + 1)
+        )
+        offers = [ProductOffer(**doc) for doc in documents[:limit]]
+        next_cursor = None
+        if len(documents) > limit:
+            last = documents[limit - 1]
+            next_cursor = encode_cursor(last["price"], last["_id"])
+        return offers, next_cursor
+
+
+offer_repository = OfferRepository()
@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid
+
+from ..core.config import settings
+from ..core.database import get_collection, get_database
+from ..core.exceptions import TooManyBucketsException
+from ..core.logger import log
+from ..services.offer_diff import offer_key
+
+
+def bucket_start(ts: datetime, unit: str) -> datetime:
+    """Start of the hour, day, week (from Monday) or month containing `ts`"""
+    if unit == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: datetime, unit: str) -> datetime:
+    if unit == "hour":
+        return start + timedelta(hours=1)
+    if unit == "week":
+        return start + timedelta(weeks=1)
+    if unit == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(start: datetime, end: datetime, unit: str) -> List[datetime]:
+    """
+    Starts of the buckets covering [start, end)
+
+    Raises TooManyBucketsException past PRICE_HISTORY_MAX_BUCKETS.
+    """
+    starts = []
+    bucket = bucket_start(start, unit)
+    while bucket < end:
+        if len(starts) == settings.PRICE_HISTORY_MAX_BUCKETS:
+            raise TooManyBucketsException(
+                f"More than {settings.PRICE_HISTORY_MAX_BUCKETS} {unit} buckets "
+                "requested, use a coarser bucket or a shorter window"
+            )
+        starts.append(bucket)
+        bucket = next_bucket(bucket, unit)
+    return starts
+
+
+def _carry_forward(
+    prices: Dict[str, Optional[float]],
+    points: List[Dict[str, Any]],
+    starts: List[datetime],
+    unit: str,
+) -> List[Dict[str, Any]]:
+    """Buckets of get_price_buckets from the prices at the window start"""
+    buckets = []
+    index = 0
+    for bucket in starts:
+        bucket_end = next_bucket(bucket, unit)
+        seen = [price for price in prices.values() if price is not None]
+        changes = 0
+        while index < len(points) and points[index]["ts"] < bucket_end:
+            point = points[index]
+            prices[point["meta"]["offer"]] = point["price"]
+            if point["price"] is not None:
+                seen.append(point["price"])
+            changes += 1
+            index += 1
+        current = [price for price in prices.values() if price is not None]
+        if seen:
+            closing = current or seen
+            buckets.append(
+                {
+                    "ts": bucket,
+                    "min_price": min(seen),
+                    "max_price": max(seen),
+                    "avg_price": sum(closing) / len(closing),
+                    "changes": changes,
+                }
+            )
+    return buckets
+
+
+class PriceHistoryRepository:
+    """
+    Offer price points in a time-series collection
+
+    A point is written only when an offer appears, disappears (price None)
+    or its price or condition changes, so a series holds the price changes
+    rather than every parse.
+    """
+
+    def __init__(self):
+        self.collection_name = "price_history"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_collection(self):
+        """Create the time-series collection and its query index"""
+        try:
+            await get_database().create_collection(
+                self.collection_name,
+                timeseries={
+                    "timeField": "ts",
+                    "metaField": "meta",
+                    "granularity": "hours",
+                },
+            )
+        except CollectionInvalid:
+            pass  # Already exists
+        except Exception as e:
+            # Servers before 5.0 have no time-series collections
+            log.warning(f"Storing price history in a regular collection: {str(e)}")
+        await self.collection.create_index(
+            [("meta.product", ASCENDING), ("ts", ASCENDING)]
+        )
+        # Last point of each offer before a history window
+        await self.collection.create_index(
+            [("meta.product", ASCENDING), ("meta.offer", ASCENDING), ("ts", DESCENDING)]
+        )
+
+    async def record_changes(
+        self, url: str, diff: Dict[str, List[Dict[str, Any]]]
+    ) -> int:
+        """Append points for added, repriced and removed offers of an offer diff"""
+        ts = datetime.utcnow()
+        points = [
+            {
+                "ts": ts,
+                "meta": {
+                    "product": url,
+                    "shop": offer.get("shop", ""),
+                    "offer": offer_key(offer),
+                },
+                "price": offer["price"] if key != "removed" else None,
+                "is_used": offer.get("is_used", False),
+            }
+            for key in ("added", "changed", "removed")
+            for offer in diff[key]
+            # Unparsed prices come through as 0
+            if key == "removed" or offer.get("price")
+        ]
+        if not points:
+            return 0
+        try:
+            await self.collection.insert_many(points, ordered=False)
+        except Exception as e:
+            log.error(f"Failed to record price history for {url}: {str(e)}")
+            return 0
+        return len(points)
+
+    async def get_price_buckets(
+        self,
+        url: str,
+        unit: str,
+        start: datetime,
+        end: datetime,
+        shop: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Min/max/avg of the offer prices in effect per bucket, oldest first
+
+        Each offer's last point before `start` is carried into the window and
+        every price holds until the offer's next point, so a bucket covers
+        all offers, not only those that changed in it. min/max span every
+        price in effect at some time in the bucket, avg is over the prices
+        in effect at its end (or during it, if all offers were removed).
+        Buckets before the first known price are left out. Bucketing runs
+        here rather than with `$dateTrunc`, so it works on the regular
+        collection of servers before 5.0 too; it runs in a worker thread and
+        a request covers at most PRICE_HISTORY_MAX_BUCKETS buckets.
+        """
+        starts = bucket_starts(start, end, unit)
+        match: Dict[str, Any] = {"meta.product": url}
+        if shop:
+            match["meta.shop"] = shop
+        prices: Dict[str, Optional[float]] = {}
+        # Newest point first per offer, walks (product, offer, ts) index order
+        initial = self.collection.aggregate(
+            [
+                {"$match": {**match, "ts": {"$lt": start}}},
+                {"$sort": {"meta.offer": 1, "ts": -1}},
+                {"$group": {"_id": "$meta.offer", "price": {"$first": "$price"}}},
+            ]
+        )
+        async for point in initial:
+            prices[point["_id"]] = point["price"]
+        cursor = self.collection.find(
+            {**match, "ts": {"$gte": start, "$lt": end}},
+            {"_id": 0, "ts": 1, "meta.offer": 1, "price": 1},
+        ).sort("ts", ASCENDING)
+        points = [point async for point in cursor]
+
+        return await asyncio.to_thread(_carry_forward, prices, points, starts, unit)
+
+
+price_history_repository = PriceHistoryRepository()
@@ -1,23 +1,41 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 
-from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING
 
 from ..core.database import get_database
-from ..models.product import Offer, Product
+from ..core.fieldsets import projection
+from ..core.logger import log
+from ..models.product import Product
 from ..schemas.product import OfferSchema, ProductResponse
+from ..services.alerts import alert_engine
+from ..services.broadcaster import broadcaster, product_topic
+from ..services.offer_diff import diff_offers, has_changes, offer_key
+from ..services.offer_summary import summarize_offers
+from .offer_repository import offer_repository
+from .price_history_repository import price_history_repository
+
+# Summary is served on its own, product reads skip it
+PRODUCT_PROJECTION = {"summary": 0}
 
 
 class ProductRepository:
     def __init__(self):
         self.collection: AsyncIOMotorCollection = get_database().products
 
+    async def ensure_indexes(self):
+        """Only products whose offers sync failed carry `offers_synced`"""
+        await self.collection.create_index([("offers_synced", ASCENDING)], sparse=True)
+
     async def create_product(self, product_data: ProductResponse) -> str:
         """Save product to database and return product ID"""
+        offers = [offer.dict() for offer in product_data.offers]
         product_dict = {
             "url": str(product_data.url),
-            "offers": [offer.dict() for offer in product_data.offers],
+            "offers": offers,
+            "summary": summarize_offers(offers),
+            "partial": product_data.partial,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
@@ -27,11 +45,49 @@ class ProductRepository:
 
     async def get_product_by_url(self, url: str) -> Optional[Product]:
         """Get product from database by URL"""
-        product_data = await self.collection.find_one({"url": url})
+        product_data = await self.collection.find_one({"url": url}, PRODUCT_PROJECTION)
         if product_data:
             return Product(**product_data)
         return None
 
+    async def get_products_by_urls(self, urls: List[str]) -> Dict[str, Product]:
+        """Get stored products for several URLs with a single query"""
+        products = {}
+        async for product_data in self.collection.find(
+            {"url": {"$in": urls}}, PRODUCT_PROJECTION
+        ):
+            products[product_data["url"]] = Product(**product_data)
+        return products
+
+    async def get_product_fields(self, url: str, paths: List[str]) -> Optional[dict]:
+        """Selected fields of a stored product as a plain document"""
+        product_data = await self.collection.find_one({"url": url}, projection(paths))
+        if product_data is not None and "summary" in paths:
+            if "summary" not in product_data:
+                summary = await self.get_summary(url)
+                if summary is None:
+                    # Deleted since the first read
+                    return None
+                product_data["summary"] = summary["summary"]
+        return product_data
+
+    async def get_summary(self, url: str) -> Optional[dict]:
+        """Get stored offer summary without loading the offers"""
+        product_data = await self.collection.find_one(
+            {"url": url},
+            {"_id": 0, "url": 1, "summary": 1, "partial": 1, "updated_at": 1},
+        )
+        if product_data and "summary" not in product_data:
+            # Stored before summaries existed, compute it once
+            legacy = await self.collection.find_one({"url": url}, {"offers": 1})
+            if legacy is None:
+                return None
+            product_data["summary"] = summarize_offers(legacy.get("offers", []))
+            await self.collection.update_one(
+                {"url": url}, {"$set": {"summary": product_data["summary"]}}
+            )
+        return product_data
+
     async def update_product(
         self, query: dict, update_data: dict, upsert: bool = False
     ) -> bool:
@@ -66,18 +122,90 @@ class ProductRepository:
     async def save_or_update_product(self, product_data: ProductResponse) -> str:
         """Save new product or update existing one"""
         existing_product = await self.get_product_by_url(str(product_data.url))
+        if product_data.partial and existing_product and not existing_product.partial:
+            # A cut-short parse must not replace complete stored offers
+            return str(existing_product.id)
+
+        old_offers = (
+            [offer.model_dump() for offer in existing_product.offers]
+            if existing_product
+            else []
+        )
+        new_offers = [offer.dict() for offer in product_data.offers]
 
         if existing_product:
             update_dict = {
                 "$set": {
-                    "offers": [offer.dict() for offer in product_data.offers],
+                    "offers": new_offers,
+                    "summary": summarize_offers(new_offers),
+                    "partial": product_data.partial,
                     "updated_at": datetime.utcnow(),
                 }
             }
             await self.update_product({"url": str(product_data.url)}, update_dict)
-            return str(existing_product.id)
+            product_id = str(existing_product.id)
         else:
-            return await self.create_product(product_data)
+            product_id = await self.create_product(product_data)
+
+        diff = diff_offers(old_offers, new_offers)
+        url = str(product_data.url)
+        was_synced = existing_product is None or existing_product.offers_synced
+        if has_changes(diff) or not was_synced:
+            changed = {offer_key(offer) for offer in diff["added"] + diff["changed"]}
+            await self.sync_offers(url, new_offers, changed, was_synced)
+        if has_changes(diff):
+            await price_history_repository.record_changes(url, diff)
+            await alert_engine.process(url, diff)
+            self._publish_changes(url, diff)
+        return product_id
+
+    async def sync_offers(
+        self,
+        url: str,
+        offers: List[dict],
+        changed_keys: Optional[Set[str]] = None,
+        was_synced: bool = True,
+    ) -> bool:
+        """
+        Replace the product's rows in the flat offers collection
+
+        A product whose sync failed keeps `offers_synced: false` until a
+        later save or the startup repair succeeds.
+        """
+        synced = await offer_repository.replace_offers(url, offers, changed_keys)
+        if synced != was_synced:
+            update = (
+                {"$unset": {"offers_synced": ""}}
+                if synced
+                else {"$set": {"offers_synced": False}}
+            )
+            await self.collection.update_one({"url": url}, update)
+        return synced
+
+    async def backfill_offers(self, unsynced_only: bool = False) -> int:
+        """
+        Copy offers of stored products into the flat offers collection
+
+        All products, or only those whose last sync failed.
+        """
+        count = 0
+        query = {"offers_synced": False} if unsynced_only else {}
+        async for product_data in self.collection.find(
+            query, {"url": 1, "offers": 1, "offers_synced": 1}
+        ):
+            offers = product_data.get("offers", [])
+            if await self.sync_offers(
+                product_data["url"],
+                offers,
+                was_synced=product_data.get("offers_synced", True),
+            ):
+                count += len(offers)
+        log.info(f"Offers collection backfilled with {count} offers")
+        return count
+
+    def _publish_changes(self, url: str, diff: Dict[str, List[dict]]):
+        """Push offer diff to stream subscribers of this product"""
+        broadcaster.publish(product_topic(url), {"type": "product", "url": url, **diff})
 
 
 product_repository = ProductRepository()
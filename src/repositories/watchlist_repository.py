@@ -0,0 +1,225 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from ..core.config import settings
+from ..core.database import get_collection
+from ..core.logger import log
+from ..models.watchlist import WatchlistEntry
+from ..schemas.watchlist import (
+    WatchlistEntryCreate,
+    WatchlistEntryUpdate,
+    WatchlistStatus,
+)
+
+
+class WatchlistRepository:
+    def __init__(self):
+        self.collection_name = "watchlist"
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        """Lazy initialization of collection"""
+        if self._collection is None:
+            self._collection = get_collection(self.collection_name)
+        return self._collection
+
+    async def ensure_indexes(self):
+        """Create indexes used by CRUD and the due-time dispatcher"""
+        await self.collection.create_index([("url", ASCENDING)], unique=True)
+        # Only enabled entries are ever dispatched, so keep them alone in the
+        # due-time index: a claim then touches just the due head of the index.
+        await self.collection.create_index(
+            [("next_run_at", ASCENDING)],
+            name="due_next_run_at",
+            partialFilterExpression={"enabled": True},
+        )
+        await self.collection.create_index([("claim_id", ASCENDING)], sparse=True)
+
+    async def create_entry(
+        self, entry: WatchlistEntryCreate
+    ) -> Optional[WatchlistEntry]:
+        """Add URL to watchlist, returns None if URL is already tracked"""
+        now = datetime.utcnow()
+        entry_dict = {
+            "url": entry.url,
+            "kind": entry.kind.value,
+            "priority": entry.priority,
+            "interval_minutes": entry.interval_minutes
+            or settings.WATCHLIST_DEFAULT_INTERVAL_MINUTES,
+            "enabled": entry.enabled,
+            "next_run_at": entry.next_run_at or now,
+            "last_run_at": None,
+            "last_status": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        try:
+            result = await self.collection.insert_one(entry_dict)
+        except DuplicateKeyError:
+            return None
+        entry_dict["_id"] = result.inserted_id
+        return WatchlistEntry(**entry_dict)
+
+    async def get_entry(self, entry_id: str) -> Optional[WatchlistEntry]:
+        """Get watchlist entry by id"""
+        if not ObjectId.is_valid(entry_id):
+            return None
+        entry = await self.collection.find_one({"_id": ObjectId(entry_id)})
+        return WatchlistEntry(**entry) if entry else None
+
+    async def list_entries(
+        self, kind: Optional[str] = None, skip: int = 0, limit: int = 100
+    ) -> Tuple[List[WatchlistEntry], int]:
+        """List watchlist entries ordered by next run time"""
+        query = {"kind": kind} if kind else {}
+        total = await self.collection.count_documents(query)
+        cursor = (
+            self.collection.find(query)
+            .sort("next_run_at", ASCENDING)
+            .skip(skip)
+            .limit(limit)
+        )
+        entries = [WatchlistEntry(**entry) async for entry in cursor]
+        return entries, total
+
+    async def update_entry(
+        self, entry_id: str, update: WatchlistEntryUpdate
+    ) -> Optional[WatchlistEntry]:
+        """Update scheduling fields of watchlist entry"""
+        if not ObjectId.is_valid(entry_id):
+            return None
+        changes = update.model_dump(exclude_unset=True, exclude_none=True)
+        changes["updated_at"] = datetime.utcnow()
+        entry = await self.collection.find_one_and_update(
+            {"_id": ObjectId(entry_id)},
+            {"$set": changes},
+            return_document=ReturnDocument.AFTER,
+        )
+        return WatchlistEntry(**entry) if entry else None
+
+    async def delete_entry(self, entry_id: str) -> bool:
+        """Remove entry from watchlist"""
+        if not ObjectId.is_valid(entry_id):
+            return False
+        result = await self.collection.delete_one({"_id": ObjectId(entry_id)})
+        return result.deleted_count > 0
+
+    async def seed_entries(self, urls: List[str], kind: str):
+        """Insert default URLs that are not tracked yet"""
+        now = datetime.utcnow()
+        for url in urls:
+            await self.collection.update_one(
+                {"url": url},
+                {
+                    "$setOnInsert": {
+                        "url": url,
+                        "kind": kind,
+                        "priority": 0,
+                        "interval_minutes": settings.WATCHLIST_DEFAULT_INTERVAL_MINUTES,
+                        "enabled": True,
+                        "next_run_at": now,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                },
+                upsert=True,
+            )
+
+    async def claim_due(self, limit: int, lease_seconds: int) -> List[WatchlistEntry]:
+        """
+        Claim up to `limit` due entries for processing
+
+        Due entries are read from the head of the `next_run_at` index and
+        leased by pushing `next_run_at` forward, so another dispatcher (or a
+        crashed run) can't pick them up until the lease expires. Claimed
+        entries are returned highest priority first.
+        """
+        now = datetime.utcnow()
+        cursor = (
+            self.collection.find(
+                {"enabled": True, "next_run_at": {"$lte": now}}, {"_id": 1}
+            )
+            .sort("next_run_at", ASCENDING)
+            .limit(limit)
+        )
+        ids = [entry["_id"] async for entry in cursor]
+        if not ids:
+            return []
+
+        claim_id = ObjectId()
+        await self.collection.update_many(
+            {"_id": {"$in": ids}, "next_run_at": {"$lte": now}},
+            {
+                "$set": {
+                    "claim_id": claim_id,
+                    "next_run_at": now + timedelta(seconds=lease_seconds),
+                }
+            },
+        )
+        cursor = self.collection.find({"claim_id": claim_id}).sort(
+            "priority", DESCENDING
+        )
+        return [WatchlistEntry(**entry) async for entry in cursor]
+
+    async def complete_entry(
+        self, entry: WatchlistEntry, status: str, error: Optional[str] = None
+    ):
+        """Record run result and schedule next run"""
+        now = datetime.utcnow()
+        try:
+            await self.collection.update_one(
+                {"_id": ObjectId(entry.id)},
+                {
+                    "$set": {
+                        "last_run_at": now,
+                        "last_status": status,
+                        "last_error": error,
+                        "next_run_at": now + timedelta(minutes=entry.interval_minutes),
+                    },
+                    "$unset": {"claim_id": ""},
+                },
+            )
+        except Exception as e:
+            log.error(f"Failed to complete watchlist entry {entry.url}: {str(e)}")
+
+    async def postpone_entry(self, entry: WatchlistEntry, seconds: float):
+        """Release claimed entry without running it, due again after `seconds`"""
+        await self.collection.update_one(
+            {"_id": ObjectId(entry.id)},
+            {
+                "$set": {
+                    "last_status": WatchlistStatus.SKIPPED.value,
+                    "next_run_at": datetime.utcnow() + timedelta(seconds=seconds),
+                },
+                "$unset": {"claim_id": ""},
+            },
+        )
+
+    async def mark_due(self, kind: Optional[str] = None) -> int:
+        """
+        Make entries due immediately
+
+        Entries leased by claim_due keep their lease, resetting it would let
+        another dispatcher claim them while they are still being processed.
+        """
+        now = datetime.utcnow()
+        query = {
+            "enabled": True,
+            "$or": [{"claim_id": {"$exists": False}}, {"next_run_at": {"$lte": now}}],
+        }
+        if kind:
+            query["kind"] = kind
+        result = await self.collection.update_many(
+            query, {"$set": {"next_run_at": now}}
+        )
+        return result.modified_count
+
+
+watchlist_repository = WatchlistRepository()
@@ -1,36 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import secrets
+from typing import List, Optional
 
-from ..core.auth import get_api_key
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import HTMLResponse, Response
+
+from ..core.auth import Budget, api_key_cache, get_api_key, hash_api_key
+from ..core.circuit_breaker import circuit_breakers
 from ..core.logger import log
+from ..core.profiling import ProfileFormat, profiling_service
+from ..core.rate_limit import rate_limiter
+from ..models.api_key import ApiKey
+from ..models.watchlist import WatchlistEntry
+from ..repositories.api_key_repository import api_key_repository
+from ..repositories.watchlist_repository import watchlist_repository
+from ..schemas.api_key import ApiKeyCreate, ApiKeyCreated, ApiKeyResponse
+from ..schemas.circuit_breaker import BreakerStatus
+from ..schemas.egress import ProxyStatus
+from ..schemas.profiling import ProfileArmRequest, ProfileInfo, ProfileStatus
+from ..schemas.watchlist import (
+    WatchlistEntryCreate,
+    WatchlistEntryResponse,
+    WatchlistEntryUpdate,
+    WatchlistKind,
+    WatchlistPage,
+)
+from ..services.egress_pool import egress_pool
+from ..services.http_cache import http_cache
 from ..services.scheduler import scheduler_service
 
 router = APIRouter()
 
 
 @router.post("/parse/products")
-async def force_parse_products(api_key: str = Depends(get_api_key)):
+async def force_parse_products(api_key: ApiKey = Depends(get_api_key)):
     """Force immediate product parsing"""
     try:
-        await scheduler_service.force_parse_products()
-        return {"message": "Product parsing started successfully"}
+        processed = await scheduler_service.force_parse_products()
+        return {
+            "message": "Product parsing started successfully",
+            "processed": processed,
+        }
     except Exception as e:
         log.error(f"Failed to force product parsing: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/parse/news")
-async def force_parse_news(api_key: str = Depends(get_api_key)):
+async def force_parse_news(api_key: ApiKey = Depends(get_api_key)):
     """Force immediate news parsing"""
     try:
-        await scheduler_service.force_parse_news()
-        return {"message": "News parsing started successfully"}
+        processed = await scheduler_service.force_parse_news()
+        return {"message": "News parsing started successfully", "processed": processed}
     except Exception as e:
         log.error(f"Failed to force news parsing: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/scheduler/status")
-async def get_scheduler_status(api_key: str = Depends(get_api_key)):
+async def get_scheduler_status(api_key: ApiKey = Depends(get_api_key)):
     """Get scheduler status"""
     return {
         "running": scheduler_service.scheduler.running,
@@ -42,4 +70,172 @@ async def get_scheduler_status(api_key: str = Depends(get_api_key)):
             }
             for job in scheduler_service.scheduler.get_jobs()
         ],
+        "http_cache": http_cache.last_cycle,
     }
+
+
+def _entry_response(entry: WatchlistEntry) -> WatchlistEntryResponse:
+    return WatchlistEntryResponse(**entry.model_dump())
+
+
+@router.get("/watchlist", response_model=WatchlistPage)
+async def list_watchlist(
+    kind: Optional[WatchlistKind] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    api_key: ApiKey = Depends(get_api_key),
+):
+    """List watchlist entries"""
+    entries, total = await watchlist_repository.list_entries(
+        kind=kind.value if kind else None, skip=skip, limit=limit
+    )
+    return WatchlistPage(items=[_entry_response(e) for e in entries], total=total)
+
+
+@router.post(
+    "/watchlist",
+    response_model=WatchlistEntryResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_watchlist_entry(
+    entry: WatchlistEntryCreate, api_key: ApiKey = Depends(get_api_key)
+):
+    """Add URL to watchlist"""
+    created = await watchlist_repository.create_entry(entry)
+    if not created:
+        raise HTTPException(status_code=409, detail="URL is already in watchlist")
+    return _entry_response(created)
+
+
+@router.get("/watchlist/{entry_id}", response_model=WatchlistEntryResponse)
+async def get_watchlist_entry(entry_id: str, api_key: ApiKey = Depends(get_api_key)):
+    """Get watchlist entry"""
+    entry = await watchlist_repository.get_entry(entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Watchlist entry not found")
+    return _entry_response(entry)
+
+
+@router.patch("/watchlist/{entry_id}", response_model=WatchlistEntryResponse)
+async def update_watchlist_entry(
+    entry_id: str, update: WatchlistEntryUpdate, api_key: ApiKey = Depends(get_api_key)
+):
+    """Update watchlist entry scheduling"""
+    entry = await watchlist_repository.update_entry(entry_id, update)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Watchlist entry not found")
+    return _entry_response(entry)
+
+
+@router.delete("/watchlist/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_watchlist_entry(entry_id: str, api_key: ApiKey = Depends(get_api_key)):
+    """Remove URL from watchlist"""
+    if not await watchlist_repository.delete_entry(entry_id):
+        raise HTTPException(status_code=404, detail="Watchlist entry not found")
+
+
+@router.get("/api-keys", response_model=List[ApiKeyResponse])
+async def list_api_keys(api_key: ApiKey = Depends(get_api_key)):
+    """List API keys (without secrets)"""
+    keys = await api_key_repository.list_keys()
+    return [ApiKeyResponse(**key.model_dump()) for key in keys]
+
+
+@router.post(
+    "/api-keys", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED
+)
+async def create_api_key(new_key: ApiKeyCreate, api_key: ApiKey = Depends(get_api_key)):
+    """Generate API key, the plaintext key is returned only once"""
+    plaintext = f"hp_{secrets.token_urlsafe(32)}"
+    created = await api_key_repository.create_key(
+        ApiKey(
+            key_hash=hash_api_key(plaintext),
+            prefix=plaintext[:10],
+            **new_key.model_dump(),
+        )
+    )
+    log.info(f"API key created: {created.name} ({created.prefix})")
+    return ApiKeyCreated(key=plaintext, **created.model_dump())
+
+
+@router.delete("/api-keys/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_api_key(key_id: str, api_key: ApiKey = Depends(get_api_key)):
+    """Revoke API key"""
+    revoked = await api_key_repository.revoke_key(key_id)
+    if not revoked:
+        raise HTTPException(status_code=404, detail="API key not found")
+    api_key_cache.invalidate(revoked.key_hash)
+    for budget in Budget:
+        rate_limiter.reset((revoked.id, budget.value))
+    log.info(f"API key revoked: {revoked.name} ({revoked.prefix})")
+
+
+@router.get("/breakers", response_model=List[BreakerStatus])
+async def list_circuit_breakers(api_key: ApiKey = Depends(get_api_key)):
+    """Circuit breaker state of every parse target domain seen so far"""
+    return [breaker.status() for breaker in circuit_breakers.all().values()]
+
+
+@router.post("/breakers/{domain}/reset", response_model=BreakerStatus)
+async def reset_circuit_breaker(domain: str, api_key: ApiKey = Depends(get_api_key)):
+    """Close domain's breaker and forget its recent failures"""
+    if not circuit_breakers.reset(domain):
+        raise HTTPException(status_code=404, detail="Circuit breaker not found")
+    return circuit_breakers.get(domain).status()
+
+
+@router.get("/proxies", response_model=List[ProxyStatus])
+async def list_proxies(api_key: ApiKey = Depends(get_api_key)):
+    """Health and load of egress proxies"""
+    return egress_pool.status()
+
+
+@router.get("/profile", response_model=ProfileStatus)
+async def get_profiling_status(api_key: ApiKey = Depends(get_api_key)):
+    """Get request profiling state"""
+    return profiling_service.status()
+
+
+@router.post("/profile", response_model=ProfileStatus)
+async def arm_profiling(
+    request: ProfileArmRequest, api_key: ApiKey = Depends(get_api_key)
+):
+    """Profile the next N requests, optionally only under a path prefix"""
+    profiling_service.arm(request.requests, request.path_prefix, request.mode)
+    return profiling_service.status()
+
+
+@router.delete("/profile", response_model=ProfileStatus)
+async def disarm_profiling(api_key: ApiKey = Depends(get_api_key)):
+    """Stop profiling further requests"""
+    profiling_service.disarm()
+    return profiling_service.status()
+
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+async def list_profiles(api_key: ApiKey = Depends(get_api_key)):
+    """List stored request profiles, newest first"""
+    return await asyncio.to_thread(profiling_service.list_profiles)
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: ProfileFormat = Query(ProfileFormat.SPEEDSCOPE),
+    api_key: ApiKey = Depends(get_api_key),
+):
+    """Download profile as speedscope JSON or HTML flame view"""
+    rendered = await asyncio.to_thread(profiling_service.render, profile_id, format)
+    if rendered is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == ProfileFormat.HTML:
+        return HTMLResponse(rendered)
+    return Response(
+        rendered,
+        media_type="application/json",
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{profile_id}.speedscope.json"'
+            )
+        },
+    )
@@ -0,0 +1,63 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..core.auth import get_api_key
+from ..core.exceptions import UnsafeWebhookException
+from ..core.logger import log
+from ..core.webhook_guard import check_webhook_url
+from ..models.alert import AlertRule
+from ..models.api_key import ApiKey
+from ..repositories.alert_rule_repository import alert_rule_repository
+from ..schemas.alert import AlertRuleCreate, AlertRuleResponse
+from ..services.alerts import alert_engine
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[AlertRuleResponse])
+async def list_alert_rules(api_key: ApiKey = Depends(get_api_key)):
+    """List price alert rules of the calling API key"""
+    rules = await alert_rule_repository.list_rules(api_key.id)
+    return [AlertRuleResponse(**rule.model_dump()) for rule in rules]
+
+
+@router.post("", response_model=AlertRuleResponse, status_code=status.HTTP_201_CREATED)
+async def create_alert_rule(
+    rule: AlertRuleCreate, api_key: ApiKey = Depends(get_api_key)
+):
+    """
+    Register price alert
+
+    Fires once each time the best matching offer's price crosses the
+    threshold in the given direction, by POSTing the alert as JSON to
+    `webhook_url`. The webhook has to resolve to a public address.
+    """
+    try:
+        await check_webhook_url(rule.webhook_url)
+    except OSError:
+        raise UnsafeWebhookException("Webhook host can't be resolved")
+    created = await alert_rule_repository.create_rule(
+        AlertRule(
+            api_key_id=api_key.id,
+            product_url=rule.product_url,
+            shop=rule.shop,
+            threshold=rule.threshold,
+            direction=rule.direction.value,
+            condition=rule.condition.value,
+            include_new_offers=rule.include_new_offers,
+            webhook_url=rule.webhook_url,
+        )
+    )
+    alert_engine.add_rule(created)
+    log.info(f"Alert rule created: {created.id} ({api_key.name})")
+    return AlertRuleResponse(**created.model_dump())
+
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_alert_rule(rule_id: str, api_key: ApiKey = Depends(get_api_key)):
+    """Delete price alert rule"""
+    deleted = await alert_rule_repository.delete_rule(rule_id, api_key.id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    alert_engine.remove_rule(deleted)
@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from ..core.logger import log
+from ..schemas.export import ExportDataset, ExportFormat, ExportQuery
+from ..services.export import export_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/{dataset}",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {},
+                "text/csv": {},
+                "application/vnd.apache.parquet": {},
+            }
+        }
+    },
+)
+async def export_dataset(
+    dataset: ExportDataset,
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    source: Optional[str] = Query(
+        None, description="News source domain", example="pravda.com.ua"
+    ),
+    urls: List[str] = Query(
+        [], alias="url", description="Article URLs (news) or product URLs"
+    ),
+    shop: Optional[str] = Query(None, description="Offers of this shop"),
+    since: Optional[datetime] = Query(
+        None, description="Published (news) or updated at or after"
+    ),
+    until: Optional[datetime] = Query(
+        None, description="Published (news) or updated before"
+    ),
+    columns: Optional[str] = Query(
+        None, description="Comma separated columns", example="id,url,title"
+    ),
+    after: Optional[str] = Query(
+        None, description="Resume after the row with this `id`"
+    ),
+):
+    """
+    Stream a whole collection as NDJSON, CSV or Parquet
+
+    Rows are sent in `id` order as they are read, with chunked transfer
+    encoding. If a download breaks off, repeat the request with `after` set
+    to the `id` of the last complete row received; the new response carries
+    the remaining rows (and, for CSV and Parquet, a new header).
+    """
+    request = ExportQuery(
+        dataset=dataset,
+        format=format,
+        source=source,
+        urls=urls,
+        shop=shop,
+        since=since,
+        until=until,
+        columns=[c.strip() for c in columns.split(",") if c.strip()]
+        if columns
+        else None,
+        after=after,
+    )
+    encoder = export_service.encoder(request)
+    log.info(f"Exporting {dataset.value} as {format.value} after {after}")
+    return StreamingResponse(
+        export_service.stream(request, encoder),
+        media_type=encoder.media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{dataset.value}.{encoder.extension}"'
+            )
+        },
+    )
@@ -1,11 +1,29 @@
 from datetime import date, datetime
+from typing import Any, List, Optional
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from ..core.auth import Budget, consume_budget, get_api_key
+from ..core.circuit_breaker import circuit_breakers
+from ..core.exceptions import CircuitOpenException
+from ..core.fieldsets import ResponseView, partial_response, pick
 from ..core.logger import log
+from ..core.metrics import record_cache_lookup
+from ..models.api_key import ApiKey
+from ..models.news import NewsItem
 from ..repositories.news_repository import news_repository
-from ..schemas.news import ArticleDataSchema, ClientType, NewsItemSchema, NewsResponse
+from ..schemas.news import (
+    NEWS_FIELDS,
+    ArticleDataSchema,
+    ClientType,
+    NewsItemSchema,
+    NewsResponse,
+    NewsSearchHitSchema,
+    NewsSearchPage,
+    NewsSearchSort,
+)
+from ..services.http_cache import http_cache
 from ..services.news_parser import news_parser_factory
 
 router = APIRouter()
@@ -14,13 +32,97 @@ router = APIRouter()
 SUPPORTED_DOMAINS = ["epravda.com.ua", "politeka.net", "pravda.com.ua"]
 
 
+def _to_news_items(news: List[NewsItem]) -> List[NewsItemSchema]:
+    """Convert database models to response schema"""
+    return [
+        NewsItemSchema(
+            url=item.url,
+            article_data=ArticleDataSchema(**item.article_data.model_dump()),
+            source=item.source,
+            created_at=item.created_at,
+            cluster_id=item.cluster_id,
+        )
+        for item in news
+    ]
+
+
+def _collapse(news: List[Any]) -> List[Any]:
+    """Keep the first item of every story cluster, models or plain documents"""
+    seen = set()
+    collapsed = []
+    for item in news:
+        cluster_id = (
+            item.get("cluster_id") if isinstance(item, dict) else item.cluster_id
+        )
+        if cluster_id is None or cluster_id not in seen:
+            seen.add(cluster_id)
+            collapsed.append(item)
+    return collapsed
+
+
+def _partial_news(news: List[Any], paths: List[str]):
+    """Response with only the selected fields of models"""
+    return partial_response(
+        {"items": [pick(item.model_dump(), paths) for item in news]}
+    )
+
+
+@router.get("/search", response_model=NewsSearchPage)
+async def search_news(
+    q: str = Query(..., min_length=2, description="Words to look for"),
+    source: Optional[str] = Query(
+        None, description="Source domain", example="pravda.com.ua"
+    ),
+    since: Optional[datetime] = Query(None, description="Published at or after"),
+    until: Optional[datetime] = Query(None, description="Published at or before"),
+    sort: NewsSearchSort = Query(NewsSearchSort.RELEVANCE),
+    collapse: bool = Query(False, description="One article per story"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of previous page"),
+    api_key: ApiKey = Depends(get_api_key),
+):
+    """
+    Full-text search over stored news
+
+    Matches word forms (новина, новини, новинами), title matches rank
+    higher. Never starts a parse. With `collapse` every story is returned
+    once, as its best ranked matching article. Pass `next_cursor` as
+    `cursor` for further pages.
+    """
+    hits, next_cursor = await news_repository.search_news(
+        q,
+        source=source,
+        since=since,
+        until=until,
+        sort=sort,
+        collapse=collapse,
+        limit=limit,
+        cursor=cursor,
+    )
+    return NewsSearchPage(
+        items=[
+            NewsSearchHitSchema(
+                url=hit.url,
+                article_data=ArticleDataSchema(**hit.article_data.model_dump()),
+                source=hit.source,
+                cluster_id=hit.cluster_id,
+                score=hit.score,
+            )
+            for hit in hits
+        ],
+        next_cursor=next_cursor,
+    )
+
+
 @router.post(
     "",
     response_model=NewsResponse,
     responses={
         400: {"description": "Unsupported news source"},
         404: {"description": "News not found"},
+        429: {"description": "Parse budget exhausted"},
         500: {"description": "Internal server error"},
+        503: {"description": "Source is failing and nothing is stored for it"},
     },
 )
 async def get_news(
@@ -29,6 +131,16 @@ async def get_news(
         ..., description="Limit date for news", example="2024-01-15"
     ),
     client: ClientType = Query(None, description="Client identifier"),
+    collapse: bool = Query(
+        False, description="One item per story cluster of stored news"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields, e.g. url,title,published_at"
+    ),
+    view: ResponseView = Query(
+        ResponseView.FULL, description="`summary`: url, source, title and date"
+    ),
+    api_key: ApiKey = Depends(get_api_key),
 ):
     """
     Get news from specified source
@@ -37,9 +149,11 @@ async def get_news(
     - url: News source URL (required)
     - until_date: Limit date for news (required)
     - client: Client identifier (optional)
+    - collapse: Leave out near-duplicates of the same story (optional)
+    - fields / view: Return only these fields, read only them from the
+      database (optional)
     """
     try:
-
         domain = urlparse(url).netloc.lower()
         is_supported = any(
             supported_domain in domain for supported_domain in SUPPORTED_DOMAINS
@@ -52,39 +166,74 @@ async def get_news(
             )
         # Convert date to datetime for database query
         until_datetime = datetime.combine(until_date, datetime.min.time())
+        paths = NEWS_FIELDS.resolve(fields, view)
 
         # First try to get data from database
-        db_news = await news_repository.get_news_by_source_and_date(
-            url=url, until_date=until_datetime
-        )
+        # Collapsing needs the cluster, it's left out of the response unless
+        # selected
+        strip_cluster = collapse and paths is not None and "cluster_id" not in paths
+        if paths:
+            db_news = await news_repository.get_news_fields_by_source_and_date(
+                url=url,
+                until_date=until_datetime,
+                paths=paths + ["cluster_id"] if strip_cluster else paths,
+            )
+        else:
+            db_news = await news_repository.get_news_by_source_and_date(
+                url=url, until_date=until_datetime
+            )
+        record_cache_lookup("news", hit=bool(db_news))
 
+        if db_news and collapse:
+            db_news = _collapse(db_news)
+        if strip_cluster:
+            db_news = [pick(item, paths) for item in db_news]
         if db_news:
             log.success(f"Found {len(db_news)} news items in database for {url}")
+            if paths:
+                return partial_response({"items": db_news})
             # Convert database models to response schema
-            news_items = [
-                NewsItemSchema(
-                    url=item.url,
-                    article_data=ArticleDataSchema(**item.article_data.model_dump()),
-                    source=item.source,
-                    created_at=item.created_at,
-                )
-                for item in db_news
-            ]
-            return NewsResponse(items=news_items, source=url, from_cache=True)
+            return NewsResponse(
+                items=_to_news_items(db_news), source=url, from_cache=True
+            )
 
         # If no data in database, use parser
         log.info(f"No data in database for {url}, starting parser...")
+        consume_budget(api_key, Budget.PARSE)
         parser = news_parser_factory.get_parser(url)
 
         try:
-            news_items = await parser.parse_news(url, until_datetime, client)
+            try:
+                news_items = await circuit_breakers.call(
+                    url, lambda: parser.parse_news(url, until_datetime, client)
+                )
+            except CircuitOpenException:
+                # Source is failing, fall back to whatever is stored for it
+                stored = await news_repository.get_latest_news_by_source(
+                    urlparse(url).netloc, until_datetime
+                )
+                if not stored:
+                    raise
+                if collapse:
+                    stored = _collapse(stored)
+                log.warning(f"Circuit open for {url}, serving stored news")
+                if paths:
+                    return _partial_news(stored, paths)
+                return NewsResponse(
+                    items=_to_news_items(stored), source=url, from_cache=True
+                )
 
             # Save parsed news to database
+            saved = not news_items
             if news_items:
                 source_domain = urlparse(url).netloc
-                await news_repository.save_news_items(news_items, source_domain)
+                saved = await news_repository.save_news_items(news_items, source_domain)
                 log.success(f"Parsed and saved {len(news_items)} news items from {url}")
+            if saved:
+                await http_cache.commit(parser.cache_validators())
 
+            if paths:
+                return _partial_news(news_items, paths)
             return NewsResponse(items=news_items, source=url, from_cache=False)
 
         finally:
@@ -1,56 +1,123 @@
-from typing import Optional
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from ..core.logger import log
+from ..core.auth import Budget, consume_budget, get_api_key
+from ..core.config import settings
+from ..core.deadline import Deadline
+from ..core.exceptions import RateLimitException
+from ..core.fieldsets import ResponseView, partial_response, pick
+from ..core.logger import log, request_id_var
+from ..core.metrics import record_cache_lookup
+from ..models.api_key import ApiKey
+from ..repositories.offer_repository import offer_repository
+from ..repositories.price_history_repository import price_history_repository
 from ..repositories.product_repository import product_repository
-from ..schemas.product import ProductResponse, SortType
+from ..schemas.product import (
+    PRODUCT_FIELDS,
+    HistoryBucket,
+    OfferPage,
+    PriceBucket,
+    PriceHistoryResponse,
+    ProductBatchItem,
+    ProductBatchRequest,
+    ProductOfferSchema,
+    ProductResponse,
+    ProductSummaryResponse,
+    SortType,
+)
+from ..services.offer_summary import summarize_offers
 from ..services.product_parser import product_parser
 
 router = APIRouter()
 
 
+def _apply_offer_options(
+    offers: List[Any],
+    price_sort: Optional[str] = None,
+    count_limit: Optional[int] = None,
+    price: Callable[[Any], float] = lambda offer: offer.price,
+) -> List[Any]:
+    """Apply price sorting and count limit to offers"""
+    if price_sort:
+        reverse = price_sort.lower() == "desc"
+        offers.sort(key=price, reverse=reverse)
+    if count_limit:
+        offers = offers[:count_limit]
+    return offers
+
+
 @router.post("", response_model=ProductResponse)
 async def get_product_offers(
     url: str = Query(..., description="Product page URL"),
     timeout_limit: Optional[int] = Query(None, ge=1, le=30),
     count_limit: Optional[int] = Query(None, ge=1, le=100),
     price_sort: SortType = Query(None, pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields, e.g. url,offers.shop,offers.price"
+    ),
+    view: ResponseView = Query(
+        ResponseView.FULL, description="`summary`: offer statistics, no offers"
+    ),
+    api_key: ApiKey = Depends(get_api_key),
 ):
+    # Budget of the whole request, DB lookup included
+    deadline = Deadline(timeout_limit)
     try:
-        # Get product from database
-        product_data = await product_repository.get_product_by_url(url=url)
+        paths = PRODUCT_FIELDS.resolve(fields, view)
+        if paths and price_sort and any(p.startswith("offers.") for p in paths):
+            # Sorting needs the price of every offer
+            paths.append("offers.price")
 
-        if product_data:
+        # Get product from database, only the requested fields if any
+        if paths:
+            product_data = await product_repository.get_product_fields(url, paths)
+        else:
+            product_data = await product_repository.get_product_by_url(url=url)
+        record_cache_lookup("product", hit=product_data is not None)
+
+        if paths and product_data is not None:
+            if "offers" in product_data:
+                product_data["offers"] = _apply_offer_options(
+                    product_data["offers"],
+                    price_sort,
+                    count_limit,
+                    price=lambda offer: offer["price"],
+                )
+            log.success(f"Product fields retrieved from database: {url}")
+            return partial_response(product_data)
 
+        if product_data:
             # Convert to response model
             product = ProductResponse(**product_data.model_dump())
-
-            # Apply sorting if requested
-            if price_sort:
-                reverse = price_sort.lower() == "desc"
-                product.offers.sort(key=lambda x: x.price, reverse=reverse)
-
-            # Apply count limit if requested
-            if count_limit:
-                product.offers = product.offers[:count_limit]
+            product.offers = _apply_offer_options(
+                product.offers, price_sort, count_limit
+            )
 
             log.success(f"Product data retrieved from database: {url}")
             return product
 
         # If not found in database, use parser with mock data
         log.info(f"Product not found in database, using parser: {url}")
+        consume_budget(api_key, Budget.PARSE)
         product_data = await product_parser.parse_product(
             url=url,
-            timeout_limit=timeout_limit,
             count_limit=count_limit,
             price_sort=price_sort,
+            deadline=deadline,
         )
 
         if not product_data:
             log.warning(f"Product not found {url}")
             raise HTTPException(status_code=404, detail="Product not found")
 
+        if paths:
+            parsed = product_data.model_dump()
+            parsed["summary"] = summarize_offers(parsed["offers"])
+            return partial_response(pick(parsed, paths))
         return product_data
 
     except HTTPException:
@@ -58,3 +125,187 @@ async def get_product_offers(
     except Exception as e:
         log.error(f"Failed to retrieve product {url}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/offers", response_model=OfferPage)
+async def find_offers(
+    shop: Optional[str] = Query(None, description="Exact shop name"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    is_used: Optional[bool] = Query(None),
+    price_sort: SortType = Query(SortType.ASC),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of previous page"),
+    api_key: ApiKey = Depends(get_api_key),
+):
+    """
+    Current offers across all stored products
+
+    Filtered by shop, price range and condition, ordered by price. Follow
+    `next_cursor` for further pages.
+    """
+    offers, next_cursor = await offer_repository.find_offers(
+        shop=shop,
+        min_price=min_price,
+        max_price=max_price,
+        is_used=is_used,
+        descending=price_sort == SortType.DESC,
+        limit=limit,
+        cursor=cursor,
+    )
+    return OfferPage(
+        items=[ProductOfferSchema(**offer.model_dump()) for offer in offers],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/summary", response_model=ProductSummaryResponse)
+async def get_product_summary(
+    url: str = Query(..., description="Product page URL"),
+    api_key: ApiKey = Depends(get_api_key),
+):
+    """
+    Offer statistics of a stored product
+
+    Count, price percentiles, cheapest new and used offer and outliers,
+    computed when the offers were saved. Never starts a parse.
+    """
+    product_data = await product_repository.get_summary(url)
+    if not product_data:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return ProductSummaryResponse(**product_data)
+
+
+@router.get(
+    "/history",
+    response_model=PriceHistoryResponse,
+    responses={400: {"description": "Too many buckets"}},
+)
+async def get_price_history(
+    url: str = Query(..., description="Product page URL"),
+    bucket: HistoryBucket = Query(HistoryBucket.DAY),
+    days: int = Query(30, ge=1, le=3650, description="Window length"),
+    until: Optional[datetime] = Query(None, description="Window end, default now"),
+    shop: Optional[str] = Query(None, description="Only offers of this shop"),
+    api_key: ApiKey = Depends(get_api_key),
+):
+    """
+    Offer price history of a product
+
+    Returns min/max/avg of the offer prices in effect per bucket. Points are
+    recorded when an offer appears, changes price or disappears, and every
+    offer's last price holds until its next point, so buckets without
+    changes carry the prices forward (`changes` is 0). At most
+    PRICE_HISTORY_MAX_BUCKETS buckets per request, longer windows need a
+    coarser bucket.
+    """
+    end = until or datetime.utcnow()
+    buckets = await price_history_repository.get_price_buckets(
+        url, bucket.value, end - timedelta(days=days), end, shop=shop
+    )
+    return PriceHistoryResponse(
+        url=url,
+        bucket=bucket,
+        shop=shop,
+        points=[PriceBucket(**point) for point in buckets],
+    )
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One JSON object per URL, in completion order",
+            "content": {"application/x-ndjson": {}},
+        },
+        400: {"description": "Too many URLs"},
+    },
+)
+async def get_products_batch(
+    request: ProductBatchRequest, api_key: ApiKey = Depends(get_api_key)
+):
+    """
+    Get offers for several products
+
+    Stored products are resolved with a single query and streamed first,
+    missing ones are parsed with bounded concurrency and streamed as they
+    complete. Each parse takes a token from the key's parse budget, misses
+    over budget are reported with status 429 and `retry_after`.
+    """
+    urls = list(dict.fromkeys(request.urls))
+    if len(urls) > settings.BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs, maximum is {settings.BATCH_MAX_URLS}",
+        )
+
+    cached = await product_repository.get_products_by_urls(urls)
+    misses = [url for url in urls if url not in cached]
+    record_cache_lookup("product", hit=True, count=len(cached))
+    record_cache_lookup("product", hit=False, count=len(misses))
+    log.info(f"Batch lookup: {len(cached)} cached, {len(misses)} to parse")
+
+    async def parse_missing(url: str, semaphore: asyncio.Semaphore) -> ProductBatchItem:
+        try:
+            consume_budget(api_key, Budget.PARSE)
+        except RateLimitException as e:
+            return ProductBatchItem(
+                url=url,
+                status_code=e.status_code,
+                error=e.detail,
+                retry_after=int((e.headers or {}).get("Retry-After", 0)) or None,
+            )
+        async with semaphore:
+            try:
+                product = await product_parser.parse_product(
+                    url=url,
+                    timeout_limit=request.timeout_limit,
+                    count_limit=request.count_limit,
+                    price_sort=request.price_sort,
+                )
+                return ProductBatchItem(url=url, status_code=200, product=product)
+            except HTTPException as e:
+                return ProductBatchItem(
+                    url=url,
+                    status_code=e.status_code,
+                    error=e.detail,
+                    retry_after=int((e.headers or {}).get("Retry-After", 0)) or None,
+                )
+            except Exception as e:
+                log.error(f"Failed to parse product {url} in batch: {str(e)}")
+                return ProductBatchItem(url=url, status_code=500, error=str(e))
+
+    async def stream_results() -> AsyncIterator[str]:
+        for url in urls:
+            if url in cached:
+                product = ProductResponse(**cached[url].model_dump())
+                product.offers = _apply_offer_options(
+                    product.offers, request.price_sort, request.count_limit
+                )
+                item = ProductBatchItem(
+                    url=url, status_code=200, from_cache=True, product=product
+                )
+                yield item.model_dump_json() + "\n"
+
+        if not misses:
+            return
+
+        semaphore = asyncio.Semaphore(settings.BATCH_PARSE_CONCURRENCY)
+        request_id = request_id_var.get()
+        tasks = [
+            asyncio.create_task(
+                parse_missing(url, semaphore), name=f"request:{request_id}:parse"
+            )
+            for url in misses
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield item.model_dump_json() + "\n"
+        finally:
+            # Client went away before all parses completed
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
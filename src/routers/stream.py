@@ -0,0 +1,207 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
+
+from ..core.auth import Budget, consume_budget, get_api_key, resolve_api_key
+from ..core.config import settings
+from ..core.exceptions import RateLimitException
+from ..core.logger import log
+from ..models.api_key import ApiKey
+from ..services.broadcaster import Subscription, broadcaster, news_topic, product_topic
+
+router = APIRouter()
+
+
+def _topics(products: List[str], news: List[str]) -> Set[str]:
+    return {product_topic(url) for url in products} | {
+        news_topic(source) for source in news
+    }
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    dependencies=[Depends(get_api_key)],
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_events(
+    products: List[str] = Query([], alias="product", description="Product URLs"),
+    news: List[str] = Query([], description="News source URLs or domains"),
+):
+    """
+    Server-Sent Events stream of product offer diffs and new news items
+
+    Subscribers that fall behind by more than STREAM_QUEUE_SIZE events receive
+    a final `dropped` event and are disconnected.
+    """
+    topics = _topics(products, news)
+    if len(topics) > settings.STREAM_MAX_TOPICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.STREAM_MAX_TOPICS} topics per stream",
+        )
+    subscription = broadcaster.subscribe(topics)
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), timeout=settings.STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if event is None:
+                    yield "event: dropped\ndata: {}\n\n"
+                    break
+                yield f"event: {event.event}\ndata: {event.data}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket):
+    """
+    WebSocket stream of product offer diffs and new news items
+
+    The API key comes in the X-API-Key header or, for clients that can't
+    set headers, in a first message {"action": "auth", "api_key": ...}.
+    Client messages: {"action": "subscribe" | "unsubscribe",
+    "products": [...], "news": [...]}, each taking a token from the key's
+    read budget.
+    """
+    await websocket.accept()
+    api_key = await _authenticate(websocket)
+    if api_key is None:
+        return
+
+    subscription = broadcaster.subscribe()
+    sender = asyncio.create_task(_send_events(websocket, subscription))
+    receiver = asyncio.create_task(_receive_commands(websocket, subscription, api_key))
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        broadcaster.unsubscribe(subscription)
+
+    if subscription.dropped:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+
+async def _authenticate(websocket: WebSocket) -> Optional[ApiKey]:
+    """Key of the connection, None once it's closed for a bad or missing key"""
+    plaintext = websocket.headers.get("X-API-Key")
+    try:
+        if not plaintext:
+            message = await asyncio.wait_for(
+                websocket.receive_json(), timeout=settings.STREAM_HEARTBEAT_SECONDS
+            )
+            if isinstance(message, dict) and message.get("action") == "auth":
+                plaintext = message.get("api_key")
+        api_key = await resolve_api_key(
+            plaintext if isinstance(plaintext, str) else None
+        )
+        if api_key is None:
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION, reason="Invalid API Key"
+            )
+            return None
+        consume_budget(api_key, Budget.READ)
+    except RateLimitException as e:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=e.detail)
+        return None
+    except (asyncio.TimeoutError, ValueError):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="API key required"
+        )
+        return None
+    except WebSocketDisconnect:
+        return None
+    return api_key
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription):
+    while True:
+        event = await subscription.get()
+        if event is None:
+            return
+        await websocket.send_text(event.data)
+
+
+def _command_topics(command: Dict[str, Any]) -> Set[str]:
+    """Topics of a subscribe command, ValueError unless lists of strings"""
+    lists = [command.get("products", []), command.get("news", [])]
+    for values in lists:
+        if not isinstance(values, list) or not all(
+            isinstance(value, str) for value in values
+        ):
+            raise ValueError("products and news must be lists of strings")
+    return _topics(*lists)
+
+
+async def _receive_commands(
+    websocket: WebSocket, subscription: Subscription, api_key: ApiKey
+):
+    try:
+        while True:
+            try:
+                command = json.loads(await websocket.receive_text())
+                if not isinstance(command, dict):
+                    raise ValueError("Command must be an object")
+                topics = _command_topics(command)
+                action = command.get("action", "subscribe")
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            try:
+                consume_budget(api_key, Budget.READ)
+            except RateLimitException as e:
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "detail": e.detail,
+                        "retry_after": int((e.headers or {}).get("Retry-After", 0))
+                        or None,
+                    }
+                )
+                continue
+
+            if action == "unsubscribe":
+                broadcaster.remove_topics(subscription, topics)
+            elif len(subscription.topics | topics) > settings.STREAM_MAX_TOPICS:
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "detail": f"At most {settings.STREAM_MAX_TOPICS} topics "
+                        "per connection",
+                    }
+                )
+                continue
+            else:
+                broadcaster.add_topics(subscription, topics)
+            await websocket.send_json(
+                {"type": "subscribed", "topics": sorted(subscription.topics)}
+            )
+    except WebSocketDisconnect:
+        log.debug("Stream websocket disconnected")
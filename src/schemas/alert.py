@@ -0,0 +1,57 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class AlertDirection(str, Enum):
+    """Side of the threshold a price has to cross to"""
+
+    BELOW = "below"  # Price fell to or under the threshold
+    ABOVE = "above"  # Price rose to or over the threshold
+
+
+class OfferCondition(str, Enum):
+    ANY = "any"
+    NEW = "new"
+    USED = "used"
+
+
+class DeliveryStatus(str, Enum):
+    """State of an outbox item"""
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"  # Gave up after ALERT_MAX_ATTEMPTS
+
+
+class AlertRuleCreate(BaseModel):
+    product_url: Optional[str] = None
+    shop: Optional[str] = None
+    threshold: float = Field(..., gt=0)
+    direction: AlertDirection = AlertDirection.BELOW
+    condition: OfferCondition = OfferCondition.ANY
+    # Offers seen for the first time have no old price to cross from; by
+    # default they only set the baseline, with this they fire when already
+    # past the threshold
+    include_new_offers: bool = False
+    webhook_url: str = Field(..., pattern="^https?://")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if not self.product_url and not self.shop:
+            raise ValueError("Either product_url or shop is required")
+        return self
+
+
+class AlertRuleResponse(BaseModel):
+    id: str
+    product_url: Optional[str] = None
+    shop: Optional[str] = None
+    threshold: float
+    direction: AlertDirection
+    condition: OfferCondition
+    include_new_offers: bool
+    webhook_url: str
+    created_at: datetime
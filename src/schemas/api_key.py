@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ApiKeyCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    is_admin: bool = False
+    read_rate_per_minute: Optional[int] = Field(None, ge=0)
+    read_burst: Optional[int] = Field(None, ge=1)
+    parse_rate_per_minute: Optional[int] = Field(None, ge=0)
+    parse_burst: Optional[int] = Field(None, ge=1)
+
+
+class ApiKeyResponse(BaseModel):
+    id: str
+    name: str
+    prefix: str
+    is_admin: bool
+    revoked: bool
+    read_rate_per_minute: Optional[int] = None
+    read_burst: Optional[int] = None
+    parse_rate_per_minute: Optional[int] = None
+    parse_burst: Optional[int] = None
+    created_at: datetime
+
+
+class ApiKeyCreated(ApiKeyResponse):
+    """Returned once on creation, the plaintext key is not stored"""
+
+    key: str
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+from ..core.circuit_breaker import BreakerState
+
+
+class BreakerStatus(BaseModel):
+    domain: str
+    state: BreakerState
+    calls: int
+    failure_rate: float
+    slow_rate: float
+    retry_after: float
+    retry_tokens: float
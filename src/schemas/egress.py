@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class ProxyStatus(BaseModel):
+    name: str
+    health: float
+    in_flight: int
+    ejected: bool
+    ejected_for: float
+    ejections: int
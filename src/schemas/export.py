@@ -0,0 +1,37 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ExportDataset(str, Enum):
+    """Collections available for bulk export"""
+
+    NEWS = "news"
+    PRODUCTS = "products"
+    OFFERS = "offers"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+class ExportQuery(BaseModel):
+    dataset: ExportDataset
+    format: ExportFormat = ExportFormat.NDJSON
+    # News source domain
+    source: Optional[str] = None
+    # Article URLs for news (filter sources by domain with `source`),
+    # product URLs for products and offers
+    urls: List[str] = []
+    shop: Optional[str] = None
+    # Publication date for news, last update for products and offers
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    # Subset of the dataset's columns, `id` is always exported
+    columns: Optional[List[str]] = None
+    # Resume after the row with this `id`
+    after: Optional[str] = None
@@ -4,6 +4,8 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
+from ..core.fieldsets import FieldSet
+
 
 class ArticleDataSchema(BaseModel):
     title: str
@@ -21,12 +23,32 @@ class ArticleDataSchema(BaseModel):
 class NewsItemSchema(BaseModel):
     url: str
     article_data: ArticleDataSchema
+    # Near-duplicates of the same story across sources share it
+    cluster_id: Optional[str] = None
+
+
+class FeedEntrySchema(BaseModel):
+    """Article link as listed on a feed page, before its body is fetched"""
+
+    url: str
+    published_at: datetime
 
 
 class NewsResponse(BaseModel):
     items: List[NewsItemSchema]
 
 
+class NewsSearchHitSchema(NewsItemSchema):
+    source: str
+    score: float
+
+
+class NewsSearchPage(BaseModel):
+    items: List[NewsSearchHitSchema]
+    # Pass as `cursor` to get the next page, None on the last one
+    next_cursor: Optional[str] = None
+
+
 class NewsQueryParams(BaseModel):
     url: str
     until_date: datetime
@@ -38,3 +60,24 @@ class ClientType(str, Enum):
 
     HTTP = "http"
     BROWSER = "browser"
+
+
+class NewsSearchSort(str, Enum):
+    """Order of news search results"""
+
+    RELEVANCE = "relevance"
+    DATE = "date"
+
+
+# Names accepted by `fields=` on news endpoints and their document paths
+NEWS_FIELDS = FieldSet(
+    {
+        "url": "url",
+        "source": "source",
+        "cluster_id": "cluster_id",
+        "created_at": "created_at",
+        "article_data": "article_data",
+        **{name: f"article_data.{name}" for name in ArticleDataSchema.model_fields},
+    },
+    summary=["url", "source", "title", "published_at"],
+)
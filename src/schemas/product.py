@@ -1,8 +1,11 @@
+from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
+from ..core.fieldsets import FieldSet
+
 
 class OfferSchema(BaseModel):
     url: str
@@ -16,6 +19,66 @@ class OfferSchema(BaseModel):
 class ProductResponse(BaseModel):
     url: str
     offers: List[OfferSchema]
+    # Page load was cut short by the request deadline
+    partial: bool = False
+    offers_found: Optional[int] = None
+
+
+class OfferOutlier(BaseModel):
+    url: str
+    shop: str
+    price: float
+    # "low" or "high", relative to offers of the same condition
+    side: str
+
+
+class OfferSummary(BaseModel):
+    count: int
+    priced_count: int
+    shop_count: int
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    median_price: Optional[float] = None
+    p10_price: Optional[float] = None
+    p90_price: Optional[float] = None
+    cheapest_new: Optional[OfferSchema] = None
+    cheapest_used: Optional[OfferSchema] = None
+    outliers: List[OfferOutlier] = []
+
+
+class ProductSummaryResponse(BaseModel):
+    url: str
+    summary: OfferSummary
+    partial: bool = False
+    updated_at: Optional[datetime] = None
+
+
+class ProductOfferSchema(OfferSchema):
+    product_url: str
+
+
+class OfferPage(BaseModel):
+    items: List[ProductOfferSchema]
+    # Pass as `cursor` to get the next page, None on the last one
+    next_cursor: Optional[str] = None
+
+
+class ProductBatchRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1)
+    timeout_limit: Optional[int] = Field(None, ge=1, le=30)
+    count_limit: Optional[int] = Field(None, ge=1, le=100)
+    price_sort: Optional[str] = Field(None, pattern="^(asc|desc)$")
+
+
+class ProductBatchItem(BaseModel):
+    """Single NDJSON line of a batch lookup"""
+
+    url: str
+    status_code: int
+    from_cache: bool = False
+    product: Optional[ProductResponse] = None
+    error: Optional[str] = None
+    retry_after: Optional[int] = None
 
 
 class ProductQueryParams(BaseModel):
@@ -30,3 +93,43 @@ class SortType(str, Enum):
 
     ASC = "asc"
     DESC = "desc"
+
+
+class HistoryBucket(str, Enum):
+    """Bucket sizes of price history, weeks start on Monday"""
+
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class PriceBucket(BaseModel):
+    ts: datetime
+    min_price: float
+    max_price: float
+    avg_price: float
+    # Price points (offer appearances and price changes) in the bucket
+    changes: int
+
+
+class PriceHistoryResponse(BaseModel):
+    url: str
+    bucket: HistoryBucket
+    shop: Optional[str] = None
+    points: List[PriceBucket]
+
+
+# Names accepted by `fields=` on product endpoints and their document paths
+PRODUCT_FIELDS = FieldSet(
+    {
+        "url": "url",
+        "partial": "partial",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+        "summary": "summary",
+        "offers": "offers",
+        **{f"offers.{name}": f"offers.{name}" for name in OfferSchema.model_fields},
+    },
+    summary=["url", "partial", "updated_at", "summary"],
+)
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from ..core.profiling import ProfileMode
+
+
+class ProfileArmRequest(BaseModel):
+    requests: int = Field(1, ge=1, le=100)
+    path_prefix: Optional[str] = Field(None, examples=["/products"])
+    mode: ProfileMode = ProfileMode.REQUEST
+
+
+class ProfileStatus(BaseModel):
+    armed: bool
+    remaining: int
+    path_prefix: Optional[str] = None
+    mode: ProfileMode
+    active: bool
+
+
+class ProfileInfo(BaseModel):
+    id: str
+    method: str
+    path: str
+    duration: float
+    created_at: datetime
@@ -0,0 +1,54 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class WatchlistKind(str, Enum):
+    """Kinds of watchlist entries handled by the dispatcher"""
+
+    PRODUCT = "product"
+    NEWS = "news"
+
+
+class WatchlistStatus(str, Enum):
+    """Outcome of the last dispatcher run for an entry"""
+
+    OK = "ok"
+    ERROR = "error"
+    SKIPPED = "skipped"  # Postponed while the domain's circuit breaker is open
+
+
+class WatchlistEntryCreate(BaseModel):
+    url: str
+    kind: WatchlistKind
+    priority: int = Field(0, ge=0, le=100)
+    interval_minutes: Optional[int] = Field(None, ge=1, le=10080)
+    enabled: bool = True
+    next_run_at: Optional[datetime] = None
+
+
+class WatchlistEntryUpdate(BaseModel):
+    priority: Optional[int] = Field(None, ge=0, le=100)
+    interval_minutes: Optional[int] = Field(None, ge=1, le=10080)
+    enabled: Optional[bool] = None
+    next_run_at: Optional[datetime] = None
+
+
+class WatchlistEntryResponse(BaseModel):
+    id: str
+    url: str
+    kind: WatchlistKind
+    priority: int
+    interval_minutes: int
+    enabled: bool
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+
+
+class WatchlistPage(BaseModel):
+    items: List[WatchlistEntryResponse]
+    total: int
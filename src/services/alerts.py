@@ -0,0 +1,314 @@
+import asyncio
+import bisect
+import hashlib
+import hmac
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from ..core.config import settings
+from ..core.exceptions import UnsafeWebhookException
+from ..core.logger import log
+from ..core.metrics import ALERT_DELIVERIES, ALERTS_TRIGGERED
+from ..core.webhook_guard import check_webhook_url
+from ..models.alert import AlertDelivery, AlertRule
+from ..repositories.alert_outbox_repository import alert_outbox_repository
+from ..repositories.alert_rule_repository import alert_rule_repository
+from ..schemas.alert import AlertDirection, DeliveryStatus, OfferCondition
+
+# (direction, "product" | "shop", product URL or shop name)
+IndexKey = Tuple[str, str, str]
+
+
+class ThresholdIndex:
+    """Thresholds of one product or shop, sorted for range lookups"""
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.rule_ids: List[str] = []
+
+    def add(self, threshold: float, rule_id: str):
+        position = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.rule_ids.insert(position, rule_id)
+
+    def remove(self, threshold: float, rule_id: str):
+        start = bisect.bisect_left(self.thresholds, threshold)
+        end = bisect.bisect_right(self.thresholds, threshold)
+        for position in range(start, end):
+            if self.rule_ids[position] == rule_id:
+                del self.thresholds[position]
+                del self.rule_ids[position]
+                return
+
+    def crossed(self, low: float, high: float, closed_low: bool) -> List[str]:
+        """Rules with a threshold between `low` and `high`, one end closed"""
+        if closed_low:
+            start = bisect.bisect_left(self.thresholds, low)
+            end = bisect.bisect_left(self.thresholds, high)
+        else:
+            start = bisect.bisect_right(self.thresholds, low)
+            end = bisect.bisect_right(self.thresholds, high)
+        return self.rule_ids[start:end]
+
+    def __len__(self) -> int:
+        return len(self.thresholds)
+
+
+class AlertEngine:
+    """
+    Price alert rules held in memory, evaluated against offer diffs
+
+    Rules are indexed per direction and product URL (or shop for shop-wide
+    rules) in sorted threshold lists. An offer whose price moved from `old`
+    to `new` only looks up thresholds between the two, so a product update
+    costs a couple of binary searches regardless of how many rules exist.
+    Alerts fire on crossing: a price that stays under a threshold doesn't
+    fire again, and a rule fires at most once per diff however many offers
+    crossed it.
+    """
+
+    def __init__(self):
+        self.rules: Dict[str, AlertRule] = {}
+        self._indexes: Dict[IndexKey, ThresholdIndex] = defaultdict(ThresholdIndex)
+
+    async def load(self):
+        """Rebuild the index from stored rules, picks up other nodes' changes"""
+        rules = await alert_rule_repository.list_rules()
+        indexes: Dict[IndexKey, ThresholdIndex] = defaultdict(ThresholdIndex)
+        for rule in rules:
+            indexes[self._index_key(rule)].add(rule.threshold, rule.id)
+        self.rules = {rule.id: rule for rule in rules}
+        self._indexes = indexes
+        log.debug(f"Loaded {len(rules)} alert rules")
+
+    def add_rule(self, rule: AlertRule):
+        self.rules[rule.id] = rule
+        self._indexes[self._index_key(rule)].add(rule.threshold, rule.id)
+
+    def remove_rule(self, rule: AlertRule):
+        if self.rules.pop(rule.id, None) is None:
+            return
+        key = self._index_key(rule)
+        self._indexes[key].remove(rule.threshold, rule.id)
+        if not self._indexes[key]:
+            del self._indexes[key]
+
+    def evaluate(
+        self, product_url: str, diff: Dict[str, List[Dict[str, Any]]]
+    ) -> List[Tuple[AlertRule, Dict[str, Any]]]:
+        """
+        Rules whose threshold the added or repriced offers crossed
+
+        Each triggered rule is returned once, with its best matching offer:
+        the cheapest for `below` rules, the dearest for `above`.
+        """
+        best: Dict[str, Dict[str, Any]] = {}
+        for offer in diff["added"] + diff["changed"]:
+            price = offer["price"]
+            if not price:
+                continue  # Unparsed price
+            # First sightings (and unparsed old prices) have nothing to cross
+            # from, only rules with include_new_offers look at them
+            old_price = offer.get("old_price") or None
+            for direction in AlertDirection:
+                if direction == AlertDirection.BELOW:
+                    # Fell to or under: new <= threshold < old
+                    low, high = price, old_price or math.inf
+                    closed_low = True
+                else:
+                    # Rose to or over: old < threshold <= new
+                    low, high = old_price or -math.inf, price
+                    closed_low = False
+                if low >= high:
+                    continue
+                for scope, value in (("product", product_url), ("shop", offer["shop"])):
+                    index = self._indexes.get((direction.value, scope, value))
+                    if not index:
+                        continue
+                    for rule_id in index.crossed(low, high, closed_low):
+                        rule = self.rules[rule_id]
+                        if old_price is None and not rule.include_new_offers:
+                            continue
+                        if not self._applies(rule, offer):
+                            continue
+                        current = best.get(rule_id)
+                        if current is None or self._better(rule, offer, current):
+                            best[rule_id] = offer
+        return [(self.rules[rule_id], offer) for rule_id, offer in best.items()]
+
+    async def process(self, product_url: str, diff: Dict[str, List[Dict[str, Any]]]):
+        """Queue webhook deliveries for the rules an offer diff triggers"""
+        matches = self.evaluate(product_url, diff)
+        if not matches:
+            return
+        now = datetime.utcnow()
+        deliveries = [
+            AlertDelivery(
+                rule_id=rule.id,
+                webhook_url=rule.webhook_url,
+                status=DeliveryStatus.PENDING.value,
+                next_attempt_at=now,
+                payload={
+                    "rule_id": rule.id,
+                    "product_url": product_url,
+                    "direction": rule.direction,
+                    "threshold": rule.threshold,
+                    "price": offer["price"],
+                    "old_price": offer.get("old_price"),
+                    "offer": {
+                        field: offer[field]
+                        for field in ("url", "title", "shop", "price", "is_used")
+                    },
+                    "triggered_at": now.isoformat(),
+                },
+            )
+            for rule, offer in matches
+        ]
+        try:
+            await alert_outbox_repository.enqueue(deliveries)
+        except Exception as e:
+            log.error(f"Failed to queue alerts for {product_url}: {str(e)}")
+            return
+        ALERTS_TRIGGERED.inc(len(deliveries))
+        log.info(f"{len(deliveries)} price alerts triggered for {product_url}")
+        alert_dispatcher.notify()
+
+    @staticmethod
+    def _index_key(rule: AlertRule) -> IndexKey:
+        if rule.product_url:
+            return rule.direction, "product", rule.product_url
+        return rule.direction, "shop", rule.shop
+
+    @staticmethod
+    def _better(rule: AlertRule, offer: Dict[str, Any], current: Dict[str, Any]):
+        if rule.direction == AlertDirection.BELOW.value:
+            return offer["price"] < current["price"]
+        return offer["price"] > current["price"]
+
+    @staticmethod
+    def _applies(rule: AlertRule, offer: Dict[str, Any]) -> bool:
+        # Product rules may also be limited to a shop
+        if rule.product_url and rule.shop and rule.shop != offer["shop"]:
+            return False
+        if rule.condition == OfferCondition.NEW.value:
+            return not offer["is_used"]
+        if rule.condition == OfferCondition.USED.value:
+            return offer["is_used"]
+        return True
+
+
+class AlertDispatcher:
+    """
+    Background worker calling webhooks of queued alerts
+
+    Deliveries are leased from the outbox like watchlist entries, so several
+    nodes can run a dispatcher. Failed calls are retried with exponential
+    backoff up to ALERT_MAX_ATTEMPTS; receivers should dedupe on the
+    `X-Alert-Id` header, a delivery can arrive more than once. Webhooks that
+    resolve to a non-public address are given up on without a call, and
+    redirects aren't followed so they can't lead there either.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        """Load alert rules and start dispatching"""
+        await alert_engine.load()
+        self._client = httpx.AsyncClient(
+            timeout=settings.ALERT_WEBHOOK_TIMEOUT, follow_redirects=False
+        )
+        self._task = asyncio.create_task(self._run(), name="alert_dispatcher")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    def notify(self):
+        """Wake the dispatcher for newly queued alerts"""
+        self._wakeup.set()
+
+    async def _run(self):
+        refreshed_at = time.monotonic()
+        while True:
+            self._wakeup.clear()
+            delivered = 0
+            try:
+                if (
+                    time.monotonic() - refreshed_at
+                    > settings.ALERT_RULES_REFRESH_SECONDS
+                ):
+                    await alert_engine.load()
+                    refreshed_at = time.monotonic()
+                delivered = await self.dispatch_due()
+            except Exception as e:
+                log.error(f"Alert dispatch failed: {str(e)}")
+            if delivered:
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), settings.ALERT_DISPATCH_POLL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_due(self) -> int:
+        """Call webhooks of one batch of due deliveries"""
+        deliveries = await alert_outbox_repository.claim_due(
+            limit=settings.ALERT_DISPATCH_BATCH_SIZE,
+            lease_seconds=settings.ALERT_WEBHOOK_TIMEOUT * 3,
+        )
+        await asyncio.gather(*(self._deliver(delivery) for delivery in deliveries))
+        return len(deliveries)
+
+    async def _deliver(self, delivery: AlertDelivery):
+        body = json.dumps(delivery.payload, default=str).encode()
+        headers = {"Content-Type": "application/json", "X-Alert-Id": delivery.id}
+        if settings.ALERT_WEBHOOK_SECRET:
+            signature = hmac.new(
+                settings.ALERT_WEBHOOK_SECRET.encode(), body, hashlib.sha256
+            ).hexdigest()
+            headers["X-Alert-Signature"] = f"sha256={signature}"
+
+        try:
+            # Checked again on every attempt, DNS may have changed since the
+            # rule was created
+            await check_webhook_url(delivery.webhook_url)
+            response = await self._client.post(
+                delivery.webhook_url, content=body, headers=headers
+            )
+            response.raise_for_status()
+        except UnsafeWebhookException as e:
+            await alert_outbox_repository.mark_failed(delivery, e.detail, None)
+            ALERT_DELIVERIES.labels("failed").inc()
+            return
+        except Exception as e:
+            attempts = delivery.attempts + 1
+            retry_in = None
+            if attempts < settings.ALERT_MAX_ATTEMPTS:
+                retry_in = settings.ALERT_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                retry_in *= random.uniform(0.8, 1.2)
+            await alert_outbox_repository.mark_failed(delivery, str(e), retry_in)
+            ALERT_DELIVERIES.labels("retry" if retry_in else "failed").inc()
+            return
+
+        await alert_outbox_repository.mark_sent(delivery)
+        ALERT_DELIVERIES.labels("sent").inc()
+
+
+alert_engine = AlertEngine()
+alert_dispatcher = AlertDispatcher()
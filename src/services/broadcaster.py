@@ -0,0 +1,112 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set
+from urllib.parse import urlparse
+
+from fastapi.encoders import jsonable_encoder
+
+from ..core.config import settings
+from ..core.logger import log
+
+
+def product_topic(url: str) -> str:
+    return f"product:{url}"
+
+
+def news_topic(source: str) -> str:
+    """Topic for news source, accepts both source URL and bare domain"""
+    domain = urlparse(source).netloc if "://" in source else source
+    domain = domain.lower()
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return f"news:{domain}"
+
+
+class StreamEvent(NamedTuple):
+    event: str
+    data: str  # JSON encoded once per publish, shared by all subscribers
+
+
+class Subscription:
+    """Bounded per-client event queue"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.topics: Set[str] = set()
+        self.dropped = False
+
+    async def get(self) -> Optional[StreamEvent]:
+        """Wait for next event, None means the subscription was dropped"""
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """
+    In-process fan-out of change events to subscribers
+
+    Publishing never waits on subscribers: events are put on each
+    subscriber's bounded queue and a subscriber whose queue is full is
+    dropped, so a stalled client can't delay delivery to the others.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topics: Iterable[str] = ()) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self.add_topics(subscription, topics)
+        return subscription
+
+    def add_topics(self, subscription: Subscription, topics: Iterable[str]):
+        for topic in topics:
+            subscription.topics.add(topic)
+            self._topics[topic].add(subscription)
+
+    def remove_topics(self, subscription: Subscription, topics: Iterable[str]):
+        for topic in topics:
+            subscription.topics.discard(topic)
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def unsubscribe(self, subscription: Subscription):
+        self.remove_topics(subscription, list(subscription.topics))
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        """Deliver message to topic subscribers, returns number of deliveries"""
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return 0
+
+        event = StreamEvent(
+            event=message.get("type", "message"),
+            data=json.dumps(jsonable_encoder(message), ensure_ascii=False),
+        )
+        delivered = 0
+        for subscription in list(subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscription)
+        return delivered
+
+    def _drop(self, subscription: Subscription):
+        """Disconnect slow consumer and wake it up with end-of-stream marker"""
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        log.warning("Dropped slow stream subscriber")
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({s for subscribers in self._topics.values() for s in subscribers})
+
+
+broadcaster = Broadcaster(queue_size=settings.STREAM_QUEUE_SIZE)
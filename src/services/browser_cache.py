@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from playwright.async_api import BrowserContext, Route
+
+from ..core.circuit_breaker import breaker_domain
+from ..core.config import settings
+from ..core.logger import log
+from ..core.metrics import BROWSER_ASSET_BYTES, record_cache_lookup
+from .har_recorder import HarMode, har_recorder
+
+# Static resources worth keeping across contexts
+CACHEABLE_TYPES = {"script", "stylesheet", "font", "image"}
+# Set by the browser from the body we hand back
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    """Unix time of an HTTP date header, None if missing or invalid"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class StorageStateStore:
+    """
+    Cookies and local storage persisted per site
+
+    A context for a URL starts from the site's last saved state, so sessions
+    and consent choices survive across parses. State is saved after a
+    successful page load, at most once per `save_interval` seconds per site.
+    """
+
+    def __init__(self, state_dir: str, max_age_hours: float, save_interval: float):
+        self.state_dir = Path(state_dir)
+        self.max_age_seconds = max_age_hours * 3600
+        self.save_interval = save_interval
+        self._saved_at: Dict[str, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age_seconds > 0 and har_recorder.mode == HarMode.OFF
+
+    def path_for(self, url: str) -> Path:
+        return self.state_dir / f"{breaker_domain(url)}.json"
+
+    def context_options(self, url: str) -> Dict[str, Any]:
+        """`new_context` kwargs restoring the site's saved state, if fresh"""
+        if not self.enabled:
+            return {}
+        path = self.path_for(url)
+        try:
+            if time.time() - path.stat().st_mtime < self.max_age_seconds:
+                return {"storage_state": str(path)}
+        except FileNotFoundError:
+            pass
+        return {}
+
+    async def save(self, context: BrowserContext, url: str):
+        if not self.enabled:
+            return
+        domain = breaker_domain(url)
+        now = time.monotonic()
+        if now - self._saved_at.get(domain, -self.save_interval) < self.save_interval:
+            return
+        self._saved_at[domain] = now
+        try:
+            state = await context.storage_state()
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(
+                _write_atomic, self.path_for(url), json.dumps(state).encode()
+            )
+        except Exception as e:
+            log.warning(f"Failed to save storage state for {domain}: {str(e)}")
+
+
+class AssetCache:
+    """
+    On-disk cache of static assets shared by all browser contexts
+
+    Scripts, styles, fonts and images answered with 200 are stored by URL
+    and served to later contexts without touching the network, for as long
+    as their caching headers allow (capped at `ttl_hours`). Total size is bounded, least recently
+    used assets are evicted first. Off in HAR record/replay mode.
+    """
+
+    def __init__(self, cache_dir: str, max_mb: float, ttl_hours: float):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 2**20)
+        self.ttl_seconds = ttl_hours * 3600
+        # key -> size in bytes, least recently used first
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and har_recorder.mode == HarMode.OFF
+
+    async def attach(self, context: BrowserContext):
+        if not self.enabled:
+            return
+        await self._load_index()
+        await context.route("**/*", self._handle)
+
+    async def _handle(self, route: Route):
+        request = route.request
+        if request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+            await route.fallback()
+            return
+
+        key = hashlib.sha1(request.url.encode()).hexdigest()
+        cached = await self._get(key)
+        record_cache_lookup("browser_asset", hit=cached is not None)
+        if cached is not None:
+            meta, body = cached
+            BROWSER_ASSET_BYTES.labels("cache").inc(len(body))
+            await route.fulfill(
+                status=meta["status"], headers=meta["headers"], body=body
+            )
+            return
+
+        try:
+            response = await route.fetch()
+        except Exception:
+            # Page closed or request failed, let the browser report it
+            await route.fallback()
+            return
+        body = await response.body()
+        BROWSER_ASSET_BYTES.labels("network").inc(len(body))
+        ttl = self._ttl(response.headers)
+        if response.status == 200 and ttl > 0:
+            headers = {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in DROPPED_HEADERS
+            }
+            await self._put(key, headers, body, ttl)
+        await route.fulfill(response=response, body=body)
+
+    def _ttl(self, headers: Dict[str, str]) -> float:
+        """
+        Seconds the response may be served from cache, 0 to not store it
+
+        Cached assets are never revalidated, so `no-cache` is treated like
+        `no-store`. Without `max-age` or `Expires` the heuristic of RFC 9111
+        applies, 10% of the time since `Last-Modified`; responses without
+        any of these headers aren't cached.
+        """
+        cache_control = headers.get("cache-control", "").lower()
+        if re.search(r"\b(no-store|no-cache|private)\b", cache_control):
+            return 0
+        if not cache_control and "no-cache" in headers.get("pragma", "").lower():
+            return 0
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        if max_age:
+            return min(float(max_age.group(1)), self.ttl_seconds)
+
+        date = _http_date(headers.get("date")) or time.time()
+        expires = headers.get("expires")
+        if expires is not None:
+            # Invalid dates, like "0", mean already expired
+            expires_at = _http_date(expires) or 0
+            return min(max(expires_at - date, 0), self.ttl_seconds)
+        last_modified = _http_date(headers.get("last-modified"))
+        if last_modified is not None:
+            return min(max(date - last_modified, 0) * 0.1, self.ttl_seconds)
+        return 0
+
+    async def _get(self, key: str):
+        if key not in self._index:
+            return None
+        try:
+            meta_bytes, body = await asyncio.to_thread(self._read, key)
+            meta = json.loads(meta_bytes)
+        except (OSError, ValueError):
+            await self._evict(key)
+            return None
+        if meta["expires_at"] < time.time():
+            await self._evict(key)
+            return None
+        self._index.move_to_end(key)
+        return meta, body
+
+    async def _put(self, key: str, headers: Dict[str, str], body: bytes, ttl: float):
+        if len(body) > self.max_bytes // 10:
+            # One asset may not push out a tenth of the cache
+            return
+        meta = {"status": 200, "headers": headers, "expires_at": time.time() + ttl}
+        try:
+            await asyncio.to_thread(self._write, key, json.dumps(meta).encode(), body)
+        except OSError as e:
+            log.warning(f"Failed to cache browser asset: {str(e)}")
+            return
+
+        async with self._lock:
+            self._size += len(body) - self._index.pop(key, 0)
+            self._index[key] = len(body)
+            while self._size > self.max_bytes and self._index:
+                old_key, size = self._index.popitem(last=False)
+                self._size -= size
+                await asyncio.to_thread(self._remove, old_key)
+
+    async def _evict(self, key: str):
+        async with self._lock:
+            self._size -= self._index.pop(key, 0)
+        await asyncio.to_thread(self._remove, key)
+
+    async def _load_index(self):
+        """Rebuild index from disk on first use, oldest access first"""
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            entries = await asyncio.to_thread(self._scan)
+            for key, size in entries:
+                self._index[key] = size
+                self._size += size
+            self._loaded = True
+
+    def _scan(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        bodies = [
+            (path.stat().st_mtime, path.stem, path.stat().st_size)
+            for path in self.cache_dir.glob("*.body")
+        ]
+        return [(key, size) for _, key, size in sorted(bodies)]
+
+    def _read(self, key: str):
+        body_path = self.cache_dir / f"{key}.body"
+        meta = (self.cache_dir / f"{key}.json").read_bytes()
+        body = body_path.read_bytes()
+        os.utime(body_path)  # Keeps LRU order across restarts
+        return meta, body
+
+    def _write(self, key: str, meta: bytes, body: bytes):
+        _write_atomic(self.cache_dir / f"{key}.body", body)
+        _write_atomic(self.cache_dir / f"{key}.json", meta)
+
+    def _remove(self, key: str):
+        for suffix in (".body", ".json"):
+            (self.cache_dir / f"{key}{suffix}").unlink(missing_ok=True)
+
+
+storage_state_store = StorageStateStore(
+    state_dir=settings.BROWSER_STATE_DIR,
+    max_age_hours=settings.BROWSER_STATE_MAX_AGE_HOURS,
+    save_interval=settings.BROWSER_STATE_SAVE_INTERVAL_SECONDS,
+)
+asset_cache = AssetCache(
+    cache_dir=settings.BROWSER_ASSET_CACHE_DIR,
+    max_mb=settings.BROWSER_ASSET_CACHE_MAX_MB,
+    ttl_hours=settings.BROWSER_ASSET_CACHE_TTL_HOURS,
+)
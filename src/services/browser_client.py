@@ -1,33 +1,60 @@
 import asyncio
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from playwright.async_api import Browser, Page, async_playwright
+from playwright.async_api import Browser, BrowserContext, async_playwright
 
-from ..core.exceptions import TimeoutException
+from ..core.config import settings
+from ..core.deadline import Deadline
+from ..core.metrics import BROWSER_CONTEXTS_OPEN, BROWSERS_OPEN, observe_phase
 
 
 class BrowserClient:
+    """Shared Chromium instance handing out isolated contexts"""
+
     def __init__(self):
         self.browser: Optional[Browser] = None
         self.playwright = None
+        self._start_lock = asyncio.Lock()
+        # Bounds concurrent page loads so parallel parses can't exhaust memory
+        self._context_slots = asyncio.Semaphore(settings.BROWSER_MAX_CONTEXTS)
+
+    async def start(self):
+        async with self._start_lock:
+            if self.browser and self.browser.is_connected():
+                return
+            await self.close()
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True)
+            BROWSERS_OPEN.set(1)
 
     @asynccontextmanager
-    async def start_context_manager(self):
-        self.playwright = await async_playwright().start()
-        browser = await self.playwright.chromium.launch(headless=True)
-        self.driver = browser
+    async def new_context(
+        self, deadline: Optional[Deadline] = None, **kwargs
+    ) -> AsyncIterator[BrowserContext]:
+        """Acquire a context slot on the shared browser, launching it if needed"""
+        deadline = deadline or Deadline()
+        with observe_phase("browser_acquire"):
+            async with deadline.timeout():
+                await self._context_slots.acquire()
+            try:
+                async with deadline.timeout():
+                    if not self.browser or not self.browser.is_connected():
+                        await self.start()
+                    context = await self.browser.new_context(**kwargs)
+            except BaseException:
+                self._context_slots.release()
+                raise
 
+        BROWSER_CONTEXTS_OPEN.inc()
         try:
-            yield browser
-        except Exception as e:
-            pass
+            yield context
         finally:
-            await self.close()
-
-    async def start(self):
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=True)
+            try:
+                await context.close()
+            finally:
+                BROWSER_CONTEXTS_OPEN.dec()
+                self._context_slots.release()
 
     async def close(self):
         try:
@@ -37,22 +64,10 @@ class BrowserClient:
                 await self.playwright.stop()
         except:
             pass
-
-    # async def get_page_content(self, url: str, timeout: int = 30) -> str:
-    #     if not self.browser:
-    #         await self.start()
-
-    #     context = await self.browser.new_context()
-    #     page: Page = await context.new_page()
-
-    #     try:
-    #         await page.goto(url, timeout=timeout * 1000)
-    #         content = await page.content()
-    #         return content
-    #     except asyncio.TimeoutError:
-    #         raise TimeoutException("Browser timeout exceeded")
-    #     finally:
-    #         await context.close()
+        finally:
+            self.browser = None
+            self.playwright = None
+            BROWSERS_OPEN.set(0)
 
 
 browser_client = BrowserClient()
@@ -0,0 +1,244 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from ..core.circuit_breaker import breaker_domain
+from ..core.config import settings
+from ..core.deadline import Deadline
+from ..core.logger import log
+from ..core.metrics import EGRESS_REQUESTS
+from ..core.rate_limit import TokenBucket
+
+# Target answers that mean the egress address is being blocked
+BLOCK_STATUSES = {403, 407, 429}
+
+
+class ProxyOutcome(str, Enum):
+    OK = "ok"
+    BLOCKED = "blocked"
+    TIMEOUT = "timeout"
+    ERROR = "error"
+
+
+class Proxy:
+    """One egress proxy with its health score and limits"""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.url = url
+        self.name = f"{parsed.hostname}:{parsed.port}"
+        self.server = f"{parsed.scheme}://{parsed.hostname}:{parsed.port}"
+        self.username = parsed.username
+        self.password = parsed.password
+        # Moving average of outcomes, 1 healthy, 0 always failing
+        self.health = 1.0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.bucket = TokenBucket(
+            settings.PROXY_RATE_PER_MINUTE / 60, settings.PROXY_BURST
+        )
+
+    def available(self, now: float) -> bool:
+        if self.ejected_until > now:
+            return False
+        if self.ejected_until:
+            # Back from ejection on probation
+            self.ejected_until = 0.0
+            self.health = 0.5
+            self.consecutive_failures = 0
+            log.info(f"Proxy {self.name} reinstated")
+        return True
+
+    def record(self, outcome: ProxyOutcome):
+        if outcome == ProxyOutcome.OK:
+            self.health = 0.7 * self.health + 0.3
+            self.consecutive_failures = 0
+            return
+
+        self.health *= 0.7
+        self.consecutive_failures += 1
+        if (
+            self.consecutive_failures >= settings.PROXY_EJECT_AFTER
+            or self.health < settings.PROXY_MIN_HEALTH
+        ):
+            # Repeat offenders stay out longer
+            seconds = settings.PROXY_EJECT_SECONDS * 2 ** min(self.ejections, 5)
+            self.ejected_until = time.monotonic() + seconds
+            self.ejections += 1
+            self.consecutive_failures = 0
+            log.warning(
+                f"Proxy {self.name} ejected for {seconds:.0f}s after {outcome.value}"
+            )
+
+    def playwright_options(self) -> Dict[str, str]:
+        options = {"server": self.server}
+        if self.username:
+            options["username"] = self.username
+            options["password"] = self.password or ""
+        return options
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "health": round(self.health, 3),
+            "in_flight": self.in_flight,
+            "ejected": self.ejected_until > time.monotonic(),
+            "ejected_for": round(max(0.0, self.ejected_until - time.monotonic()), 1),
+            "ejections": self.ejections,
+        }
+
+
+class ProxyLease:
+    """Proxy held for one page load or request, None means direct egress"""
+
+    def __init__(self, proxy: Optional[Proxy]):
+        self.proxy = proxy
+        self.outcome: Optional[ProxyOutcome] = None
+
+    def report(self, outcome: ProxyOutcome):
+        self.outcome = outcome
+
+    def context_options(self) -> Dict[str, Any]:
+        """`new_context` kwargs routing a browser context through the proxy"""
+        return {"proxy": self.proxy.playwright_options()} if self.proxy else {}
+
+
+class EgressPool:
+    """
+    Rotating pool of egress proxies for browser contexts and HTTP requests
+
+    A lease picks the healthiest proxy that has a free concurrency slot and
+    rate-limit token, preferring the one the domain used last (sticky
+    sessions). Blocks, timeouts and transport errors lower a proxy's health; after
+    `PROXY_EJECT_AFTER` consecutive failures or below `PROXY_MIN_HEALTH` it is
+    ejected for a while. With no proxies configured everything goes direct.
+    """
+
+    def __init__(self, proxy_urls: List[str]):
+        self.proxies = [Proxy(url) for url in proxy_urls]
+        self._sticky: Dict[str, Tuple[Proxy, float]] = {}
+        self._changed = asyncio.Condition()
+        self._clients: Dict[Optional[str], httpx.AsyncClient] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.proxies)
+
+    @asynccontextmanager
+    async def lease(
+        self, url: str, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[ProxyLease]:
+        """
+        Hold a proxy for requests to `url`
+
+        The outcome is taken from `lease.report()`, otherwise from how the
+        block exits: timeouts and transport errors count against the proxy.
+        Other exceptions, like a 404 of the target, say nothing about the
+        proxy and release it as OK.
+        """
+        if not self.proxies:
+            yield ProxyLease(None)
+            return
+
+        domain = breaker_domain(url)
+        proxy = await self._acquire(domain, deadline or Deadline())
+        lease = ProxyLease(proxy)
+        try:
+            yield lease
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            lease.outcome = lease.outcome or ProxyOutcome.TIMEOUT
+            raise
+        except (httpx.TransportError, OSError):
+            lease.outcome = lease.outcome or ProxyOutcome.ERROR
+            raise
+        finally:
+            await self._release(domain, proxy, lease.outcome or ProxyOutcome.OK)
+
+    async def _acquire(self, domain: str, deadline: Deadline) -> Proxy:
+        async with self._changed:
+            while True:
+                proxy, wait = self._pick(domain)
+                if proxy:
+                    proxy.in_flight += 1
+                    return proxy
+                remaining = deadline.remaining()
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError("No egress proxy available in time")
+                # Woken earlier by any release
+                timeout = min(
+                    (w for w in (wait, remaining, settings.PROXY_EJECT_SECONDS) if w),
+                    default=1.0,
+                )
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _pick(self, domain: str) -> Tuple[Optional[Proxy], Optional[float]]:
+        """Proxy to use now, or seconds until a rate-limit token frees up"""
+        now = time.monotonic()
+        candidates = [proxy for proxy in self.proxies if proxy.available(now)]
+        if not candidates:
+            # Everything ejected: better a suspect proxy than none
+            candidates = [min(self.proxies, key=lambda proxy: proxy.ejected_until)]
+
+        sticky, expires_at = self._sticky.get(domain, (None, 0.0))
+        # Random jitter spreads equally healthy proxies
+        candidates.sort(key=lambda proxy: proxy.health + random.random() * 0.1)
+        candidates.reverse()
+        if sticky in candidates and expires_at > now:
+            candidates.remove(sticky)
+            candidates.insert(0, sticky)
+
+        wait = None
+        for proxy in candidates:
+            if proxy.in_flight >= settings.PROXY_MAX_CONCURRENCY:
+                continue
+            retry_after = proxy.bucket.consume()
+            if retry_after == 0:
+                return proxy, None
+            wait = retry_after if wait is None else min(wait, retry_after)
+        return None, wait
+
+    async def _release(self, domain: str, proxy: Proxy, outcome: ProxyOutcome):
+        proxy.record(outcome)
+        EGRESS_REQUESTS.labels(proxy.name, outcome.value).inc()
+        if outcome == ProxyOutcome.OK:
+            self._sticky[domain] = (
+                proxy,
+                time.monotonic() + settings.PROXY_STICKY_SECONDS,
+            )
+        elif self._sticky.get(domain, (None,))[0] is proxy:
+            del self._sticky[domain]
+        async with self._changed:
+            proxy.in_flight -= 1
+            self._changed.notify_all()
+
+    def http_client(self, lease: ProxyLease) -> httpx.AsyncClient:
+        """Shared httpx client going out through the lease's proxy"""
+        key = lease.proxy.url if lease.proxy else None
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = httpx.AsyncClient(
+                proxies=key, timeout=settings.REQUEST_TIMEOUT
+            )
+        return client
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [proxy.status() for proxy in self.proxies]
+
+    async def close(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+
+egress_pool = EgressPool(settings.EGRESS_PROXIES)
@@ -0,0 +1,342 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic_core import to_json
+
+from ..core.config import settings
+from ..core.exceptions import (
+    FeatureUnavailableException,
+    InvalidCursorException,
+    InvalidFieldsException,
+)
+from ..repositories.news_repository import news_repository
+from ..repositories.offer_repository import offer_repository
+from ..repositories.product_repository import product_repository
+from ..schemas.export import ExportDataset, ExportFormat, ExportQuery
+from .news_compression import compressed_paths, inflate
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export needs the "parquet" extra
+    pa = None
+    pq = None
+
+# Exported column, its document path and value type
+Column = Tuple[str, str, str]
+
+COLUMNS: Dict[ExportDataset, List[Column]] = {
+    ExportDataset.NEWS: [
+        ("id", "_id", "string"),
+        ("url", "url", "string"),
+        ("source", "source", "string"),
+        ("cluster_id", "cluster_id", "string"),
+        ("title", "article_data.title", "string"),
+        ("published_at", "article_data.published_at", "timestamp"),
+        ("author", "article_data.author", "string"),
+        ("views", "article_data.views", "int"),
+        ("likes", "article_data.likes", "int"),
+        ("dislikes", "article_data.dislikes", "int"),
+        ("image_urls", "article_data.image_urls", "strings"),
+        ("video_url", "article_data.video_url", "string"),
+        ("content_body", "article_data.content_body", "string"),
+        ("comments", "article_data.comments", "strings"),
+        ("created_at", "created_at", "timestamp"),
+    ],
+    ExportDataset.PRODUCTS: [
+        ("id", "_id", "string"),
+        ("url", "url", "string"),
+        ("partial", "partial", "bool"),
+        ("offer_count", "summary.count", "int"),
+        ("shop_count", "summary.shop_count", "int"),
+        ("min_price", "summary.min_price", "float"),
+        ("median_price", "summary.median_price", "float"),
+        ("max_price", "summary.max_price", "float"),
+        ("offers", "offers", "json"),
+        ("created_at", "created_at", "timestamp"),
+        ("updated_at", "updated_at", "timestamp"),
+    ],
+    ExportDataset.OFFERS: [
+        ("id", "_id", "string"),
+        ("product_url", "product_url", "string"),
+        ("url", "url", "string"),
+        ("original_url", "original_url", "string"),
+        ("title", "title", "string"),
+        ("shop", "shop", "string"),
+        ("price", "price", "float"),
+        ("is_used", "is_used", "bool"),
+        ("updated_at", "updated_at", "timestamp"),
+    ],
+}
+
+# Document paths the url list and the since/until range filter on
+URL_PATHS = {
+    ExportDataset.NEWS: "url",
+    ExportDataset.PRODUCTS: "url",
+    ExportDataset.OFFERS: "product_url",
+}
+DATE_PATHS = {
+    ExportDataset.NEWS: "article_data.published_at",
+    ExportDataset.PRODUCTS: "updated_at",
+    ExportDataset.OFFERS: "updated_at",
+}
+
+
+def _lookup(document: Dict[str, Any], path: str) -> Any:
+    value: Any = document
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class NdjsonEncoder:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self, columns: List[Column]):
+        self.columns = columns
+
+    def begin(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        return b"".join(to_json(row) + b"\n" for row in rows)
+
+    def end(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    """Lists and objects are written as JSON, timestamps as ISO 8601"""
+
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, columns: List[Column]):
+        self.columns = columns
+
+    def _lines(self, rows: List[List[Any]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    @staticmethod
+    def _cell(value: Any) -> Any:
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False, default=str)
+        return value
+
+    def begin(self) -> bytes:
+        return self._lines([[name for name, _, _ in self.columns]])
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        return self._lines(
+            [[self._cell(row[name]) for name, _, _ in self.columns] for row in rows]
+        )
+
+    def end(self) -> bytes:
+        return b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what the Parquet writer produced since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """
+    One row group per batch, written out as soon as it is encoded
+
+    Only the footer with the row group offsets is kept until the end, so
+    memory doesn't grow with the export.
+    """
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, columns: List[Column]):
+        self.columns = columns
+        types = {
+            "string": pa.string(),
+            "timestamp": pa.timestamp("ms"),
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "bool": pa.bool_(),
+            "strings": pa.list_(pa.string()),
+            "json": pa.string(),
+        }
+        self.schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+        self._json = [name for name, _, kind in columns if kind == "json"]
+        self._sink = _ChunkSink()
+        self._writer = None
+
+    def begin(self) -> bytes:
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+        return self._sink.drain()
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        for row in rows:
+            for name in self._json:
+                if row[name] is not None:
+                    row[name] = json.dumps(row[name], ensure_ascii=False, default=str)
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+        return self._sink.drain()
+
+    def end(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+ENCODERS = {
+    ExportFormat.NDJSON: NdjsonEncoder,
+    ExportFormat.CSV: CsvEncoder,
+    ExportFormat.PARQUET: ParquetEncoder,
+}
+
+
+class ExportService:
+    """
+    Streams whole collections in _id order
+
+    Documents are read from one Motor cursor with EXPORT_BATCH_SIZE sized
+    batches and encoded a batch at a time, so memory stays constant however
+    large the export. Every row carries its `id`; passing the last one
+    received as `after` resumes an interrupted export where it stopped.
+    """
+
+    def _collection(self, dataset: ExportDataset) -> AsyncIOMotorCollection:
+        if dataset == ExportDataset.NEWS:
+            return news_repository.collection
+        if dataset == ExportDataset.PRODUCTS:
+            return product_repository.collection
+        return offer_repository.collection
+
+    def columns(
+        self, dataset: ExportDataset, names: Optional[List[str]] = None
+    ) -> List[Column]:
+        """Requested columns of a dataset, `id` first"""
+        available = {column[0]: column for column in COLUMNS[dataset]}
+        if not names:
+            return COLUMNS[dataset]
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise InvalidFieldsException(
+                f"Unknown {dataset.value} columns: {', '.join(unknown)}. "
+                f"Available: {', '.join(available)}"
+            )
+        return [available[name] for name in dict.fromkeys(["id", *names])]
+
+    def query(self, request: ExportQuery) -> Dict[str, Any]:
+        """Mongo filter of an export request"""
+        dataset = request.dataset
+        if request.source is not None and dataset != ExportDataset.NEWS:
+            raise InvalidFieldsException("Filter by source applies to news only")
+        if request.shop is not None and dataset != ExportDataset.OFFERS:
+            raise InvalidFieldsException("Filter by shop applies to offers only")
+
+        query: Dict[str, Any] = {}
+        if request.source is not None:
+            query["source"] = request.source
+        if request.shop is not None:
+            query["shop"] = request.shop
+        if request.urls:
+            query[URL_PATHS[dataset]] = {"$in": request.urls}
+        date_range = {}
+        if request.since is not None:
+            date_range["$gte"] = request.since
+        if request.until is not None:
+            date_range["$lt"] = request.until
+        if date_range:
+            query[DATE_PATHS[dataset]] = date_range
+        if request.after is not None:
+            if not ObjectId.is_valid(request.after):
+                raise InvalidCursorException("Invalid export resume id")
+            query["_id"] = {"$gt": ObjectId(request.after)}
+        return query
+
+    def encoder(self, request: ExportQuery):
+        """
+        Encoder of the request's format and columns
+
+        Validates the whole request, so that errors surface before the first
+        byte of a streamed response is sent.
+        """
+        if request.format == ExportFormat.PARQUET and pq is None:
+            raise FeatureUnavailableException(
+                "Parquet export needs pyarrow, install the parquet extra"
+            )
+        self.query(request)
+        return ENCODERS[request.format](self.columns(request.dataset, request.columns))
+
+    async def batches(
+        self, request: ExportQuery, columns: List[Column]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Rows of the export, EXPORT_BATCH_SIZE at a time"""
+        paths = [path for _, path, _ in columns]
+        if request.dataset == ExportDataset.NEWS:
+            # Excluding body and comments also skips their decompression
+            paths = compressed_paths(paths)
+        fields = {path: 1 for path in paths}
+
+        cursor = self._collection(request.dataset).find(
+            self.query(request),
+            fields,
+            sort=[("_id", 1)],
+            batch_size=settings.EXPORT_BATCH_SIZE,
+        )
+        rows: List[Dict[str, Any]] = []
+        async for document in cursor:
+            if request.dataset == ExportDataset.NEWS:
+                inflate(document)
+            row = {name: _lookup(document, path) for name, path, _ in columns}
+            row["id"] = str(document["_id"])
+            rows.append(row)
+            if len(rows) >= settings.EXPORT_BATCH_SIZE:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    async def stream(self, request: ExportQuery, encoder) -> AsyncIterator[bytes]:
+        """Encoded export, one chunk per batch"""
+        yield encoder.begin()
+        async for rows in self.batches(request, encoder.columns):
+            # Parquet and CSV encoding of a batch would block the event loop
+            yield await asyncio.to_thread(encoder.encode, rows)
+        yield encoder.end()
+
+
+export_service = ExportService()
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import re
+from enum import Enum
+from pathlib import Path
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Route
+
+from ..core.config import settings
+from ..core.exceptions import ParsingException
+from ..core.logger import log
+
+
+class HarMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"  # Load pages live and save every response to a HAR file
+    REPLAY = "replay"  # Serve pages from saved HAR files, no network
+
+
+class HarRecorder:
+    """
+    Per-URL HAR archives for deterministic browser runs
+
+    In record mode a context attached to a URL saves all its traffic to
+    `HAR_DIR/<url>.har` when it closes. In replay mode the same file answers
+    every request of the context and anything not recorded is aborted, so a
+    replayed parse never touches the network. `BROWSER_HAR_LATENCY_MS` delays
+    each replayed response to mimic a real connection.
+    """
+
+    def __init__(self, har_dir: str, mode: str, latency_ms: float):
+        self.har_dir = Path(har_dir)
+        self.mode = HarMode(mode)
+        self.latency_ms = latency_ms
+
+    def har_path(self, url: str) -> Path:
+        parsed = urlparse(url)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{parsed.netloc}{parsed.path}")
+        digest = hashlib.sha1(url.encode()).hexdigest()[:10]
+        return self.har_dir / f"{slug.strip('_')[:80]}_{digest}.har"
+
+    async def attach(self, context: BrowserContext, url: str):
+        """Route context traffic through the HAR file of `url` per current mode"""
+        if self.mode == HarMode.OFF:
+            return
+
+        path = self.har_path(url)
+        if self.mode == HarMode.RECORD:
+            self.har_dir.mkdir(parents=True, exist_ok=True)
+            await context.route_from_har(
+                path, update=True, update_content="embed", update_mode="full"
+            )
+            log.info(f"Recording HAR for {url} to {path}")
+            return
+
+        if not path.exists():
+            raise ParsingException(f"No HAR recording for {url}")
+        await context.route_from_har(path, not_found="abort")
+        if self.latency_ms > 0:
+            # Registered last so it runs first, then falls through to the HAR
+            await context.route("**/*", self._delay)
+
+    async def _delay(self, route: Route):
+        await asyncio.sleep(self.latency_ms / 1000)
+        await route.fallback()
+
+
+har_recorder = HarRecorder(
+    har_dir=settings.HAR_DIR,
+    mode=settings.BROWSER_HAR_MODE,
+    latency_ms=settings.BROWSER_HAR_LATENCY_MS,
+)
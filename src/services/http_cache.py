@@ -0,0 +1,103 @@
+import hashlib
+from collections import Counter
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from ..core.logger import log
+from ..core.metrics import HTTP_CACHE_BYTES_SAVED, HTTP_CACHE_RESPONSES
+from ..models.http_cache import HttpCacheEntry
+from ..repositories.http_cache_repository import http_cache_repository
+
+
+class HttpCacheResult(str, Enum):
+    CHANGED = "changed"
+    NOT_MODIFIED = "not_modified"
+    SAME_BODY = "same_body"
+
+
+class HttpCache:
+    """
+    Conditional GET validators for news feed pages and articles
+
+    Requests carry If-None-Match / If-Modified-Since from the last processed
+    response of the URL. A 304, or a 200 whose body hashes the same, means
+    the page needn't be parsed again. New validators are stored only once
+    the caller has processed the response (`commit`), so a failed parse gets
+    a full download next time.
+    """
+
+    def __init__(self):
+        self._cycle: Counter = Counter()
+        # Stats of the last finished scheduler cycle
+        self.last_cycle: Dict[str, int] = {}
+
+    async def request_headers(
+        self, url: str
+    ) -> Tuple[Optional[HttpCacheEntry], Dict[str, str]]:
+        """Stored validators of `url` and the conditional headers they give"""
+        entry = await http_cache_repository.get_entry(url)
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return entry, headers
+
+    def check(
+        self, url: str, response: httpx.Response, entry: Optional[HttpCacheEntry]
+    ) -> Tuple[HttpCacheResult, Optional[HttpCacheEntry]]:
+        """Classify response against stored validators, returns ones to commit"""
+        self._cycle["requests"] += 1
+        if response.status_code == 304 and entry:
+            result, validators = HttpCacheResult.NOT_MODIFIED, None
+            self._cycle["bytes_saved"] += entry.size
+            HTTP_CACHE_BYTES_SAVED.inc(entry.size)
+        elif response.status_code != 200:
+            return HttpCacheResult.CHANGED, None
+        else:
+            body = response.content
+            self._cycle["bytes_downloaded"] += len(body)
+            validators = HttpCacheEntry(
+                url=url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                body_hash=hashlib.sha256(body).hexdigest(),
+                size=len(body),
+            )
+            if entry and entry.body_hash == validators.body_hash:
+                # Server ignored the validators but nothing changed
+                result = HttpCacheResult.SAME_BODY
+            else:
+                result = HttpCacheResult.CHANGED
+
+        HTTP_CACHE_RESPONSES.labels(result.value).inc()
+        self._cycle[result.value] += 1
+        if result != HttpCacheResult.CHANGED:
+            self._cycle["skipped_parses"] += 1
+        return result, validators
+
+    async def commit(self, entries: Iterable[HttpCacheEntry]):
+        """Store validators of processed responses"""
+        now = datetime.utcnow()
+        entries = [
+            entry.model_copy(update={"checked_at": now, "updated_at": now})
+            for entry in entries
+        ]
+        await http_cache_repository.save_entries(entries)
+
+    def end_cycle(self) -> Dict[str, int]:
+        """Close the current stats period and return its numbers"""
+        self.last_cycle, self._cycle = dict(self._cycle), Counter()
+        if self.last_cycle:
+            log.info(
+                f"HTTP cache: {self.last_cycle.get('skipped_parses', 0)} of "
+                f"{self.last_cycle.get('requests', 0)} fetches unchanged, "
+                f"{self.last_cycle.get('bytes_saved', 0)} bytes saved"
+            )
+        return self.last_cycle
+
+
+http_cache = HttpCache()
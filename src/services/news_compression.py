@@ -0,0 +1,71 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+import zstandard
+from bson import Binary
+
+from ..core.config import settings
+
+# Article fields stored zstd-compressed under the document's "compressed" key
+COMPRESSED_FIELDS = ("content_body", "comments")
+
+# Used from the event loop thread only, zstd contexts aren't thread safe
+_compressor = zstandard.ZstdCompressor(level=settings.NEWS_COMPRESSION_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def _encode(field: str, value: Any) -> bytes:
+    if field == "content_body":
+        return value.encode()
+    return json.dumps(value, ensure_ascii=False).encode()
+
+
+def _decode(field: str, data: bytes) -> Any:
+    if field == "content_body":
+        return data.decode()
+    return json.loads(data)
+
+
+def compress_article(article_data: Dict[str, Any]) -> Tuple[Dict[str, Any], dict]:
+    """
+    Article data without its large fields, and those fields compressed
+
+    Fields shorter than NEWS_COMPRESS_MIN_BYTES stay plain text, they gain
+    little and would still cost a decompression on every read.
+    """
+    plain = dict(article_data)
+    compressed = {}
+    for field in COMPRESSED_FIELDS:
+        if field == "comments" and not settings.NEWS_COMPRESS_COMMENTS:
+            continue
+        if not plain.get(field):
+            continue
+        raw = _encode(field, plain[field])
+        if len(raw) < settings.NEWS_COMPRESS_MIN_BYTES:
+            continue
+        compressed[field] = Binary(_compressor.compress(raw))
+        del plain[field]
+    return plain, compressed
+
+
+def inflate(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Put compressed fields of a stored news document back into article_data"""
+    compressed = document.pop("compressed", None)
+    if compressed:
+        article_data = document.setdefault("article_data", {})
+        for field, data in compressed.items():
+            article_data[field] = _decode(field, _decompressor.decompress(data))
+    return document
+
+
+def compressed_paths(paths: List[str]) -> List[str]:
+    """Paths of a projection with the compressed copies of article fields"""
+    extra = []
+    for path in paths:
+        if path == "article_data":
+            extra.append("compressed")
+        elif path.startswith("article_data."):
+            field = path.split(".", 1)[1]
+            if field in COMPRESSED_FIELDS:
+                extra.append(f"compressed.{field}")
+    return paths + extra
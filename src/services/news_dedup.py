@@ -0,0 +1,140 @@
+import hashlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .news_search import tokenize
+
+# Words per shingle, the set elements whose Jaccard similarity is estimated
+SHINGLE_SIZE = 3
+# MinHash permutations, cut into LSH bands of BAND_ROWS rows. Articles with
+# shingle similarity s share a band with probability 1 - (1 - s^3)^24:
+# 0.96 at s=0.5, 0.8 at s=0.4, 0.003 at s=0.05
+PERMUTATIONS = 72
+BAND_ROWS = 3
+BAND_COUNT = PERMUTATIONS // BAND_ROWS
+
+# Odd 64-bit constants mixing the word hashes of a shingle into one hash
+SHINGLE_MULTIPLIERS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64
+)
+# Multiply-shift hash functions standing in for random permutations, fixed
+# so that signatures stay comparable across processes and releases
+_coefficients = np.random.default_rng(20240601).integers(
+    1, 2**63, size=(2, PERMUTATIONS), dtype=np.uint64
+)
+PERMUTATION_A = _coefficients[0] | np.uint64(1)
+PERMUTATION_B = _coefficients[1]
+
+
+def _word_hash(word: str) -> int:
+    # Stable across processes, unlike hash()
+    digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def minhash_signatures(texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+    """
+    MinHash signature (PERMUTATIONS uint32 values) of each text
+
+    Texts are reduced to overlapping shingles of SHINGLE_SIZE stemmed words.
+    Every distinct word is hashed once per batch, shingle hashes and their
+    minimum under every permutation are computed for the whole batch in a
+    few numpy operations. None for texts without words.
+    """
+    vocabulary: Dict[str, int] = {}
+    documents = [
+        np.array(
+            [vocabulary.setdefault(word, len(vocabulary)) for word in tokenize(text)],
+            dtype=np.int64,
+        )
+        for text in texts
+    ]
+    word_hashes = np.fromiter(
+        (_word_hash(word) for word in vocabulary), np.uint64, len(vocabulary)
+    )
+
+    shingles = []
+    for words in documents:
+        if not len(words):
+            continue
+        size = min(SHINGLE_SIZE, len(words))
+        hashes = word_hashes[sliding_window_view(words, size)]
+        shingles.append(
+            np.unique(
+                np.bitwise_xor.reduce(hashes * SHINGLE_MULTIPLIERS[:size], axis=1)
+            )
+        )
+    if not shingles:
+        return [None] * len(texts)
+
+    offsets = np.cumsum([0] + [len(s) for s in shingles[:-1]])
+    # High 32 bits of a*x+b mod 2^64 for every shingle and permutation
+    permuted = (
+        np.concatenate(shingles)[:, None] * PERMUTATION_A + PERMUTATION_B
+    ) >> np.uint64(32)
+    minimums = np.minimum.reduceat(permuted, offsets, axis=0).astype(np.uint32)
+
+    computed = iter(minimums)
+    return [next(computed) if len(words) else None for words in documents]
+
+
+def lsh_bands(signature: np.ndarray) -> List[int]:
+    """
+    Locality-sensitive band keys of a signature
+
+    Keys fit in int64 and carry the band number in the high bits, so equal
+    rows in different bands don't collide.
+    """
+    return [
+        (band << 48)
+        | int.from_bytes(
+            hashlib.blake2b(
+                signature[band * BAND_ROWS : (band + 1) * BAND_ROWS].tobytes(),
+                digest_size=6,
+            ).digest(),
+            "little",
+        )
+        for band in range(BAND_COUNT)
+    ]
+
+
+def decode_signature(data: bytes) -> np.ndarray:
+    """Signature from its stored bytes"""
+    return np.frombuffer(data, dtype=np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return float(np.count_nonzero(a == b)) / PERMUTATIONS
+
+
+class MinHashIndex:
+    """Story clusters of signatures, looked up through their LSH bands"""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._bands: Dict[int, List[Tuple[np.ndarray, str]]] = defaultdict(list)
+
+    def add(
+        self,
+        signature: np.ndarray,
+        cluster_id: str,
+        bands: Optional[List[int]] = None,
+    ):
+        for band in bands or lsh_bands(signature):
+            self._bands[band].append((signature, cluster_id))
+
+    def nearest(
+        self, signature: np.ndarray, bands: Optional[List[int]] = None
+    ) -> Optional[Tuple[str, float]]:
+        """Cluster and similarity of the most similar signature above threshold"""
+        best: Optional[Tuple[str, float]] = None
+        for band in bands or lsh_bands(signature):
+            for candidate, cluster_id in self._bands.get(band, ()):
+                score = similarity(signature, candidate)
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (cluster_id, score)
+        return best
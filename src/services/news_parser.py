@@ -1,13 +1,30 @@
+import asyncio
+import copy
 import json
 import os
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
 import httpx
+import lxml.html
+from lxml import etree
 
-from ..core.exceptions import ParsingException, TimeoutException
-from ..schemas.news import ArticleDataSchema, ClientType, NewsItemSchema
+from ..core.config import settings
+from ..core.exceptions import BlockedException, ParsingException
+from ..core.logger import log
+from ..models.crawl_state import CrawlState
+from ..models.http_cache import HttpCacheEntry
+from ..repositories.news_repository import news_repository
+from ..schemas.news import (
+    ArticleDataSchema,
+    ClientType,
+    FeedEntrySchema,
+    NewsItemSchema,
+)
+from .egress_pool import BLOCK_STATUSES, ProxyOutcome, egress_pool
+from .http_cache import HttpCacheResult, http_cache
 
 
 class BaseNewsParser:
@@ -15,6 +32,10 @@ class BaseNewsParser:
         # Initialize HTTP client with timeout
         self.client = httpx.AsyncClient(timeout=30)
         self.mock_data = self._load_mock_data()
+        # Feed entries whose article failed in the last parse_news call
+        self.failed_entries: List[FeedEntrySchema] = []
+        # Validators of responses fetched during parse_news, see cache_validators
+        self._http_validators: List[HttpCacheEntry] = []
 
     def _load_mock_data(self) -> dict:
         """Load mock data from JSON file"""
@@ -27,7 +48,7 @@ class BaseNewsParser:
         except FileNotFoundError:
             return {}
         except Exception as e:
-            print(f"Error loading mock data: {e}")
+            log.error(f"Error loading mock data: {e}")
             return {}
 
     def _create_news_objects_from_json(
@@ -56,53 +77,327 @@ class BaseNewsParser:
                 )
                 news_items.append(news_item)
             except Exception as e:
-                print(f"Error creating news object: {e}")
+                log.warning(f"Error creating news object: {e}")
                 continue
 
         return news_items
 
     async def parse_news(
-        self, url: str, until_date: datetime, client: ClientType = ClientType.HTTP
+        self,
+        url: str,
+        until_date: datetime,
+        client: ClientType = ClientType.HTTP,
+        since: Optional[CrawlState] = None,
     ) -> List[NewsItemSchema]:
-        # Method should be implemented by child classes
-        raise NotImplementedError
+        """
+        Parse articles of the feed at `url` that are not stored yet
+
+        Feed pages are read newest first and paging stops at the first entry
+        older than `until_date` or than the feed's high-water mark `since`,
+        so a cycle costs about as much as there are new items. Only URLs
+        missing from the DB get their article fetched, at most
+        NEWS_ARTICLE_CONCURRENCY at a time.
+        """
+        self._http_validators = []
+        entries = await self._collect_new_entries(url, until_date, client, since)
+        stored = await news_repository.existing_urls(entry.url for entry in entries)
+        entries = [entry for entry in entries if entry.url not in stored]
+
+        semaphore = asyncio.Semaphore(settings.NEWS_ARTICLE_CONCURRENCY)
+        self.failed_entries = []
+
+        async def parse(entry: FeedEntrySchema) -> Optional[NewsItemSchema]:
+            async with semaphore:
+                try:
+                    article = await self._parse_article(entry.url, client)
+                except BlockedException:
+                    raise
+                except Exception as e:
+                    log.warning(f"Failed to parse article {entry.url}: {str(e)}")
+                    self.failed_entries.append(entry)
+                    return None
+            return NewsItemSchema(url=entry.url, article_data=article)
+
+        news_items = [
+            item
+            for item in await asyncio.gather(*(parse(entry) for entry in entries))
+            if item
+        ]
+        if entries and not news_items:
+            raise ParsingException(f"Failed to parse any new article from {url}")
+
+        log.info(
+            f"Crawled {url}: {len(news_items)} new, {len(stored)} already stored, "
+            f"{len(self.failed_entries)} failed"
+        )
+        return news_items
+
+    async def _collect_new_entries(
+        self,
+        url: str,
+        until_date: datetime,
+        client: ClientType,
+        since: Optional[CrawlState],
+    ) -> List[FeedEntrySchema]:
+        """Page through the feed until entries are old or already ingested"""
+        entries = []
+        for page in range(settings.NEWS_MAX_FEED_PAGES):
+            page_entries = await self._fetch_feed_page(url, page, client)
+            if not page_entries:
+                break
+            for entry in page_entries:
+                if entry.published_at < until_date:
+                    return entries
+                if since and (
+                    entry.published_at < since.last_published_at
+                    or entry.url == since.last_url
+                ):
+                    return entries
+                entries.append(entry)
+        return entries
+
+    def cache_validators(self) -> List[HttpCacheEntry]:
+        """
+        Validators of the last parse_news call, to store once its items are saved
+
+        Stored earlier, a failed save would leave the pages marked as seen
+        and the next crawl would skip them. None after a partial crawl, so
+        the failed articles are fetched again.
+        """
+        return [] if self.failed_entries else list(self._http_validators)
+
+    def crawl_mark(self, news_items: List[NewsItemSchema]) -> Optional[NewsItemSchema]:
+        """
+        Newest parsed item the feed's high-water mark can move to
+
+        The mark stays at or below the oldest failed article, so the next
+        crawl pages back far enough to retry it.
+        """
+        limit = min((entry.published_at for entry in self.failed_entries), default=None)
+        candidates = [
+            item
+            for item in news_items
+            if limit is None or item.article_data.published_at <= limit
+        ]
+        return max(
+            candidates, key=lambda item: item.article_data.published_at, default=None
+        )
+
+    async def _fetch_feed_page(
+        self, url: str, page: int, client: ClientType
+    ) -> List[FeedEntrySchema]:
+        """
+        Entries on feed page `page` (0 is the newest), empty past the end
+
+        Pages are conditional GETs: a page unchanged since the last
+        successful crawl gives no entries without being parsed, which also
+        ends paging.
+        """
+        page_url = self._feed_page_url(url, page)
+        if page_url is None:
+            return []
+        response = await self._fetch_if_changed(page_url)
+        if response is None:
+            return []
+        if response.status_code != 200:
+            raise ParsingException(
+                f"Feed page {page_url} returned {response.status_code}"
+            )
+        return self._parse_feed_page(page_url, response.text)
 
     async def _parse_article(
         self, article_url: str, client: ClientType
     ) -> ArticleDataSchema:
+        """Fetch and parse an article over HTTP"""
+        response = await self._fetch_if_changed(article_url)
+        if response is None:
+            # Processed before, yet not stored any more: parse it again
+            response = await self._fetch(article_url)
+        if response.status_code != 200:
+            raise ParsingException(
+                f"Article {article_url} returned {response.status_code}"
+            )
+        return self._parse_article_page(article_url, response.text)
+
+    def _feed_page_url(self, url: str, page: int) -> Optional[str]:
+        """URL of feed page `page`, None if the feed has no such page"""
         # Method should be implemented by child classes
         raise NotImplementedError
 
+    def _parse_feed_page(self, page_url: str, text: str) -> List[FeedEntrySchema]:
+        # Method should be implemented by child classes
+        raise NotImplementedError
+
+    def _parse_article_page(self, article_url: str, text: str) -> ArticleDataSchema:
+        # Method should be implemented by child classes
+        raise NotImplementedError
+
+    async def _fetch(self, url: str, **kwargs) -> httpx.Response:
+        """GET through the egress pool, blocked answers raise BlockedException"""
+        if not egress_pool.enabled:
+            return await self.client.get(url, **kwargs)
+
+        async with egress_pool.lease(url) as lease:
+            response = await egress_pool.http_client(lease).get(url, **kwargs)
+            if response.status_code in BLOCK_STATUSES:
+                lease.report(ProxyOutcome.BLOCKED)
+                raise BlockedException(
+                    f"Blocked by {urlparse(url).netloc} ({response.status_code})"
+                )
+            return response
+
+    async def _fetch_if_changed(self, url: str, **kwargs) -> Optional[httpx.Response]:
+        """Conditional GET, None when the page is unchanged since last processed"""
+        entry, headers = await http_cache.request_headers(url)
+        response = await self._fetch(
+            url, headers={**kwargs.pop("headers", {}), **headers}, **kwargs
+        )
+        result, validators = http_cache.check(url, response, entry)
+        if validators:
+            self._http_validators.append(validators)
+        return response if result == HttpCacheResult.CHANGED else None
+
     async def close(self):
         # Close HTTP client connection
         await self.client.aclose()
 
 
-class EpravdaParser(BaseNewsParser):
-    async def parse_news(
-        self, url: str, until_date: datetime, client: ClientType = ClientType.HTTP
-    ) -> List[NewsItemSchema]:
-        # Return mock data for epravda.com.ua
-        mock_news = self.mock_data.get("epravda", [])
-        return self._create_news_objects_from_json(mock_news)
+def _naive_utc(value: datetime) -> datetime:
+    """Stored dates are naive UTC"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
-class PolitekaParser(BaseNewsParser):
-    async def parse_news(
-        self, url: str, until_date: datetime, client: ClientType = ClientType.HTTP
-    ) -> List[NewsItemSchema]:
-        # Return mock data for politeka.net
-        mock_news = self.mock_data.get("politeka", [])
-        return self._create_news_objects_from_json(mock_news)
+class RssNewsParser(BaseNewsParser):
+    """
+    Reads a source's RSS 2.0 feed and its article pages over HTTP
 
+    The feed has a single page. Articles are read from their Open Graph and
+    `article:` meta tags and the paragraphs of the page's <article> element
+    (or of the whole body); the feed's pubDate stands in for a missing
+    published time.
+    """
 
-class PravdaParser(BaseNewsParser):
-    async def parse_news(
-        self, url: str, until_date: datetime, client: ClientType = ClientType.HTTP
-    ) -> List[NewsItemSchema]:
-        # Return mock data for pravda.com.ua
-        mock_news = self.mock_data.get("pravda", [])
-        return self._create_news_objects_from_json(mock_news)
+    def __init__(self):
+        super().__init__()
+        self._feed_dates: Dict[str, datetime] = {}
+
+    def _feed_page_url(self, url: str, page: int) -> Optional[str]:
+        return url if page == 0 else None
+
+    def _parse_feed_page(self, page_url: str, text: str) -> List[FeedEntrySchema]:
+        try:
+            root = etree.fromstring(text.encode())
+        except etree.XMLSyntaxError as e:
+            raise ParsingException(f"Invalid RSS feed {page_url}: {str(e)}")
+        entries = []
+        for item in root.iter("item"):
+            link = (item.findtext("link") or "").strip()
+            published = item.findtext("pubDate")
+            if not link or not published:
+                continue
+            try:
+                published_at = _naive_utc(parsedate_to_datetime(published.strip()))
+            except (TypeError, ValueError):
+                continue
+            self._feed_dates[link] = published_at
+            entries.append(FeedEntrySchema(url=link, published_at=published_at))
+        # Paging stops at the first old entry, so newest first
+        entries.sort(key=lambda entry: entry.published_at, reverse=True)
+        return entries
+
+    def _parse_article_page(self, article_url: str, text: str) -> ArticleDataSchema:
+        root = lxml.html.fromstring(text)
+
+        def meta(name: str) -> Optional[str]:
+            values = root.xpath(
+                "//meta[@property=$name or @name=$name]/@content", name=name
+            )
+            return values[0].strip() if values and values[0].strip() else None
+
+        title = meta("og:title") or (root.findtext(".//title") or "").strip()
+        container = (root.xpath("//article") or [root])[0]
+        paragraphs = [
+            paragraph.text_content().strip() for paragraph in container.iter("p")
+        ]
+        content_body = "\n".join(paragraph for paragraph in paragraphs if paragraph)
+        if not title or not content_body:
+            raise ParsingException(f"No article content in {article_url}")
+
+        published_at = self._feed_dates.get(article_url)
+        if meta("article:published_time"):
+            published_at = _naive_utc(
+                datetime.fromisoformat(
+                    meta("article:published_time").replace("Z", "+00:00")
+                )
+            )
+        if published_at is None:
+            raise ParsingException(f"No publication time in {article_url}")
+
+        image_urls = [meta("og:image")] if meta("og:image") else []
+        image_urls += [
+            src for src in container.xpath(".//img/@src") if src not in image_urls
+        ]
+        return ArticleDataSchema(
+            title=title,
+            content_body=content_body,
+            image_urls=image_urls,
+            published_at=published_at,
+            author=meta("article:author") or meta("author"),
+        )
+
+
+class MockNewsParser(BaseNewsParser):
+    """Serves a source's feed and articles from mock_data/news_mock_data.json"""
+
+    mock_key: str = ""
+    page_size: int = 20
+
+    def _mock_items(self) -> List[dict]:
+        items = self.mock_data.get(self.mock_key, [])
+        return sorted(
+            items,
+            key=lambda item: item["article_data"]["published_at"],
+            reverse=True,
+        )
+
+    async def _fetch_feed_page(
+        self, url: str, page: int, client: ClientType
+    ) -> List[FeedEntrySchema]:
+        start = page * self.page_size
+        return [
+            FeedEntrySchema(
+                url=item["url"],
+                published_at=datetime.fromisoformat(
+                    item["article_data"]["published_at"].replace("Z", "+00:00")
+                ),
+            )
+            for item in self._mock_items()[start : start + self.page_size]
+        ]
+
+    async def _parse_article(
+        self, article_url: str, client: ClientType
+    ) -> ArticleDataSchema:
+        for item in self._mock_items():
+            if item["url"] == article_url:
+                # Conversion rewrites dates in place, keep the mock data intact
+                news = self._create_news_objects_from_json([copy.deepcopy(item)])
+                if news:
+                    return news[0].article_data
+        raise ParsingException(f"Article not found: {article_url}")
+
+
+class EpravdaParser(MockNewsParser):
+    mock_key = "epravda"
+
+
+class PolitekaParser(MockNewsParser):
+    mock_key = "politeka"
+
+
+class PravdaParser(MockNewsParser):
+    mock_key = "pravda"
 
 
 class NewsParserFactory:
@@ -111,6 +406,12 @@ class NewsParserFactory:
         # Factory method to get appropriate parser based on URL domain
         domain = urlparse(url).netloc.lower()
 
+        if not settings.NEWS_MOCK_DATA and any(
+            source in domain
+            for source in ("epravda.com.ua", "politeka.net", "pravda.com.ua")
+        ):
+            # Tracked URL is the source's RSS feed
+            return RssNewsParser()
         if "epravda.com.ua" in domain:
             return EpravdaParser()
         elif "politeka.net" in domain:
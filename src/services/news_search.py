@@ -0,0 +1,56 @@
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+# MongoDB's text index has no Ukrainian stemmer, so stored articles and
+# queries are reduced to the same stems here and indexed with language "none"
+WORD = re.compile(r"\w+")
+# Apostrophe variants inside words (м'ясо, пам’ять) and the Ukrainian ґ,
+# often typed as г
+CHARACTER_MAP = str.maketrans({"'": "", "’": "", "ʼ": "", "`": "", "ґ": "г"})
+
+REFLEXIVE_ENDINGS = ("ся", "сь")
+# Inflection endings of adjectives, nouns and verbs
+ENDINGS = frozenset(
+    (
+        "ого ому ими іми ий ій ої ою ім им их іх ая яя ее ує ає "
+        "ами ями ах ях ам ям ові еві єві ів їв ей ом ем єм ею єю "
+        "ю у а я о е є і и ї ь й "
+        "ати яти ити іти ути ти ть ла ло ли ав ив ймо емо ємо имо "
+        "іть ете ите"
+    ).split()
+)
+# Longest ending wins
+ENDING_LENGTHS = sorted({len(ending) for ending in ENDINGS}, reverse=True)
+MIN_STEM = 3
+
+
+@lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    """Strip one inflection ending, keeping at least MIN_STEM letters"""
+    for ending in REFLEXIVE_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            word = word[: -len(ending)]
+            break
+    for length in ENDING_LENGTHS:
+        if len(word) - length >= MIN_STEM and word[-length:] in ENDINGS:
+            return word[:-length]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word stems of text"""
+    return [stem(word) for word in WORD.findall(text.lower().translate(CHARACTER_MAP))]
+
+
+def search_text(text: str) -> str:
+    """Text as it is stored in, and matched against, the search index"""
+    return " ".join(tokenize(text))
+
+
+def search_fields(article_data: dict) -> Dict[str, str]:
+    """Normalized copies of an article's searchable fields"""
+    return {
+        "title": search_text(article_data.get("title") or ""),
+        "body": search_text(article_data.get("content_body") or ""),
+    }
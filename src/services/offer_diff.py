@@ -0,0 +1,37 @@
+from typing import Any, Dict, List
+
+
+def offer_key(offer: Dict[str, Any]) -> str:
+    """Stable identity of an offer across parses"""
+    return offer.get("url") or f"{offer.get('shop', '')}|{offer.get('title', '')}"
+
+
+def diff_offers(
+    old_offers: List[Dict[str, Any]], new_offers: List[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Compare two offer lists
+
+    Returns added and removed offers plus offers whose price or condition
+    changed, the latter with `old_price` next to the new values.
+    """
+    old_by_key = {offer_key(offer): offer for offer in old_offers}
+    new_by_key = {offer_key(offer): offer for offer in new_offers}
+
+    added = [offer for key, offer in new_by_key.items() if key not in old_by_key]
+    removed = [offer for key, offer in old_by_key.items() if key not in new_by_key]
+    changed = []
+    for key, offer in new_by_key.items():
+        old = old_by_key.get(key)
+        if old is None:
+            continue
+        if old.get("price") != offer.get("price") or old.get("is_used") != offer.get(
+            "is_used"
+        ):
+            changed.append({**offer, "old_price": old.get("price")})
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def has_changes(diff: Dict[str, List[Dict[str, Any]]]) -> bool:
+    return any(diff.values())
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Tukey fences: prices further than this many IQRs outside Q1..Q3 are outliers
+OUTLIER_IQR_FACTOR = 1.5
+
+
+def summarize_offers(offers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Price statistics of a product's offers
+
+    Computed over the offers' price array in one pass of numpy operations.
+    Offers without a parsed price (0) count towards `count` only.
+    """
+    prices = np.fromiter((offer["price"] for offer in offers), float, len(offers))
+    used = np.fromiter((offer["is_used"] for offer in offers), bool, len(offers))
+    priced = prices > 0
+
+    summary: Dict[str, Any] = {
+        "count": len(offers),
+        "priced_count": int(priced.sum()),
+        "shop_count": len({offer["shop"] for offer in offers}),
+        "min_price": None,
+        "max_price": None,
+        "median_price": None,
+        "p10_price": None,
+        "p90_price": None,
+        "cheapest_new": _cheapest(offers, prices, priced & ~used),
+        "cheapest_used": _cheapest(offers, prices, priced & used),
+        "outliers": [],
+    }
+    if not priced.any():
+        return summary
+
+    values = prices[priced]
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    summary.update(
+        min_price=float(values.min()),
+        max_price=float(values.max()),
+        median_price=float(median),
+        p10_price=float(p10),
+        p90_price=float(p90),
+    )
+
+    # Used offers are expected to be cheaper, fence each condition separately
+    low = np.zeros(len(offers), bool)
+    high = np.zeros(len(offers), bool)
+    for group in (priced & ~used, priced & used):
+        if not group.any():
+            continue
+        q1, q3 = np.percentile(prices[group], [25, 75])
+        spread = OUTLIER_IQR_FACTOR * (q3 - q1)
+        low |= group & (prices < q1 - spread)
+        high |= group & (prices > q3 + spread)
+    summary["outliers"] = [
+        {
+            "url": offers[i]["url"],
+            "shop": offers[i]["shop"],
+            "price": float(prices[i]),
+            "side": "low" if low[i] else "high",
+        }
+        for i in np.flatnonzero(low | high)
+    ]
+    return summary
+
+
+def _cheapest(
+    offers: List[Dict[str, Any]], prices: np.ndarray, mask: np.ndarray
+) -> Optional[Dict[str, Any]]:
+    if not mask.any():
+        return None
+    return offers[int(np.flatnonzero(mask)[prices[mask].argmin()])]
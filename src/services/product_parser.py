@@ -3,22 +3,33 @@ import json
 import os
 import re
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Set
 
 import lxml.html
 from bs4 import BeautifulSoup
+from fastapi import HTTPException, status
 from lxml import etree
-
-from ..core.exceptions import ParsingException, TimeoutException
-from ..core.logger import log
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from ..core.circuit_breaker import circuit_breakers
+from ..core.config import settings
+from ..core.deadline import Deadline
+from ..core.exceptions import BlockedException, ParsingException, TimeoutException
+from ..core.logger import log, log_sampler
+from ..core.metrics import observe_phase
 from ..repositories.product_repository import product_repository
 from ..schemas.product import OfferSchema, ProductResponse
+from .browser_cache import asset_cache, storage_state_store
 from .browser_client import browser_client
+from .egress_pool import BLOCK_STATUSES, ProxyOutcome, egress_pool
+from .har_recorder import har_recorder
 
 
 class HotlineProductParser:
     def __init__(self):
         self.mock_data = self._load_mock_data()
+        # Keeps background saves referenced until they finish
+        self._background_tasks: Set[asyncio.Task] = set()
 
     def _load_mock_data(self) -> dict:
         """Load mock data from JSON file"""
@@ -29,7 +40,7 @@ class HotlineProductParser:
         except FileNotFoundError:
             return {}
         except Exception as e:
-            print(f"Error loading mock data: {e}")
+            log.error(f"Error loading mock data: {e}")
             return {}
 
     def _create_product_objects_from_json(
@@ -61,7 +72,7 @@ class HotlineProductParser:
                 )
                 products.append(product)
             except Exception as e:
-                print(f"Error creating product object: {e}")
+                log.warning(f"Error creating product object: {e}")
                 continue
 
         return products
@@ -72,11 +83,46 @@ class HotlineProductParser:
         timeout_limit: Optional[int] = None,
         count_limit: Optional[int] = None,
         price_sort: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> ProductResponse:
+        """
+        Parse product through its domain's circuit breaker
 
-        async def start_loading_page():
-            await page.goto(url, wait_until="load")
+        Failed parses are retried with backoff within the deadline (from
+        `timeout_limit` unless given). Raises CircuitOpenException right away
+        while the domain's breaker is open.
+        """
+        deadline = deadline or Deadline(timeout_limit)
+        return await circuit_breakers.call(
+            url,
+            lambda: self._parse_page(url, count_limit, price_sort, deadline),
+            deadline=deadline,
+        )
+
+    async def _parse_page(
+        self,
+        url: str,
+        count_limit: Optional[int],
+        price_sort: Optional[str],
+        deadline: Deadline,
+    ) -> ProductResponse:
+        """
+        Load product page and extract its offers within the request deadline
+
+        The deadline bounds browser acquisition, navigation, scrolling and
+        extraction. Loading stops early enough to extract what is already on
+        the page; such results are returned with `partial=True`, and the DB
+        write then runs in the background so it doesn't delay the response.
+        A page that didn't load raises TimeoutException or ParsingException
+        and nothing is saved, so the breaker sees the failure and stored
+        offers aren't replaced by an empty list.
+        """
+        # Time kept back for content extraction and parsing
+        reserve = deadline.reserve(settings.PARSE_DEADLINE_RESERVE_SECONDS)
+        partial = False
 
+        async def scroll_to_bottom() -> bool:
+            """Scroll until the page stops growing, False if cut by the deadline"""
             # Get initial page height
             total_height = await page.evaluate("document.body.scrollHeight")
             current_position = 0
@@ -85,6 +131,9 @@ class HotlineProductParser:
             )  # Scroll by one viewport height
 
             while current_position < total_height:
+                if deadline.expired(reserve):
+                    return False
+
                 # Scroll by one viewport height
                 current_position += scroll_step
                 await page.evaluate(f"window.scrollTo(0, {current_position})")
@@ -100,6 +149,7 @@ class HotlineProductParser:
                 # Stop if we reached the bottom
                 if current_position >= total_height:
                     break
+            return True
 
         try:
             log.info(f"Starting product parsing: {url}")
@@ -120,38 +170,99 @@ class HotlineProductParser:
             #         return product
 
             offers = []
-            async with browser_client.start_context_manager() as browser:
-                context = await browser.new_context()
-                page = await context.new_page()
-                try:
-                    if timeout_limit:
-                        async with asyncio.timeout(timeout_limit):
-                            await start_loading_page()
-                    else:
-                        await start_loading_page()
-
-                except Exception as e:
-                    log.error(f"Error getting page content: {e}")
-                finally:
-                    # Get page content
-                    page_content = await page.content()
-                    offers = await self._parse_offers(page_content)
-                    await context.close()
+            async with egress_pool.lease(url, deadline) as lease:
+                async with browser_client.new_context(
+                    deadline=deadline,
+                    **storage_state_store.context_options(url),
+                    **lease.context_options(),
+                ) as context:
+                    await har_recorder.attach(context, url)
+                    await asset_cache.attach(context)
+                    page = await context.new_page()
+                    loaded = False
+                    try:
+                        with observe_phase("goto"):
+                            response = await page.goto(
+                                url,
+                                wait_until="load",
+                                timeout=deadline.timeout_ms(reserve),
+                            )
+                        if response is not None and response.status in BLOCK_STATUSES:
+                            lease.report(ProxyOutcome.BLOCKED)
+                            raise BlockedException(
+                                f"Blocked by target ({response.status})"
+                            )
+                        if response is not None and response.status in (404, 410):
+                            raise HTTPException(
+                                status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Product page not found",
+                            )
+                        if response is not None and response.status >= 400:
+                            raise ParsingException(
+                                f"Product page returned {response.status}"
+                            )
+                        loaded = True
+                        with observe_phase("scroll"):
+                            async with deadline.timeout(reserve):
+                                partial = not await scroll_to_bottom()
+                        await storage_state_store.save(context, url)
+
+                    except HTTPException:
+                        raise
+                    except (asyncio.TimeoutError, PlaywrightTimeoutError):
+                        if not loaded:
+                            lease.report(ProxyOutcome.TIMEOUT)
+                            raise TimeoutException("Product page didn't load in time")
+                        partial = True
+                    except Exception as e:
+                        if not loaded:
+                            lease.report(ProxyOutcome.ERROR)
+                            raise ParsingException(
+                                f"Failed to load product page: {str(e)}"
+                            )
+                        # Offers loaded so far are extracted, but may be incomplete
+                        partial = True
+                        log.error(f"Error scrolling product page {url}: {e}")
 
-            # Apply sorting
+                    if partial:
+                        log.warning(f"Deadline close, extracting loaded offers: {url}")
+                    # Get page content
+                    with observe_phase("content"):
+                        async with deadline.timeout():
+                            page_content = await page.content()
+                    with observe_phase("parse_offers"):
+                        offers = await self._parse_offers(page_content)
+
+            offers_found = len(offers)
+            result = ProductResponse(
+                url=url, offers=offers, partial=partial, offers_found=offers_found
+            )
+            # Every offer is stored, sorting and the count limit shape the
+            # response only
+            if partial or deadline.expired(reserve):
+                self._save_in_background(result)
+            else:
+                await self._save(result)
+
+            response_offers = list(offers)
             if price_sort:
                 reverse = price_sort.lower() == "desc"
-                offers.sort(key=lambda x: x.price, reverse=reverse)
-
-            # Apply count limit
+                response_offers.sort(key=lambda x: x.price, reverse=reverse)
             if count_limit:
-                offers = offers[:count_limit]
-
-            result = ProductResponse(url=url, offers=offers)
-            await product_repository.save_or_update_product(result)
-            log.success(f"Product parsed successfully: {url}, offers: {len(offers)}")
-            return result
-
+                response_offers = response_offers[:count_limit]
+
+            log.success(
+                f"Product parsed {'partially' if partial else 'successfully'}: "
+                f"{url}, offers: {offers_found}"
+            )
+            return result.model_copy(update={"offers": response_offers})
+
+        except BlockedException as e:
+            log.error(f"Product page blocked: {url}: {e.detail}")
+            raise
+        except HTTPException as e:
+            log.error(f"Failed to parse product {url}: {e.detail}")
+            raise
         except asyncio.TimeoutError:
             log.error(f"Product parsing timeout: {url}")
             raise TimeoutException("Product parsing timeout")
@@ -159,8 +270,24 @@ class HotlineProductParser:
             log.error(f"Failed to parse product {url}: {str(e)}")
             raise ParsingException(f"Failed to parse product: {str(e)}")
 
-    async def _parse_offers(self, page_content: str) -> List[OfferSchema]:
+    async def _save(self, product: ProductResponse):
+        with observe_phase("db_write"):
+            await product_repository.save_or_update_product(product)
+
+    def _save_in_background(self, product: ProductResponse):
+        """Persist parse result without making the caller wait for it"""
 
+        async def save():
+            try:
+                await self._save(product)
+            except Exception as e:
+                log.error(f"Failed to save product {product.url}: {str(e)}")
+
+        task = asyncio.create_task(save())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _parse_offers(self, page_content: str) -> List[OfferSchema]:
         soup = BeautifulSoup(page_content, "html.parser")
         _offers = []
         offers = []
@@ -216,7 +343,8 @@ class HotlineProductParser:
                 if price_elements and price_elements[0].text:
                     price_text = price_elements[0].text.strip()
                     if price_text:
-                        print(price_text)
+                        if log_sampler.allow("offer_price"):
+                            log.debug(f"Offer price text: {price_text!r}")
                         try:
                             price = float(
                                 price_text.replace("\xa0", "")
@@ -244,7 +372,8 @@ class HotlineProductParser:
                 _offers.append(offer)
 
             except Exception as e:
-                print(f"Error parsing offer: {e}")
+                if log_sampler.allow("offer_parse_error"):
+                    log.warning(f"Error parsing offer: {e}")
                 continue
 
         offers = [OfferSchema(**offer) for offer in _offers]
@@ -284,7 +413,7 @@ class HotlineProductParser:
                         if price:
                             return price
             except Exception as e:
-                print(f"XPath extraction error for pattern {xpath}: {e}")
+                log.warning(f"XPath extraction error for pattern {xpath}: {e}")
                 continue
         return price
 
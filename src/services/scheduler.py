@@ -1,15 +1,23 @@
 import asyncio
+import itertools
+import time
 from datetime import datetime, timedelta
-from typing import List
 from urllib.parse import urlparse
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
+from ..core.circuit_breaker import circuit_breakers
+from ..core.config import settings
+from ..core.exceptions import CircuitOpenException
 from ..core.logger import log
-from ..models.news import NewsItem
-from ..models.product import Product
-from ..repositories import news_repository, product_repository
+from ..core.metrics import SCHEDULER_CYCLE_SECONDS, SCHEDULER_ENTRIES
+from ..models.watchlist import WatchlistEntry
+from ..repositories.crawl_state_repository import crawl_state_repository
+from ..repositories.news_repository import news_repository
+from ..repositories.watchlist_repository import watchlist_repository
+from ..schemas.watchlist import WatchlistKind, WatchlistStatus
+from .http_cache import http_cache
 from .news_parser import news_parser_factory
 from .product_parser import product_parser
 
@@ -17,101 +25,157 @@ from .product_parser import product_parser
 class SchedulerService:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
-        self.product_repository = product_repository.ProductRepository()
-        self.news_repository = news_repository.NewsRepository()
-        self.product_urls = [
+        # Seeded into the watchlist on first start
+        self.default_product_urls = [
             "https://hotline.ua/bt-vyazalnye-mashiny/silver-reed-sk840srp60n",
-            # Add more product URLs here
         ]
-        self.news_sources = [
+        self.default_news_sources = [
             "https://epravda.com.ua/news/",
             "https://politeka.net/uk/newsfeed",
             "https://www.pravda.com.ua/news/",
         ]
+        self._dispatch_lock = asyncio.Lock()
+        self._sequence = itertools.count()
 
     async def start_scheduler(self):
-        """Start the scheduler with periodic tasks"""
-        # Schedule product parsing every 30 minutes
-        self.scheduler.add_job(
-            self.parse_all_products,
-            trigger=IntervalTrigger(minutes=30),
-            id="product_parsing",
-            next_run_time=datetime.now(),  # Run immediately on start
+        """Start the scheduler with the watchlist dispatcher"""
+        await watchlist_repository.seed_entries(
+            self.default_product_urls, WatchlistKind.PRODUCT.value
+        )
+        await watchlist_repository.seed_entries(
+            self.default_news_sources, WatchlistKind.NEWS.value
         )
 
-        # Schedule news parsing every 30 minutes
         self.scheduler.add_job(
-            self.parse_all_news,
-            trigger=IntervalTrigger(minutes=30),
-            id="news_parsing",
+            self.dispatch_due,
+            trigger=IntervalTrigger(seconds=settings.WATCHLIST_POLL_SECONDS),
+            id="watchlist_dispatch",
             next_run_time=datetime.now(),  # Run immediately on start
+            max_instances=1,
+            coalesce=True,
         )
 
         self.scheduler.start()
         log.success("Scheduler started successfully")
 
-    async def parse_all_products(self):
-        """Parse all products and save to database"""
-        log.info("Starting product parsing cycle")
-
-        for url in self.product_urls:
+    async def dispatch_due(self) -> int:
+        """Claim due watchlist entries in batches and process them by priority"""
+        if self._dispatch_lock.locked():
+            log.debug("Watchlist dispatch already running, skipping")
+            return 0
+
+        async with self._dispatch_lock:
+            started = time.perf_counter()
+            queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+            workers = [
+                asyncio.create_task(self._worker(queue))
+                for _ in range(settings.WATCHLIST_WORKERS)
+            ]
+            processed = 0
             try:
-                result = await product_parser.parse_product(url)
-
-                # Save to database
-                product_data = {
-                    "url": url,
-                    "offers": [offer.model_dump() for offer in result.offers],
-                    "updated_at": datetime.utcnow(),
-                }
-
-                await self.product_repository.update_product(
-                    {"url": url}, {"$set": product_data}, upsert=True
-                )
-
-                log.success(f"Product parsed and saved: {url}")
-
-            except Exception as e:
-                log.error(f"Failed to parse product {url}: {str(e)}")
-
-    async def parse_all_news(self):
-        """Parse all news sources and save to database"""
-        log.info("Starting news parsing cycle")
+                while True:
+                    batch = await watchlist_repository.claim_due(
+                        limit=settings.WATCHLIST_BATCH_SIZE,
+                        lease_seconds=settings.WATCHLIST_LEASE_SECONDS,
+                    )
+                    if not batch:
+                        break
+
+                    for entry in batch:
+                        queue.put_nowait((-entry.priority, next(self._sequence), entry))
+                    processed += len(batch)
+                    await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+            SCHEDULER_CYCLE_SECONDS.observe(time.perf_counter() - started)
+            if processed:
+                log.info(f"Watchlist dispatch processed {processed} entries")
+                http_cache.end_cycle()
+            return processed
+
+    async def _worker(self, queue: asyncio.PriorityQueue):
+        while True:
+            _, _, entry = await queue.get()
+            try:
+                await self._process_entry(entry)
+            finally:
+                queue.task_done()
+
+    async def _process_entry(self, entry: WatchlistEntry):
+        """Run parser for a single watchlist entry and record the result"""
+        breaker = circuit_breakers.get(entry.url)
+        if breaker.retry_after > 0:
+            # Don't spend a browser on a failing domain, come back once it probes
+            await self._postpone_entry(entry, breaker.retry_after)
+            return
+
+        try:
+            if entry.kind == WatchlistKind.PRODUCT.value:
+                await product_parser.parse_product(entry.url)
+            elif entry.kind == WatchlistKind.NEWS.value:
+                await self._parse_news_source(entry.url)
+            else:
+                raise ValueError(f"Unknown watchlist kind: {entry.kind}")
+
+            await watchlist_repository.complete_entry(entry, WatchlistStatus.OK.value)
+            SCHEDULER_ENTRIES.labels(entry.kind, WatchlistStatus.OK.value).inc()
+            log.success(f"Watchlist entry processed: {entry.url}")
+
+        except CircuitOpenException:
+            await self._postpone_entry(entry, breaker.retry_after)
+
+        except Exception as e:
+            log.error(f"Failed to process watchlist entry {entry.url}: {str(e)}")
+            await watchlist_repository.complete_entry(
+                entry, WatchlistStatus.ERROR.value, error=str(e)
+            )
+            SCHEDULER_ENTRIES.labels(entry.kind, WatchlistStatus.ERROR.value).inc()
+
+    async def _postpone_entry(self, entry: WatchlistEntry, seconds: float):
+        await watchlist_repository.postpone_entry(
+            entry, seconds or settings.BREAKER_OPEN_SECONDS
+        )
+        SCHEDULER_ENTRIES.labels(entry.kind, WatchlistStatus.SKIPPED.value).inc()
+        log.info(f"Circuit open for {entry.url}, postponed")
 
+    async def _parse_news_source(self, url: str):
+        """Parse items published since the source's high-water mark and save them"""
         until_date = datetime.now() - timedelta(days=1)  # Last 24 hours
-
-        for url in self.news_sources:
-            try:
-                parser = news_parser_factory.get_parser(url)
-                news_items = await parser.parse_news(url, until_date)
-                if news_items:
-                    for item in news_items:
-                        news_data = NewsItem(
-                            url=item.url,
-                            article_data=item.article_data,
-                            source=urlparse(url).netloc,
-                        )
-
-                        await self.news_repository(
-                            {"url": item.url},
-                            {"$set": news_data.dict(by_alias=True, exclude={"id"})},
-                            upsert=True,
-                        )
-
-                    log.success(f"News parsed and saved from: {url}")
-
-            except Exception as e:
-                log.error(f"Failed to parse news from {url}: {str(e)}")
-
-    async def force_parse_products(self):
+        since = await crawl_state_repository.get_state(url)
+        parser = news_parser_factory.get_parser(url)
+        try:
+            news_items = await circuit_breakers.call(
+                url, lambda: parser.parse_news(url, until_date, since=since)
+            )
+            if news_items:
+                if not await news_repository.save_news_items(
+                    news_items, urlparse(url).netloc
+                ):
+                    # Nothing stored: leave the pages to be fetched again
+                    return
+                mark = parser.crawl_mark(news_items)
+                if mark:
+                    await crawl_state_repository.advance(
+                        url, mark.article_data.published_at, mark.url
+                    )
+            await http_cache.commit(parser.cache_validators())
+        finally:
+            await parser.close()
+
+    async def force_parse_products(self) -> int:
         """Force immediate product parsing"""
         log.info("Forcing product parsing")
-        await self.parse_all_products()
+        await watchlist_repository.mark_due(WatchlistKind.PRODUCT.value)
+        return await self.dispatch_due()
 
-    async def force_parse_news(self):
+    async def force_parse_news(self) -> int:
         """Force immediate news parsing"""
         log.info("Forcing news parsing")
-        await self.parse_all_news()
+        await watchlist_repository.mark_due(WatchlistKind.NEWS.value)
+        return await self.dispatch_due()
 
     async def stop_scheduler(self):
         """Stop the scheduler"""
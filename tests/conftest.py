@@ -2,10 +2,17 @@ import asyncio
 
 import pytest
 from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
 
-from src.core.database import close_db, init_db
+from src.core.config import settings
+from src.core.database import close_db, db, init_db
 from src.main import app
 
+# Repositories bind their collections on first use, so unit tests run them
+# against an in-memory MongoDB installed before any repository is imported
+db.client = AsyncMongoMockClient()
+db.database = db.client[settings.DATABASE_NAME]
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -22,6 +29,14 @@ async def test_client():
     await close_db()
 
 
+@pytest.fixture
+async def database():
+    """In-memory database, emptied after the test"""
+    yield db.database
+    for name in await db.database.list_collection_names():
+        await db.database.drop_collection(name)
+
+
 @pytest.fixture
 def api_key():
     return "test-key-1"
@@ -0,0 +1,270 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from src.core.config import settings
+from src.core.exceptions import UnsafeWebhookException
+from src.core.webhook_guard import check_webhook_url
+from src.models.alert import AlertDelivery, AlertRule
+from src.repositories.alert_outbox_repository import alert_outbox_repository
+from src.schemas.alert import DeliveryStatus
+from src.services.alerts import AlertEngine, alert_dispatcher
+
+PRODUCT = "https://hotline.ua/product"
+
+
+def _rule(threshold, direction="below", **fields) -> AlertRule:
+    return AlertRule(
+        api_key_id="key",
+        product_url=PRODUCT,
+        threshold=threshold,
+        direction=direction,
+        condition="any",
+        webhook_url="https://hooks.example.com/alert",
+        **fields,
+    )
+
+
+def _offer(url, price, old_price=None, shop="Shop", is_used=False):
+    offer = {
+        "url": url,
+        "title": "Phone",
+        "shop": shop,
+        "price": price,
+        "is_used": is_used,
+    }
+    if old_price is not None:
+        offer["old_price"] = old_price
+    return offer
+
+
+def _diff(added=(), changed=()):
+    return {"added": list(added), "removed": [], "changed": list(changed)}
+
+
+def _engine(*rules) -> AlertEngine:
+    engine = AlertEngine()
+    for rule in rules:
+        engine.add_rule(rule)
+    return engine
+
+
+def test_fires_on_crossing_only():
+    rule = _rule(1000)
+    engine = _engine(rule)
+
+    crossed = engine.evaluate(PRODUCT, _diff(changed=[_offer("a", 950, 1100)]))
+    stayed_under = engine.evaluate(PRODUCT, _diff(changed=[_offer("a", 900, 950)]))
+    rose = engine.evaluate(PRODUCT, _diff(changed=[_offer("a", 1100, 950)]))
+
+    assert [(r.id, o["price"]) for r, o in crossed] == [(rule.id, 950)]
+    assert stayed_under == []
+    assert rose == []
+
+
+def test_fires_at_threshold_both_directions():
+    below, above = _rule(1000), _rule(1000, "above")
+    engine = _engine(below, above)
+
+    fell = engine.evaluate(PRODUCT, _diff(changed=[_offer("a", 1000, 1001)]))
+    rose = engine.evaluate(PRODUCT, _diff(changed=[_offer("a", 1000, 999)]))
+
+    assert [r.id for r, _ in fell] == [below.id]
+    assert [r.id for r, _ in rose] == [above.id]
+
+
+def test_one_match_per_rule_with_best_offer():
+    below, above = _rule(1000), _rule(500, "above")
+    engine = _engine(below, above)
+    diff = _diff(
+        changed=[
+            _offer("a", 900, 1200),
+            _offer("b", 700, 1100),
+            _offer("c", 800, 1050),
+            _offer("d", 600, 400),
+            _offer("e", 650, 450),
+        ]
+    )
+
+    matches = {rule.id: offer["url"] for rule, offer in engine.evaluate(PRODUCT, diff)}
+
+    assert matches == {below.id: "b", above.id: "e"}
+
+
+def test_new_offers_set_baseline_by_default():
+    engine = _engine(_rule(1000))
+    diff = _diff(added=[_offer(str(i), 500 + i) for i in range(10)])
+
+    assert engine.evaluate(PRODUCT, diff) == []
+
+
+def test_new_offers_fire_when_included():
+    rule = _rule(1000, include_new_offers=True)
+    engine = _engine(rule)
+    diff = _diff(added=[_offer("a", 900), _offer("b", 800), _offer("c", 1200)])
+
+    assert [(r.id, o["url"]) for r, o in engine.evaluate(PRODUCT, diff)] == [
+        (rule.id, "b")
+    ]
+
+
+def test_condition_and_shop_filters():
+    rule = AlertRule(
+        api_key_id="key",
+        shop="Rozetka",
+        threshold=1000,
+        direction="below",
+        condition="used",
+        webhook_url="https://hooks.example.com/alert",
+    )
+    engine = _engine(rule)
+    diff = _diff(
+        changed=[
+            _offer("a", 900, 1100, shop="Rozetka", is_used=False),
+            _offer("b", 950, 1100, shop="Rozetka", is_used=True),
+            _offer("c", 800, 1100, shop="Other", is_used=True),
+        ]
+    )
+
+    assert [o["url"] for _, o in engine.evaluate(PRODUCT, diff)] == ["b"]
+
+
+async def test_process_queues_one_delivery_per_rule(database):
+    engine = _engine(_rule(1000), _rule(950))
+    diff = _diff(changed=[_offer(str(i), 800 + i, 1200) for i in range(10)])
+
+    await engine.process(PRODUCT, diff)
+
+    deliveries = await alert_outbox_repository.collection.find().to_list(None)
+    assert len(deliveries) == 2
+    assert {delivery["payload"]["price"] for delivery in deliveries} == {800}
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """Dispatcher client answered by `responses`, calls recorded in `calls`"""
+    calls, responses = [], []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(responses.pop(0) if responses else 200)
+
+    monkeypatch.setattr(
+        alert_dispatcher,
+        "_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(settings, "ALERT_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "ALERT_MAX_ATTEMPTS", 3)
+    return calls, responses
+
+
+async def _enqueue(webhook_url="http://93.184.216.34/hook") -> AlertDelivery:
+    delivery = AlertDelivery(
+        rule_id="rule",
+        webhook_url=webhook_url,
+        payload={"price": 900},
+        status=DeliveryStatus.PENDING.value,
+        next_attempt_at=datetime.utcnow(),
+    )
+    await alert_outbox_repository.enqueue([delivery])
+    return delivery
+
+
+async def _stored():
+    return await alert_outbox_repository.collection.find_one()
+
+
+async def _make_due():
+    await alert_outbox_repository.collection.update_many(
+        {}, {"$set": {"next_attempt_at": datetime.utcnow()}}
+    )
+
+
+async def test_failed_delivery_backs_off(database, webhook):
+    calls, responses = webhook
+    responses.extend([500, 500])
+    await _enqueue()
+
+    before = datetime.utcnow()
+    assert await alert_dispatcher.dispatch_due() == 1
+    first = await _stored()
+    assert first["status"] == DeliveryStatus.PENDING.value
+    assert first["attempts"] == 1
+    assert "claim_id" not in first
+    assert (
+        timedelta(seconds=7) < first["next_attempt_at"] - before < timedelta(seconds=13)
+    )
+    assert await alert_dispatcher.dispatch_due() == 0  # Not due yet
+
+    await _make_due()
+    await alert_dispatcher.dispatch_due()
+    second = await _stored()
+    assert second["attempts"] == 2
+    assert second["next_attempt_at"] - datetime.utcnow() > timedelta(seconds=15)
+
+    await _make_due()
+    await alert_dispatcher.dispatch_due()
+    sent = await _stored()
+    assert sent["status"] == DeliveryStatus.SENT.value
+    assert len(calls) == 3
+    assert {call.headers["X-Alert-Id"] for call in calls} == {str(sent["_id"])}
+
+
+async def test_delivery_given_up_after_max_attempts(database, webhook):
+    calls, responses = webhook
+    responses.extend([500] * 5)
+    await _enqueue()
+
+    for _ in range(settings.ALERT_MAX_ATTEMPTS):
+        await _make_due()
+        await alert_dispatcher.dispatch_due()
+
+    failed = await _stored()
+    assert failed["status"] == DeliveryStatus.FAILED.value
+    assert failed["attempts"] == settings.ALERT_MAX_ATTEMPTS
+    await _make_due()
+    assert await alert_dispatcher.dispatch_due() == 0
+    assert len(calls) == settings.ALERT_MAX_ATTEMPTS
+
+
+async def test_private_webhook_given_up_without_call(database, webhook):
+    calls, _ = webhook
+    await _enqueue("http://169.254.169.254/latest/meta-data")
+
+    await alert_dispatcher.dispatch_due()
+
+    stored = await _stored()
+    assert stored["status"] == DeliveryStatus.FAILED.value
+    assert calls == []
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://127.0.0.1:8002/hook",
+        "http://localhost/hook",
+        "http://10.1.2.3/hook",
+        "http://192.168.0.10/hook",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/hook",
+        "http://[::ffff:127.0.0.1]/hook",
+        "http://[fe80::1]/hook",
+        "http://0.0.0.0/hook",
+        "http://100.64.0.1/hook",
+        "http://224.0.0.1/hook",
+        "ftp://93.184.216.34/hook",
+    ],
+)
+async def test_webhook_guard_rejects_internal_targets(url):
+    with pytest.raises(UnsafeWebhookException):
+        await check_webhook_url(url)
+
+
+async def test_webhook_guard_allows_public_and_opt_out(monkeypatch):
+    await check_webhook_url("https://93.184.216.34/hook")
+    await check_webhook_url("http://[2606:2800:220:1::1]:8443/hook")
+
+    monkeypatch.setattr(settings, "ALERT_WEBHOOK_ALLOW_PRIVATE", True)
+    await check_webhook_url("http://127.0.0.1:8002/hook")
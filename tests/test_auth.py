@@ -0,0 +1,118 @@
+import math
+
+import pytest
+from fastapi import HTTPException
+
+from src.core import rate_limit
+from src.core.auth import (
+    ApiKeyCache,
+    Budget,
+    api_key_cache,
+    consume_budget,
+    get_api_key,
+    hash_api_key,
+    resolve_api_key,
+)
+from src.core.exceptions import RateLimitException
+from src.core.rate_limit import RateLimiter, TokenBucket
+from src.models.api_key import ApiKey
+from src.repositories.api_key_repository import api_key_repository
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of the rate limiter, advanced by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_bucket_refills_continuously(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert [bucket.consume() for _ in range(3)] == [0, 0, 0]
+    assert bucket.consume() == pytest.approx(0.5)
+
+    clock[0] += 0.5
+    assert bucket.consume() == 0
+    # Idle time refills up to the capacity only
+    clock[0] += 60
+    assert [bucket.consume() for _ in range(3)] == [0, 0, 0]
+    assert bucket.consume(cost=2) == pytest.approx(1.0)
+
+
+def test_bucket_without_rate_never_refills(clock):
+    bucket = TokenBucket(rate=0, capacity=1)
+
+    assert bucket.consume() == 0
+    clock[0] += 3600
+    assert bucket.consume() == math.inf
+
+
+def test_limit_raises_with_retry_after(clock):
+    limiter = RateLimiter()
+    for _ in range(2):
+        limiter.check("key", rate_per_minute=20, burst=2)
+
+    with pytest.raises(RateLimitException) as limited:
+        limiter.check("key", rate_per_minute=20, burst=2)
+
+    assert limited.value.status_code == 429
+    assert limited.value.headers == {"Retry-After": "3"}
+    # Other keys have their own buckets
+    limiter.check("other", rate_per_minute=20, burst=2)
+
+
+def test_changed_limits_start_a_new_bucket(clock):
+    limiter = RateLimiter()
+    limiter.check("key", rate_per_minute=60, burst=1)
+
+    limiter.check("key", rate_per_minute=60, burst=2)
+
+
+def test_budgets_are_separate_and_overridable(clock):
+    api_key = ApiKey(
+        name="key",
+        key_hash="hash",
+        prefix="key",
+        parse_rate_per_minute=60,
+        parse_burst=1,
+    )
+
+    consume_budget(api_key, Budget.PARSE)
+    consume_budget(api_key, Budget.READ)
+    with pytest.raises(RateLimitException) as limited:
+        consume_budget(api_key, Budget.PARSE)
+
+    assert limited.value.headers["Retry-After"] == "1"
+
+
+def test_cache_remembers_unknown_keys_in_bounded_lru():
+    cache = ApiKeyCache(ttl_seconds=60, max_unknown=2)
+    for key_hash in ("a", "b", "c"):
+        cache.set(key_hash, None)
+
+    assert cache.get("a") == (False, None)
+    assert cache.get("c") == (True, None)
+
+
+async def test_keys_resolved_by_hash_and_cached(database):
+    stored = await api_key_repository.create_key(
+        ApiKey(name="client", key_hash=hash_api_key("secret"), prefix="secr")
+    )
+    api_key_cache.invalidate(stored.key_hash)
+
+    assert (await resolve_api_key("secret")).id == stored.id
+    await api_key_repository.revoke_key(stored.id)
+    # Revocations show once the cached entry expires
+    assert (await resolve_api_key("secret")).id == stored.id
+    api_key_cache.invalidate(stored.key_hash)
+    assert await resolve_api_key("secret") is None
+    assert await resolve_api_key(None) is None
+
+
+async def test_unknown_key_rejected(database):
+    with pytest.raises(HTTPException) as rejected:
+        await get_api_key("not-a-key")
+
+    assert rejected.value.status_code == 401
@@ -0,0 +1,50 @@
+from src.services.broadcaster import Broadcaster, news_topic, product_topic
+
+TOPIC = product_topic("https://hotline.ua/product")
+
+
+def test_news_topic_accepts_url_or_domain():
+    assert news_topic("https://www.Pravda.com.ua/news/") == "news:pravda.com.ua"
+    assert news_topic("pravda.com.ua") == "news:pravda.com.ua"
+
+
+async def test_publish_fans_out_to_topic_subscribers():
+    broadcaster = Broadcaster(queue_size=10)
+    first, second = broadcaster.subscribe([TOPIC]), broadcaster.subscribe([TOPIC])
+    other = broadcaster.subscribe([news_topic("pravda.com.ua")])
+
+    assert broadcaster.publish(TOPIC, {"type": "offers", "price": 100}) == 2
+
+    event = await first.get()
+    assert event.event == "offers"
+    assert event.data == '{"type": "offers", "price": 100}'
+    assert (await second.get()) is event
+    assert other.queue.empty()
+
+
+async def test_full_subscriber_dropped_others_still_served():
+    broadcaster = Broadcaster(queue_size=2)
+    stalled, reading = broadcaster.subscribe([TOPIC]), broadcaster.subscribe([TOPIC])
+
+    for n in range(3):
+        delivered = broadcaster.publish(TOPIC, {"type": "offers", "n": n})
+        await reading.get()
+
+    # The third event found the stalled queue full
+    assert delivered == 1
+    assert stalled.dropped is True
+    assert await stalled.get() is None
+    assert stalled.queue.empty()
+    assert reading.dropped is False
+    assert broadcaster.subscriber_count == 1
+    assert broadcaster.publish(TOPIC, {"type": "offers"}) == 1
+
+
+def test_unsubscribe_forgets_empty_topics():
+    broadcaster = Broadcaster(queue_size=10)
+    subscription = broadcaster.subscribe([TOPIC])
+
+    broadcaster.unsubscribe(subscription)
+
+    assert broadcaster.subscriber_count == 0
+    assert broadcaster.publish(TOPIC, {"type": "offers"}) == 0
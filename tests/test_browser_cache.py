@@ -0,0 +1,38 @@
+import pytest
+
+from src.services.browser_cache import AssetCache
+
+DAY = 24 * 3600
+DATE = "Mon, 15 Jan 2024 10:00:00 GMT"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AssetCache(cache_dir=str(tmp_path), max_mb=1, ttl_hours=24)
+
+
+@pytest.mark.parametrize(
+    "headers, ttl",
+    [
+        ({"cache-control": "public, max-age=600"}, 600),
+        ({"cache-control": "max-age=31536000, immutable"}, DAY),
+        ({"cache-control": "max-age=0"}, 0),
+        ({"cache-control": "no-cache"}, 0),
+        ({"cache-control": "no-store"}, 0),
+        ({"cache-control": "private, max-age=600"}, 0),
+        ({"pragma": "no-cache"}, 0),
+        ({"date": DATE, "expires": "Mon, 15 Jan 2024 11:00:00 GMT"}, 3600),
+        ({"date": DATE, "expires": "0"}, 0),
+        ({"date": DATE, "expires": "Mon, 15 Jan 2024 09:00:00 GMT"}, 0),
+        (
+            {"cache-control": "max-age=60", "expires": "Mon, 15 Jan 2024 11:00:00 GMT"},
+            60,
+        ),
+        ({"date": DATE, "last-modified": "Fri, 05 Jan 2024 10:00:00 GMT"}, DAY),
+        ({"date": DATE, "last-modified": "Mon, 15 Jan 2024 00:00:00 GMT"}, 3600),
+        ({}, 0),
+        ({"content-type": "text/javascript"}, 0),
+    ],
+)
+def test_ttl(cache, headers, ttl):
+    assert cache._ttl(headers) == pytest.approx(ttl)
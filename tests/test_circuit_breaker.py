@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.circuit_breaker import BreakerState, CircuitBreakerRegistry
+from src.core.config import settings
+from src.core.deadline import Deadline
+from src.core.exceptions import CircuitOpenException, ParsingException
+
+URL = "https://hotline.ua/mobile/phone/"
+
+
+@pytest.fixture
+def breakers(monkeypatch):
+    monkeypatch.setattr(settings, "BREAKER_MIN_CALLS", 5)
+    monkeypatch.setattr(settings, "BREAKER_ERROR_RATE", 0.5)
+    monkeypatch.setattr(settings, "RETRY_BACKOFF_SECONDS", 0)
+    return CircuitBreakerRegistry()
+
+
+async def _fail():
+    raise ParsingException("page didn't load")
+
+
+async def _succeed():
+    return "ok"
+
+
+async def _fail_calls(breakers, count: int):
+    for _ in range(count):
+        with pytest.raises(ParsingException):
+            await breakers.call(URL, _fail, retries=0)
+
+
+async def test_opens_on_failure_rate(breakers):
+    await _fail_calls(breakers, 4)
+    assert breakers.get(URL).state == BreakerState.CLOSED
+
+    await _fail_calls(breakers, 1)
+    assert breakers.get(URL).state == BreakerState.OPEN
+
+    called = False
+
+    async def func():
+        nonlocal called
+        called = True
+
+    with pytest.raises(CircuitOpenException):
+        await breakers.call(URL, func)
+    assert not called
+    assert breakers.is_open("https://www.hotline.ua/other/")
+
+
+async def test_client_errors_are_not_failures(breakers):
+    async def not_found():
+        raise HTTPException(status_code=404, detail="Product page not found")
+
+    for _ in range(10):
+        with pytest.raises(HTTPException):
+            await breakers.call(URL, not_found, retries=0)
+    assert breakers.get(URL).state == BreakerState.CLOSED
+
+
+async def test_half_open_probe_success_closes(breakers):
+    await _fail_calls(breakers, 5)
+    breaker = breakers.get(URL)
+    breaker.opened_at -= settings.BREAKER_OPEN_SECONDS
+
+    breaker.acquire()
+    assert breaker.state == BreakerState.HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenException):
+        breaker.acquire()
+    breaker.release()
+
+    assert await breakers.call(URL, _succeed) == "ok"
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.rates() == (0.0, 0.0)
+
+
+async def test_half_open_probe_failure_reopens(breakers):
+    await _fail_calls(breakers, 5)
+    breaker = breakers.get(URL)
+    breaker.opened_at -= settings.BREAKER_OPEN_SECONDS
+
+    await _fail_calls(breakers, 1)
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.retry_after > 0
+
+
+async def test_calls_running_into_deadline_are_slow(breakers, monkeypatch):
+    monkeypatch.setattr(settings, "BREAKER_MIN_CALLS", 1)
+
+    async def partial():
+        await asyncio.sleep(0.17)
+        return "partial"
+
+    # Far below BREAKER_SLOW_CALL_SECONDS, but all of its 0.2s budget
+    assert await breakers.call(URL, partial, deadline=Deadline(0.2)) == "partial"
+    assert breakers.get(URL).rates() == (0.0, 1.0)
+    assert breakers.get(URL).state == BreakerState.OPEN
+
+
+async def test_retries_failed_calls(breakers):
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise ParsingException("connection reset")
+        return "ok"
+
+    assert await breakers.call(URL, flaky, retries=2) == "ok"
+    assert attempts == 3
+    assert breakers.get(URL).rates() == (2 / 3, 0.0)
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from src.core.deadline import Deadline
+
+
+def test_unlimited_deadline_never_expires():
+    deadline = Deadline()
+
+    assert deadline.remaining() is None
+    assert deadline.expired() is False
+    assert deadline.reserve(5) == 0
+    assert deadline.timeout_ms() is None
+
+
+def test_reserve_is_capped_at_a_quarter():
+    deadline = Deadline(2)
+
+    assert deadline.reserve(1.5) == 0.5
+    assert deadline.reserve(0.1) == 0.1
+    assert 1.4 < deadline.remaining(reserve=0.5) <= 1.5
+    assert deadline.expired(reserve=2) is True
+
+
+def test_expired_deadline_gives_playwright_a_minimal_timeout():
+    deadline = Deadline(0)
+
+    assert deadline.expired() is True
+    assert deadline.timeout_ms() == 1.0
+
+
+async def test_timeout_cancels_at_remaining_time():
+    deadline = Deadline(0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        async with deadline.timeout():
+            await asyncio.sleep(1)
+    assert deadline.expired()
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.core.config import settings
+from src.core.deadline import Deadline
+from src.services.egress_pool import EgressPool, ProxyOutcome
+
+URL = "https://hotline.ua/product"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(settings, "PROXY_EJECT_AFTER", 3)
+    monkeypatch.setattr(settings, "PROXY_MIN_HEALTH", 0.2)
+    monkeypatch.setattr(settings, "PROXY_EJECT_SECONDS", 60)
+    monkeypatch.setattr(settings, "PROXY_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "PROXY_RATE_PER_MINUTE", 6000)
+    monkeypatch.setattr(settings, "PROXY_BURST", 100)
+    return EgressPool(["http://10.0.0.1:3128", "http://10.0.0.2:3128"])
+
+
+async def _fail(pool, error):
+    with pytest.raises(type(error)):
+        async with pool.lease(URL) as lease:
+            raise error
+    return lease.proxy
+
+
+async def test_target_404_leaves_proxy_healthy(pool):
+    for _ in range(settings.PROXY_EJECT_AFTER + 1):
+        proxy = await _fail(pool, HTTPException(status_code=404))
+
+    assert proxy.health == 1.0
+    assert proxy.status()["ejected"] is False
+    assert all(proxy.ejections == 0 for proxy in pool.proxies)
+
+
+async def test_transport_errors_eject_and_proxy_recovers(pool):
+    pool.proxies = pool.proxies[:1]
+    for _ in range(settings.PROXY_EJECT_AFTER):
+        proxy = await _fail(pool, httpx.ConnectError("refused"))
+
+    assert proxy.status()["ejected"] is True
+    assert proxy.ejections == 1
+
+    # Ejection over: back on probation, healthier with every success
+    proxy.ejected_until = 1.0
+    async with pool.lease(URL):
+        pass
+    assert proxy.status()["ejected"] is False
+    assert proxy.consecutive_failures == 0
+    assert proxy.health == pytest.approx(0.65)
+
+
+async def test_blocked_report_counts_against_proxy(pool):
+    async with pool.lease(URL) as lease:
+        lease.report(ProxyOutcome.BLOCKED)
+
+    assert lease.proxy.health < 1.0
+    assert lease.proxy.consecutive_failures == 1
+
+
+async def test_waits_for_busy_proxy_without_rate_wait(pool, monkeypatch):
+    # No rate-limit wait, no deadline and no ejection time to wait for
+    monkeypatch.setattr(settings, "PROXY_EJECT_SECONDS", 0)
+    pool.proxies = pool.proxies[:1]
+
+    async with pool.lease(URL):
+        waiting = asyncio.create_task(pool.lease(URL, Deadline(5)).__aenter__())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+
+    lease = await asyncio.wait_for(waiting, 1)
+    assert lease.proxy is pool.proxies[0]
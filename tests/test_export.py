@@ -0,0 +1,182 @@
+import argparse
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from src.cli import export as run_export
+from src.core.config import settings
+from src.core.exceptions import InvalidCursorException
+from src.repositories.news_repository import news_repository
+from src.repositories.offer_repository import offer_repository
+from src.schemas.export import ExportDataset, ExportQuery
+from src.services.export import export_service
+
+
+@pytest.fixture
+async def offers(database, monkeypatch):
+    """Seven stored offers in _id order, exported two rows per batch"""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    documents = [
+        {
+            "_id": ObjectId(),
+            "product_url": "https://hotline.ua/product",
+            "url": f"https://shop/{number}",
+            "title": f"Offer {number}",
+            "shop": "Shop",
+            "price": 100.0 + number,
+            "is_used": False,
+            "updated_at": datetime(2024, 6, 1),
+        }
+        for number in range(7)
+    ]
+    await offer_repository.collection.insert_many(documents)
+    return [str(document["_id"]) for document in documents]
+
+
+def _args(output, **options):
+    defaults = dict(
+        dataset="offers",
+        output=str(output),
+        format=None,
+        source=None,
+        url=[],
+        shop=None,
+        since=None,
+        until=None,
+        columns=None,
+        rows_per_file=1_000_000,
+        resume=False,
+    )
+    return argparse.Namespace(**{**defaults, **options})
+
+
+def _interrupt_after(monkeypatch, batch_count):
+    """Make the next export fail after `batch_count` batches"""
+    batches = export_service.batches
+
+    async def failing(request, columns):
+        count = 0
+        async for rows in batches(request, columns):
+            if count == batch_count:
+                raise ConnectionError("Connection lost")
+            count += 1
+            yield rows
+
+    monkeypatch.setattr(export_service, "batches", failing)
+
+
+async def _rows(request):
+    columns = export_service.columns(request.dataset, request.columns)
+    return [
+        row["id"]
+        async for rows in export_service.batches(request, columns)
+        for row in rows
+    ]
+
+
+async def test_batches_resume_after_id(offers):
+    request = ExportQuery(dataset=ExportDataset.OFFERS, after=offers[2])
+
+    assert await _rows(request) == offers[3:]
+
+
+async def test_invalid_resume_id_rejected(offers):
+    with pytest.raises(InvalidCursorException):
+        export_service.encoder(ExportQuery(dataset=ExportDataset.OFFERS, after="x"))
+
+
+@pytest.mark.parametrize("extension", ["ndjson", "csv"])
+async def test_text_export_resumes_from_checkpoint(
+    offers, tmp_path, monkeypatch, extension
+):
+    complete = tmp_path / f"complete.{extension}"
+    assert await run_export(_args(complete)) == 0
+
+    output = tmp_path / f"offers.{extension}"
+    _interrupt_after(monkeypatch, 2)
+    with pytest.raises(ConnectionError):
+        await run_export(_args(output))
+    monkeypatch.undo()
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+
+    checkpoint = json.loads((tmp_path / f"offers.{extension}.checkpoint").read_text())
+    assert checkpoint["after"] == offers[3]
+    assert checkpoint["rows"] == 4
+    # Bytes of a batch written after the last checkpoint are dropped
+    with open(output, "ab") as file:
+        file.write(b"half a row")
+
+    assert await run_export(_args(output, resume=True)) == 0
+    assert output.read_bytes() == complete.read_bytes()
+    assert not (tmp_path / f"offers.{extension}.checkpoint").exists()
+
+
+async def test_resume_without_output_starts_over(offers, tmp_path, monkeypatch):
+    complete = tmp_path / "complete.ndjson"
+    assert await run_export(_args(complete)) == 0
+
+    output = tmp_path / "offers.ndjson"
+    _interrupt_after(monkeypatch, 2)
+    with pytest.raises(ConnectionError):
+        await run_export(_args(output))
+    monkeypatch.undo()
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    output.unlink()
+
+    assert await run_export(_args(output, resume=True)) == 0
+    assert output.read_bytes() == complete.read_bytes()
+
+
+async def test_resume_of_other_export_refused(offers, tmp_path, monkeypatch):
+    output = tmp_path / "offers.ndjson"
+    _interrupt_after(monkeypatch, 1)
+    with pytest.raises(ConnectionError):
+        await run_export(_args(output))
+    monkeypatch.undo()
+
+    assert await run_export(_args(output, resume=True, shop="Other")) == 1
+    assert (tmp_path / "offers.ndjson.checkpoint").exists()
+
+
+async def test_parquet_export_resumes_open_part(offers, tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = tmp_path / "offers.parquet"
+    # Parts close after every other batch, the second is open when it fails
+    _interrupt_after(monkeypatch, 3)
+    with pytest.raises(ConnectionError):
+        await run_export(_args(output, rows_per_file=4))
+    monkeypatch.undo()
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    checkpoint = json.loads((tmp_path / "offers.parquet.checkpoint").read_text())
+    assert (checkpoint["after"], checkpoint["part"]) == (offers[3], 1)
+
+    assert await run_export(_args(output, rows_per_file=4, resume=True)) == 0
+    parts = sorted(tmp_path.glob("offers-*.parquet"))
+    ids = [id_ for part in parts for id_ in pq.read_table(part)["id"].to_pylist()]
+    assert [part.name for part in parts] == [
+        "offers-00000.parquet",
+        "offers-00001.parquet",
+    ]
+    assert ids == offers
+
+
+async def test_news_filtered_by_article_url(database):
+    article = "https://www.pravda.com.ua/news/2024/01/15/123456789/"
+    await news_repository.collection.insert_many(
+        [
+            {"url": article, "source": "pravda.com.ua", "article_data": {}},
+            {"url": f"{article}2/", "source": "pravda.com.ua", "article_data": {}},
+        ]
+    )
+
+    request = ExportQuery(dataset=ExportDataset.NEWS, urls=[article], columns=["url"])
+    columns = export_service.columns(request.dataset, request.columns)
+    urls = [
+        row["url"]
+        async for rows in export_service.batches(request, columns)
+        for row in rows
+    ]
+
+    assert urls == [article]
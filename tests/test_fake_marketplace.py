@@ -0,0 +1,62 @@
+import argparse
+import os
+import re
+
+import httpx
+import pytest
+
+from benchmarks.fake_hotline import build_app
+from benchmarks.loadtest import parse_mix, process_tree, sample_processes
+
+OFFER = re.compile(r'href="/go/price/(\d+)/" class="shop__title"')
+
+
+@pytest.fixture
+async def marketplace():
+    app = build_app(offers=50, chunk=20, latency_ms=0)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def test_page_ships_first_chunk_and_scroll_script(marketplace):
+    page = (await marketplace.get("/product/phone-1")).text
+
+    assert len(OFFER.findall(page)) == 20
+    assert 'id="productOffersListContainer"' in page
+    assert "/api/offers/phone-1?start=${next}&offers=50&chunk=20" in page
+
+
+async def test_chunks_are_deterministic_and_end_at_total(marketplace):
+    first = (await marketplace.get("/api/offers/phone-1?start=20")).text
+    again = (await marketplace.get("/api/offers/phone-1?start=20")).text
+    last = (await marketplace.get("/api/offers/phone-1?start=40")).text
+    past = (await marketplace.get("/api/offers/phone-1?start=60")).text
+
+    assert first == again
+    assert OFFER.findall(first) == [str(100000 + n) for n in range(20, 40)]
+    assert len(OFFER.findall(last)) == 10
+    assert past == ""
+
+
+async def test_page_size_overridable_per_request(marketplace):
+    page = (await marketplace.get("/product/phone-2?offers=5&chunk=2")).text
+
+    assert len(OFFER.findall(page)) == 2
+    assert "const total = 5;" in page
+
+
+def test_parse_mix():
+    assert parse_mix("hit=0.7,miss=0.2,news=0.1") == {
+        "hit": 0.7,
+        "miss": 0.2,
+        "news": 0.1,
+    }
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("hit=0.5,search=0.5")
+
+
+def test_process_sampling_covers_own_process():
+    assert process_tree(os.getpid())[0] == os.getpid()
+    assert sample_processes(os.getpid())["rss_mb"] > 0
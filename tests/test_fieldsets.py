@@ -0,0 +1,63 @@
+import pytest
+
+from src.core.exceptions import InvalidFieldsException
+from src.core.fieldsets import ResponseView, pick, projection
+from src.schemas.news import NEWS_FIELDS
+from src.schemas.product import PRODUCT_FIELDS
+
+PRODUCT = {
+    "url": "https://hotline.ua/product",
+    "partial": False,
+    "summary": {"count": 2, "min_price": 900.0},
+    "offers": [
+        {"url": "https://shop/1", "shop": "A", "price": 900.0, "is_used": False},
+        {"url": "https://shop/2", "shop": "B", "price": 1000.0, "is_used": True},
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    "paths",
+    [
+        ["url"],
+        ["url", "summary.count"],
+        ["offers.price", "offers.shop"],
+        ["offers", "offers.price"],
+        ["summary.missing", "absent"],
+    ],
+)
+async def test_pick_matches_mongo_projection(database, paths):
+    await database.products.insert_one(dict(PRODUCT))
+
+    stored = await database.products.find_one({}, projection(paths))
+
+    assert pick(PRODUCT, paths) == stored
+
+
+def test_projection_drops_children_of_selected_parents():
+    assert projection(["offers", "offers.price", "url"]) == {
+        "_id": 0,
+        "offers": 1,
+        "url": 1,
+    }
+
+
+def test_resolve_fields_and_views():
+    assert NEWS_FIELDS.resolve("url,title,title") == ["url", "article_data.title"]
+    assert NEWS_FIELDS.resolve(None, ResponseView.SUMMARY) == [
+        "url",
+        "source",
+        "article_data.title",
+        "article_data.published_at",
+    ]
+    assert NEWS_FIELDS.resolve(None) is None
+    # An explicit list wins over the view
+    assert PRODUCT_FIELDS.resolve("offers.price", ResponseView.SUMMARY) == [
+        "offers.price"
+    ]
+
+
+@pytest.mark.parametrize("fields", ["url,bogus", " , "])
+def test_resolve_rejects_unknown_fields(fields):
+    with pytest.raises(InvalidFieldsException):
+        PRODUCT_FIELDS.resolve(fields)
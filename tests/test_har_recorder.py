@@ -0,0 +1,65 @@
+import pytest
+
+from src.core.exceptions import ParsingException
+from src.services.har_recorder import HarRecorder
+
+URL = "https://hotline.ua/ua/mobile-apple-iphone-15-128gb/"
+
+
+class FakeContext:
+    """Records the routes a browser context would be given"""
+
+    def __init__(self):
+        self.har_routes = []
+        self.routes = []
+
+    async def route_from_har(self, path, **options):
+        self.har_routes.append((path, options))
+
+    async def route(self, pattern, handler):
+        self.routes.append(pattern)
+
+
+def test_har_path_per_url(tmp_path):
+    recorder = HarRecorder(str(tmp_path), "replay", 0)
+
+    path = recorder.har_path(URL)
+
+    assert path.parent == tmp_path
+    assert path.name.startswith("hotline_ua_ua_mobile_apple_iphone_15_128gb_")
+    assert path == recorder.har_path(URL)
+    assert path != recorder.har_path(URL + "?page=2")
+
+
+async def test_off_leaves_context_alone(tmp_path):
+    context = FakeContext()
+
+    await HarRecorder(str(tmp_path), "off", 0).attach(context, URL)
+
+    assert (context.har_routes, context.routes) == ([], [])
+
+
+async def test_record_updates_embedded_har(tmp_path):
+    recorder = HarRecorder(str(tmp_path / "har"), "record", 0)
+    context = FakeContext()
+
+    await recorder.attach(context, URL)
+
+    [(path, options)] = context.har_routes
+    assert path == recorder.har_path(URL)
+    assert options["update"] is True
+    assert options["update_content"] == "embed"
+    assert path.parent.is_dir()
+
+
+async def test_replay_aborts_unrecorded_and_adds_latency(tmp_path):
+    recorder = HarRecorder(str(tmp_path), "replay", 50)
+    context = FakeContext()
+    with pytest.raises(ParsingException):
+        await recorder.attach(context, URL)
+
+    recorder.har_path(URL).write_text("{}")
+    await recorder.attach(context, URL)
+
+    assert context.har_routes == [(recorder.har_path(URL), {"not_found": "abort"})]
+    assert context.routes == ["**/*"]
@@ -0,0 +1,73 @@
+import threading
+
+from src.core.logger import QueuedSink, RotatingFileWriter
+
+
+class BlockingStream:
+    """Stream whose writes wait until released, collecting what was written"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.text = ""
+
+    def write(self, text: str):
+        self.entered.set()
+        self.release.wait(5)
+        self.text += text
+
+    def flush(self):
+        pass
+
+
+def test_full_queue_drops_and_reports_count():
+    stream = BlockingStream()
+    sink = QueuedSink(stream, maxsize=2)
+    sink.write("first\n")
+    assert stream.entered.wait(5)
+
+    for n in range(5):
+        sink.write(f"queued {n}\n")
+    stream.release.set()
+    sink.drain()
+    sink.stop()
+
+    assert stream.text == (
+        "first\nqueued 0\nqueued 1\n3 log records dropped, log queue was full\n"
+    )
+
+
+def test_drops_counted_across_threads():
+    stream = BlockingStream()
+    sink = QueuedSink(stream, maxsize=1)
+    sink.write("first\n")
+    assert stream.entered.wait(5)
+
+    def flood():
+        for _ in range(2000):
+            sink.write("record\n")
+
+    threads = [threading.Thread(target=flood) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stream.release.set()
+    sink.drain()
+    sink.stop()
+
+    assert stream.text.endswith("15999 log records dropped, log queue was full\n")
+
+
+def test_rotation_counts_encoded_bytes(tmp_path):
+    path = tmp_path / "hotline_parser_test.log"
+    writer = RotatingFileWriter(path, max_bytes=30, retention_days=7)
+
+    # 20 characters, 40 bytes
+    writer.write("ціна" * 5)
+    writer.write("next\n")
+    writer.close()
+
+    assert path.read_text(encoding="utf-8") == "next\n"
+    [archive] = tmp_path.glob("*.zip")
+    assert archive.name.startswith("hotline_parser_test.")
@@ -0,0 +1,62 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from src.core.metrics import observe_phase, record_cache_lookup
+from src.core.middleware import MetricsMiddleware
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+async def client():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def test_requests_labelled_by_route_template(client):
+    name = "http_request_duration_seconds_count"
+    ok = dict(method="GET", route="/items/{item_id}", status="200")
+    invalid = dict(ok, status="422")
+    unmatched = dict(method="GET", route="unmatched", status="404")
+    before = [_sample(name, **labels) for labels in (ok, invalid, unmatched)]
+
+    for path in ("/items/1", "/items/2", "/items/x", "/missing/1"):
+        await client.get(path)
+
+    after = [_sample(name, **labels) for labels in (ok, invalid, unmatched)]
+    assert [a - b for a, b in zip(after, before)] == [2, 1, 1]
+    assert _sample(name, method="GET", route="/items/1", status="200") == 0
+
+
+def test_phase_observed_when_it_fails():
+    before = _sample("parse_phase_duration_seconds_count", phase="test")
+
+    with pytest.raises(RuntimeError):
+        with observe_phase("test"):
+            raise RuntimeError("Navigation failed")
+
+    assert _sample("parse_phase_duration_seconds_count", phase="test") == before + 1
+
+
+def test_cache_lookups_counted_in_bulk():
+    hits = _sample("cache_lookups_total", cache="test", result="hit")
+    misses = _sample("cache_lookups_total", cache="test", result="miss")
+
+    record_cache_lookup("test", hit=True, count=3)
+    record_cache_lookup("test", hit=False, count=0)
+
+    assert _sample("cache_lookups_total", cache="test", result="hit") == hits + 3
+    assert _sample("cache_lookups_total", cache="test", result="miss") == misses
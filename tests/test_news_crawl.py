@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+
+from src.core.config import settings
+from src.core.exceptions import ParsingException
+from src.models.crawl_state import CrawlState
+from src.repositories.crawl_state_repository import crawl_state_repository
+from src.repositories.news_repository import news_repository
+from src.schemas.news import ArticleDataSchema, FeedEntrySchema
+from src.services.news_parser import BaseNewsParser
+
+FEED = "https://news.example/feed"
+NEWEST = datetime(2024, 6, 1, 12)
+UNTIL = datetime(2024, 5, 1)
+
+
+class PagedFeedParser(BaseNewsParser):
+    """Feed of hourly articles, `page_size` per page, newest first"""
+
+    def __init__(self, articles: int, page_size: int = 5, failing=()):
+        super().__init__()
+        self.entries = [
+            FeedEntrySchema(
+                url=f"https://news.example/{n}",
+                published_at=NEWEST - timedelta(hours=n),
+            )
+            for n in range(articles)
+        ]
+        self.page_size = page_size
+        self.failing = set(failing)
+        self.pages: List[int] = []
+        self.articles: List[str] = []
+
+    async def _fetch_feed_page(self, url, page, client):
+        self.pages.append(page)
+        return self.entries[page * self.page_size : (page + 1) * self.page_size]
+
+    async def _parse_article(self, article_url, client):
+        self.articles.append(article_url)
+        if article_url in self.failing:
+            raise ParsingException("Article page changed")
+        entry = next(entry for entry in self.entries if entry.url == article_url)
+        return ArticleDataSchema(
+            title="Новина",
+            content_body="Текст",
+            image_urls=[],
+            published_at=entry.published_at,
+        )
+
+
+def _mark(n: int) -> CrawlState:
+    return CrawlState(
+        source=FEED,
+        last_published_at=NEWEST - timedelta(hours=n),
+        last_url=f"https://news.example/{n}",
+    )
+
+
+async def test_paging_stops_at_high_water_mark(database):
+    parser = PagedFeedParser(articles=50)
+
+    news = await parser.parse_news(FEED, UNTIL, since=_mark(7))
+
+    assert [item.url for item in news] == [
+        f"https://news.example/{n}" for n in range(7)
+    ]
+    assert parser.pages == [0, 1]
+    assert parser.crawl_mark(news).url == "https://news.example/0"
+
+
+async def test_first_crawl_bounded_by_window_and_page_limit(database, monkeypatch):
+    monkeypatch.setattr(settings, "NEWS_MAX_FEED_PAGES", 3)
+    parser = PagedFeedParser(articles=50)
+
+    news = await parser.parse_news(FEED, NEWEST - timedelta(hours=2, minutes=30))
+    assert len(news) == 3
+    assert parser.pages == [0]
+
+    parser = PagedFeedParser(articles=50)
+    assert len(await parser.parse_news(FEED, UNTIL)) == 15
+    assert parser.pages == [0, 1, 2]
+
+
+async def test_stored_articles_not_fetched_again(database):
+    await news_repository.collection.insert_one({"url": "https://news.example/1"})
+    parser = PagedFeedParser(articles=3)
+
+    news = await parser.parse_news(FEED, UNTIL)
+
+    assert [item.url for item in news] == [
+        "https://news.example/0",
+        "https://news.example/2",
+    ]
+    assert "https://news.example/1" not in parser.articles
+
+
+async def test_mark_stays_below_failed_article(database):
+    parser = PagedFeedParser(articles=6, failing=["https://news.example/3"])
+
+    news = await parser.parse_news(FEED, UNTIL)
+
+    assert len(news) == 5
+    assert [entry.url for entry in parser.failed_entries] == ["https://news.example/3"]
+    assert parser.crawl_mark(news).url == "https://news.example/4"
+
+
+async def test_all_new_articles_failing_raises(database):
+    parser = PagedFeedParser(
+        articles=2, failing=["https://news.example/0", "https://news.example/1"]
+    )
+
+    with pytest.raises(ParsingException):
+        await parser.parse_news(FEED, UNTIL)
+
+
+async def test_mark_only_moves_forward(database):
+    await crawl_state_repository.ensure_indexes()
+    newer, older = _mark(0), _mark(5)
+
+    assert await crawl_state_repository.advance(
+        FEED, newer.last_published_at, newer.last_url
+    )
+    assert not await crawl_state_repository.advance(
+        FEED, older.last_published_at, older.last_url
+    )
+
+    state = await crawl_state_repository.get_state(FEED)
+    assert state.last_url == newer.last_url
@@ -0,0 +1,158 @@
+import threading
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.repositories.crawl_state_repository import crawl_state_repository
+from src.repositories.http_cache_repository import http_cache_repository
+from src.repositories.news_repository import news_repository
+from src.services.http_cache import http_cache
+from src.services.news_parser import RssNewsParser, news_parser_factory
+from src.services.scheduler import scheduler_service
+
+UNTIL = datetime(2024, 1, 1)
+
+ARTICLE = """<html><head>
+<meta property="og:title" content="Article {n}">
+<meta property="article:published_time" content="2024-01-15T10:0{n}:00Z">
+</head><body><article><p>Body of article {n}.</p><p>Second paragraph.</p>
+</article></body></html>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Feed with an ETag at /rss, one without validators at /plain-rss"""
+
+    requests: Counter = Counter()
+    conditional: Counter = Counter()
+
+    def feed(self) -> bytes:
+        host = f"http://127.0.0.1:{self.server.server_port}"
+        items = "".join(
+            f"<item><link>{host}/news/{n}</link>"
+            f"<pubDate>Mon, 15 Jan 2024 10:0{n}:00 GMT</pubDate></item>"
+            for n in (1, 2)
+        )
+        return f"<rss><channel>{items}</channel></rss>".encode()
+
+    def do_GET(self):
+        self.requests[self.path] += 1
+        if self.headers.get("If-None-Match"):
+            self.conditional[self.path] += 1
+        if self.path == "/rss" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path in ("/rss", "/plain-rss"):
+            body, content_type = self.feed(), "application/rss+xml"
+        else:
+            n = self.path.rsplit("/", 1)[1]
+            body, content_type = ARTICLE.format(n=n).encode(), "text/html"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if self.path == "/rss":
+            self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FeedHandler.requests = Counter()
+    FeedHandler.conditional = Counter()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+async def _crawl(url: str):
+    """Parse like the scheduler, storing validators as if the items were saved"""
+    parser = RssNewsParser()
+    try:
+        news = await parser.parse_news(url, UNTIL)
+        await http_cache.commit(parser.cache_validators())
+        return news
+    finally:
+        await parser.close()
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    """Scheduler crawls with an RssNewsParser reading back to UNTIL"""
+    parser = RssNewsParser()
+    parse_news = parser.parse_news
+
+    async def parse_since_until(url, until_date, **kwargs):
+        return await parse_news(url, UNTIL, **kwargs)
+
+    monkeypatch.setattr(parser, "parse_news", parse_since_until)
+    monkeypatch.setattr(news_parser_factory, "get_parser", lambda url: parser)
+    return scheduler_service._parse_news_source
+
+
+async def test_parses_feed_and_articles(database, server):
+    news = await _crawl(f"{server}/rss")
+
+    assert [item.url for item in news] == [f"{server}/news/2", f"{server}/news/1"]
+    article = news[0].article_data
+    assert article.title == "Article 2"
+    assert article.content_body == "Body of article 2.\nSecond paragraph."
+    assert article.published_at == datetime(2024, 1, 15, 10, 2)
+    stored = await http_cache_repository.get_entry(f"{server}/rss")
+    assert stored.etag == '"v1"'
+
+
+async def test_not_modified_feed_is_skipped(database, server):
+    await _crawl(f"{server}/rss")
+    http_cache.end_cycle()
+
+    assert await _crawl(f"{server}/rss") == []
+
+    assert FeedHandler.conditional["/rss"] == 1
+    assert FeedHandler.requests["/news/1"] == 1
+    stats = http_cache.end_cycle()
+    assert stats["not_modified"] == 1
+    assert stats["skipped_parses"] == 1
+    assert stats["bytes_saved"] > 0
+
+
+async def test_same_body_feed_is_skipped(database, server):
+    await _crawl(f"{server}/plain-rss")
+    http_cache.end_cycle()
+
+    assert await _crawl(f"{server}/plain-rss") == []
+
+    assert FeedHandler.requests["/plain-rss"] == 2
+    assert FeedHandler.requests["/news/1"] == 1
+    assert http_cache.end_cycle()["same_body"] == 1
+
+
+async def test_validators_stored_after_save(database, server, scheduled):
+    await scheduled(f"{server}/rss")
+
+    assert await news_repository.existing_urls([f"{server}/news/1"])
+    assert (await http_cache_repository.get_entry(f"{server}/rss")).etag == '"v1"'
+    assert await crawl_state_repository.get_state(f"{server}/rss")
+
+
+async def test_failed_save_keeps_pages_unseen(database, server, scheduled, monkeypatch):
+    async def failing_save(news_items, source):
+        return []
+
+    monkeypatch.setattr(news_repository, "save_news_items", failing_save)
+    await scheduled(f"{server}/rss")
+    monkeypatch.undo()
+
+    assert await http_cache_repository.get_entry(f"{server}/rss") is None
+    assert await crawl_state_repository.get_state(f"{server}/rss") is None
+    # The next crawl fetches and parses the feed in full
+    assert len(await _crawl(f"{server}/rss")) == 2
+    assert FeedHandler.conditional["/rss"] == 0
@@ -0,0 +1,278 @@
+import asyncio
+import copy
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from src.core.exceptions import InvalidCursorException
+from src.repositories.news_repository import news_repository
+from src.schemas.news import ArticleDataSchema, NewsItemSchema, NewsSearchSort
+from src.services.news_dedup import (
+    PERMUTATIONS,
+    MinHashIndex,
+    lsh_bands,
+    minhash_signatures,
+    similarity,
+)
+
+STORY = (
+    "Національний банк України знизив облікову ставку до тринадцяти відсотків "
+    "через уповільнення інфляції у травні та покращення прогнозів економістів "
+    "щодо зростання валового внутрішнього продукту до кінця року"
+)
+REWRITE = STORY.replace("тринадцяти", "13").replace("травні", "квітні")
+OTHER = (
+    "Футбольна збірна провела тренування перед матчем кваліфікації чемпіонату "
+    "Європи на стадіоні у Львові, головний тренер назвав склад на гру"
+)
+
+
+def _item(url: str, body: str) -> NewsItemSchema:
+    return NewsItemSchema(
+        url=url,
+        article_data=ArticleDataSchema(
+            title="Новина",
+            content_body=body,
+            image_urls=[],
+            published_at=datetime(2024, 6, 1),
+        ),
+    )
+
+
+def test_signatures_estimate_similarity():
+    story, rewrite, other, empty = minhash_signatures([STORY, REWRITE, OTHER, ""])
+
+    assert story.shape == (PERMUTATIONS,)
+    assert similarity(story, rewrite) >= 0.4
+    assert similarity(story, other) < 0.1
+    assert empty is None
+
+
+def test_signatures_are_stable():
+    # Stored signatures are compared with ones computed later elsewhere
+    [first] = minhash_signatures([STORY])
+    second, _ = minhash_signatures([STORY, OTHER])
+
+    assert np.array_equal(first, second)
+    assert lsh_bands(first) == lsh_bands(second)
+
+
+def test_index_finds_nearest_cluster():
+    story, rewrite, other = minhash_signatures([STORY, REWRITE, OTHER])
+    index = MinHashIndex(0.4)
+    index.add(story, "story")
+
+    assert index.nearest(rewrite)[0] == "story"
+    assert index.nearest(other) is None
+
+
+async def test_duplicates_join_cluster_across_sources(database):
+    first, _ = await news_repository.save_news_items(
+        [_item("https://a.ua/1", STORY), _item("https://a.ua/2", OTHER)], "a.ua"
+    )
+    await news_repository.save_news_items([_item("https://b.ua/1", REWRITE)], "b.ua")
+
+    clusters = {
+        doc["url"]: doc["cluster_id"]
+        async for doc in news_repository.collection.find(
+            {}, {"url": 1, "cluster_id": 1}
+        )
+    }
+    assert clusters["https://a.ua/1"] == first
+    assert clusters["https://b.ua/1"] == first
+    assert clusters["https://a.ua/2"] != first
+
+
+async def test_concurrent_batches_end_in_one_cluster(database, monkeypatch):
+    # Both batches read their candidates before either is stored
+    barrier = asyncio.Barrier(2)
+    assign = news_repository._assign_clusters
+
+    async def assign_then_wait(news_dicts):
+        duplicates = await assign(news_dicts)
+        await barrier.wait()
+        return duplicates
+
+    monkeypatch.setattr(news_repository, "_assign_clusters", assign_then_wait)
+    await asyncio.gather(
+        news_repository.save_news_items([_item("https://a.ua/1", STORY)], "a.ua"),
+        news_repository.save_news_items([_item("https://b.ua/1", REWRITE)], "b.ua"),
+    )
+
+    docs = await news_repository.collection.find().to_list(None)
+    copies = await news_repository.search_collection.find().to_list(None)
+    assert len(docs) == 2
+    assert docs[0]["cluster_id"] == docs[1]["cluster_id"]
+    assert docs[0]["cluster_id"] == str(min(doc["_id"] for doc in docs))
+    assert {copy["cluster_id"] for copy in copies} == {docs[0]["cluster_id"]}
+
+
+async def test_search_copy_kept_out_of_news_document(database):
+    [news_id] = await news_repository.save_news_items(
+        [_item("https://a.ua/1", STORY)], "a.ua"
+    )
+
+    news = await news_repository.collection.find_one()
+    copy_ = await news_repository.search_collection.find_one()
+    assert "search" not in news
+    assert str(copy_["_id"]) == news_id
+    assert copy_["title"] == "новин"
+    assert copy_["body"].startswith("національн банк україн")
+    assert copy_["published_at"] == datetime(2024, 6, 1)
+    assert copy_["cluster_id"] == news["cluster_id"]
+
+
+async def test_backfill_moves_embedded_copies(database):
+    await news_repository.save_news_items(
+        [_item("https://a.ua/1", STORY), _item("https://a.ua/2", OTHER)], "a.ua"
+    )
+    # One stored before search copies moved out, one before search existed
+    embedded, missing = await news_repository.search_collection.find().to_list(None)
+    await news_repository.search_collection.delete_many({})
+    await news_repository.collection.update_one(
+        {"_id": embedded["_id"]},
+        {"$set": {"search": {"title": embedded["title"], "body": embedded["body"]}}},
+    )
+
+    dry_run = await news_repository.backfill_search(batch_size=1, dry_run=True)
+    assert dry_run["documents"] == 2
+    assert dry_run["moved_bytes"] > len(embedded["body"])
+    assert await news_repository.search_collection.count_documents({}) == 0
+
+    stats = await news_repository.backfill_search(batch_size=1)
+    assert stats == dry_run
+    copies = await news_repository.search_collection.find().to_list(None)
+    assert copies == [embedded, missing]
+    assert not await news_repository.collection.count_documents(
+        {"search": {"$exists": True}}
+    )
+    assert (await news_repository.backfill_search())["documents"] == 0
+
+
+@pytest.fixture
+def text_search(database, monkeypatch):
+    """
+    Search pipeline on mongomock, which has no text index
+
+    `$text` matches every search copy and the text score is the copy's
+    `test_score`.
+    """
+    collection = news_repository.search_collection
+    aggregate = collection.aggregate
+
+    def without_text(pipeline, **kwargs):
+        pipeline = copy.deepcopy(pipeline)
+        pipeline[0]["$match"].pop("$text")
+        pipeline[1]["$project"]["score"] = "$test_score"
+        return aggregate(pipeline)
+
+    monkeypatch.setattr(collection, "aggregate", without_text)
+
+
+async def _store(*stories):
+    """Store (source, cluster, score, hours old) articles, returns their urls"""
+    now = datetime(2024, 6, 1)
+    urls, clusters = [], set()
+    for number, (source, cluster, score, age) in enumerate(stories):
+        _id = ObjectId()
+        url = f"https://{source}/{number}"
+        published_at = now - timedelta(hours=age)
+        await news_repository.collection.insert_one(
+            {
+                "_id": _id,
+                "url": url,
+                "source": source,
+                "cluster_id": cluster or str(_id),
+                "duplicate": cluster in clusters,
+                "article_data": {
+                    "title": "Новина",
+                    "content_body": "текст",
+                    "image_urls": [],
+                    "published_at": published_at,
+                },
+                "created_at": now,
+            }
+        )
+        await news_repository.search_collection.insert_one(
+            {
+                "_id": _id,
+                "source": source,
+                "published_at": published_at,
+                "cluster_id": cluster or str(_id),
+                "title": "новин",
+                "body": "текст",
+                "test_score": score,
+            }
+        )
+        urls.append(url)
+        clusters.add(cluster)
+    return urls
+
+
+async def _all_pages(limit, **search):
+    urls, cursor = [], None
+    while True:
+        hits, cursor = await news_repository.search_news(
+            "новина", limit=limit, cursor=cursor, **search
+        )
+        urls += [hit.url for hit in hits]
+        if cursor is None:
+            return urls
+
+
+async def test_search_pages_cover_every_hit_once(text_search):
+    # Equal dates and scores are ordered by _id
+    urls = await _store(
+        *[("a.ua", None, 1.0 + number % 2, number // 2) for number in range(7)],
+    )
+
+    by_date = await _all_pages(2, sort=NewsSearchSort.DATE)
+    by_score = await _all_pages(3)
+
+    assert by_date == [urls[i] for i in (1, 0, 3, 2, 5, 4, 6)]
+    assert by_score == [urls[i] for i in (5, 3, 1, 6, 4, 2, 0)]
+
+
+async def test_search_rejects_cursor_of_other_sort(text_search):
+    await _store(("a.ua", None, 1.0, 0), ("a.ua", None, 1.0, 1))
+    _, cursor = await news_repository.search_news("новина", limit=1)
+
+    with pytest.raises(InvalidCursorException):
+        await news_repository.search_news(
+            "новина", sort=NewsSearchSort.DATE, limit=1, cursor=cursor
+        )
+
+
+async def test_collapse_after_filtering(text_search):
+    # The story's first article is from another source, its repost still counts
+    _, repost, other = await _store(
+        ("a.ua", "story", 5.0, 2),
+        ("b.ua", "story", 3.0, 1),
+        ("b.ua", None, 1.0, 0),
+    )
+
+    hits, _ = await news_repository.search_news("новина", source="b.ua", collapse=True)
+
+    assert [hit.url for hit in hits] == [repost, other]
+
+
+async def test_collapse_pages_show_each_story_once(text_search):
+    urls = await _store(
+        ("a.ua", "one", 9.0, 0),
+        ("b.ua", "one", 8.0, 0),
+        ("c.ua", "one", 2.0, 0),
+        ("a.ua", "two", 7.0, 0),
+        ("b.ua", "two", 6.0, 0),
+        ("a.ua", None, 5.0, 0),
+        ("a.ua", "three", 1.0, 0),
+        ("b.ua", "three", 4.0, 0),
+    )
+
+    assert await _all_pages(1, collapse=True) == [
+        urls[0],
+        urls[3],
+        urls[5],
+        urls[7],
+    ]
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.core.auth import get_api_key
+from src.models.api_key import ApiKey
+from src.repositories.news_repository import news_repository
+from src.routers import news
+
+SOURCE = "https://www.pravda.com.ua/news/"
+
+
+@pytest.fixture
+async def client(database):
+    app = FastAPI()
+    app.include_router(news.router, prefix="/news")
+    app.dependency_overrides[get_api_key] = lambda: ApiKey(
+        name="news", key_hash="hash", prefix="new"
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def _store(*clusters):
+    for hour, cluster_id in enumerate(clusters):
+        await news_repository.collection.insert_one(
+            {
+                "url": SOURCE,
+                "source": "pravda.com.ua",
+                "cluster_id": cluster_id,
+                "article_data": {
+                    "title": f"Новина {hour}",
+                    "content_body": "Текст",
+                    "image_urls": [],
+                    "published_at": datetime(2024, 6, 1, hour),
+                },
+                "created_at": datetime(2024, 6, 1),
+            }
+        )
+
+
+async def _get(client, **params):
+    response = await client.post(
+        "/news", params={"url": SOURCE, "until_date": "2024-06-02", **params}
+    )
+    assert response.status_code == 200
+    return response.json()["items"]
+
+
+async def test_collapsed_fields_leave_cluster_out(client):
+    await _store("story", "story", "other")
+
+    items = await _get(client, collapse="true", fields="url,title")
+
+    assert items == [
+        {"url": SOURCE, "article_data": {"title": "Новина 2"}},
+        {"url": SOURCE, "article_data": {"title": "Новина 1"}},
+    ]
+
+
+async def test_selected_cluster_kept_when_collapsed(client):
+    await _store("story", "story")
+
+    items = await _get(client, collapse="true", fields="title,cluster_id")
+
+    assert items == [{"article_data": {"title": "Новина 1"}, "cluster_id": "story"}]
@@ -0,0 +1,56 @@
+import pytest
+
+from src.repositories.news_repository import news_repository
+from src.services.news_search import search_fields, search_text, stem, tokenize
+
+
+@pytest.mark.parametrize(
+    "forms",
+    [
+        ("ціни", "ціною", "ціна", "цінами"),
+        ("бензин", "бензину", "бензином"),
+        ("україна", "україни", "україною", "україні"),
+        ("новий", "нового", "новому", "новими"),
+    ],
+)
+def test_inflected_forms_share_a_stem(forms):
+    assert len({stem(form) for form in forms}) == 1
+
+
+def test_reflexive_verbs_lose_their_suffix():
+    assert stem("знизилися") == stem("знизили")
+    assert stem("знизилася") == stem("знизили")
+
+
+def test_short_words_kept():
+    assert tokenize("на ці дні") == ["на", "ці", "дні"]
+
+
+def test_apostrophes_and_ghe_folded():
+    assert tokenize("М'ясо, м’ясо і мʼясо") == ["мяс", "мяс", "і", "мяс"]
+    assert tokenize("Ґанок") == tokenize("ганок")
+
+
+def test_search_copy_of_article():
+    assert search_fields({"title": "Ціни на бензин", "content_body": None}) == {
+        "title": "цін на бензин",
+        "body": "",
+    }
+
+
+async def test_query_stemmed_like_stored_articles(database, monkeypatch):
+    pipelines = []
+    aggregate = news_repository.search_collection.aggregate
+
+    def capture(pipeline, **kwargs):
+        pipelines.append(pipeline)
+        return aggregate([{"$match": {"_id": None}}])
+
+    monkeypatch.setattr(news_repository.search_collection, "aggregate", capture)
+
+    await news_repository.search_news("Ціною бензину")
+    assert await news_repository.search_news("!!!") == ([], None)
+
+    [pipeline] = pipelines
+    terms = pipeline[0]["$match"]["$text"]["$search"]
+    assert terms == search_text("ціни бензин") == "цін бензин"
@@ -0,0 +1,119 @@
+import pytest
+
+from src.core.exceptions import InvalidCursorException
+from src.repositories import offer_repository as offer_module
+from src.repositories.offer_repository import offer_repository
+from src.repositories.product_repository import product_repository
+from src.schemas.product import OfferSchema, ProductResponse
+
+URL = "https://hotline.ua/mobile/phone/"
+
+
+def _offer(n: int, price: float, shop: str = "shop") -> dict:
+    return {
+        "url": f"https://hotline.ua/go/price/{n}/",
+        "original_url": f"/go/price/{n}/",
+        "title": f"Phone {n}",
+        "shop": shop,
+        "price": price,
+        "is_used": False,
+    }
+
+
+async def _mirrored(url: str = URL) -> dict:
+    rows = await offer_repository.collection.find({"product_url": url}).to_list(None)
+    return {row["url"]: row["price"] for row in rows}
+
+
+async def _save(*offers: dict):
+    await product_repository.save_or_update_product(
+        ProductResponse(url=URL, offers=[OfferSchema(**offer) for offer in offers])
+    )
+
+
+@pytest.fixture
+def failing_writes(monkeypatch):
+    """Offer bulk writes fail while `state["failing"]` is set"""
+    state = {"failing": True}
+    bulk_write = offer_repository.collection.bulk_write
+
+    async def flaky_bulk_write(*args, **kwargs):
+        if state["failing"]:
+            raise ConnectionError("primary stepped down")
+        return await bulk_write(*args, **kwargs)
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(offer_repository.collection, "bulk_write", flaky_bulk_write)
+    monkeypatch.setattr(offer_module.asyncio, "sleep", no_sleep)
+    return state
+
+
+async def test_replace_offers_repairs_drift(database):
+    await offer_repository.replace_offers(URL, [_offer(1, 10), _offer(2, 20)])
+    # Drift an earlier failed sync could have left behind
+    await offer_repository.collection.delete_one({"url": _offer(2, 20)["url"]})
+    await offer_repository.collection.insert_one(
+        {"product_url": URL, "key": "stale", "url": "stale", "price": 1}
+    )
+
+    assert await offer_repository.replace_offers(URL, [_offer(1, 10), _offer(2, 25)])
+
+    assert await _mirrored() == {_offer(1, 0)["url"]: 10, _offer(2, 0)["url"]: 25}
+
+
+async def test_replace_offers_keeps_other_products(database):
+    await offer_repository.replace_offers("https://hotline.ua/other/", [_offer(1, 5)])
+    await offer_repository.replace_offers(URL, [_offer(2, 20)])
+
+    assert await _mirrored("https://hotline.ua/other/") == {_offer(1, 0)["url"]: 5}
+
+
+async def test_failed_sync_is_retried_on_next_save(database, failing_writes):
+    await _save(_offer(1, 10))
+    product = await product_repository.get_product_by_url(URL)
+    assert product.offers_synced is False
+    assert await _mirrored() == {}
+
+    # Same offers, no diff, but the product is still out of sync
+    failing_writes["failing"] = False
+    await _save(_offer(1, 10))
+
+    assert await _mirrored() == {_offer(1, 0)["url"]: 10}
+    product = await product_repository.get_product_by_url(URL)
+    assert product.offers_synced is True
+
+
+async def test_backfill_repairs_unsynced_products(database, failing_writes):
+    await _save(_offer(1, 10))
+    failing_writes["failing"] = False
+
+    assert await product_repository.backfill_offers(unsynced_only=True) == 1
+    assert (
+        await product_repository.collection.count_documents({"offers_synced": False})
+        == 0
+    )
+
+
+async def test_find_offers_keyset_pages(database):
+    await offer_repository.replace_offers(
+        URL, [_offer(n, price) for n, price in enumerate([30, 10, 20, 10, 40])]
+    )
+
+    prices, cursor = [], None
+    while True:
+        offers, cursor = await offer_repository.find_offers(limit=2, cursor=cursor)
+        prices += [offer.price for offer in offers]
+        if cursor is None:
+            break
+    assert prices == [10, 10, 20, 30, 40]
+
+    offers, cursor = await offer_repository.find_offers(
+        limit=3, descending=True, min_price=15
+    )
+    assert [offer.price for offer in offers] == [40, 30, 20]
+    assert cursor is None
+
+    with pytest.raises(InvalidCursorException):
+        await offer_repository.find_offers(cursor="not-a-cursor")
@@ -0,0 +1,131 @@
+from datetime import datetime
+
+import pytest
+
+from src.core.config import settings
+from src.core.exceptions import TooManyBucketsException
+from src.repositories.price_history_repository import (
+    bucket_start,
+    price_history_repository,
+)
+
+URL = "https://hotline.ua/mobile/phone/"
+
+
+def _offer(n: int, price: float, shop: str = "shop"):
+    return {"url": f"https://hotline.ua/go/price/{n}", "shop": shop, "price": price}
+
+
+async def _record(ts: datetime, added=(), changed=(), removed=()):
+    await price_history_repository.collection.insert_many(
+        [
+            {
+                "ts": ts,
+                "meta": {"product": URL, "shop": offer["shop"], "offer": offer["url"]},
+                "price": None if kind == "removed" else offer["price"],
+                "is_used": False,
+            }
+            for kind, offers in (
+                ("added", added),
+                ("changed", changed),
+                ("removed", removed),
+            )
+            for offer in offers
+        ]
+    )
+
+
+async def _buckets(**kwargs):
+    return await price_history_repository.get_price_buckets(
+        URL, "day", datetime(2024, 1, 10), datetime(2024, 1, 13), **kwargs
+    )
+
+
+async def test_carries_prices_in_effect(database):
+    await _record(datetime(2024, 1, 1), added=[_offer(n, 100 + n) for n in range(20)])
+    await _record(datetime(2024, 1, 11, 12), changed=[_offer(3, 50)])
+
+    buckets = await _buckets()
+
+    assert [bucket["ts"].day for bucket in buckets] == [10, 11, 12]
+    assert [bucket["changes"] for bucket in buckets] == [0, 1, 0]
+    assert (buckets[0]["min_price"], buckets[0]["max_price"]) == (100, 119)
+    # Repriced offer's old and new price were both in effect on the 11th
+    assert (buckets[1]["min_price"], buckets[1]["max_price"]) == (50, 119)
+    assert buckets[2]["min_price"] == 50
+    assert buckets[2]["avg_price"] == (sum(range(100, 120)) - 103 + 50) / 20
+
+
+async def test_removed_offers_stop_counting(database):
+    await _record(datetime(2024, 1, 1), added=[_offer(1, 10), _offer(2, 20)])
+    await _record(datetime(2024, 1, 11, 6), removed=[_offer(1, 10)])
+
+    buckets = await _buckets()
+
+    assert [bucket["min_price"] for bucket in buckets] == [10, 10, 20]
+    assert buckets[2]["avg_price"] == 20
+
+
+async def test_shop_filter_and_empty_history(database):
+    await _record(datetime(2024, 1, 11), added=[_offer(1, 10, "a"), _offer(2, 20, "b")])
+
+    buckets = await _buckets(shop="b")
+
+    assert [bucket["ts"].day for bucket in buckets] == [11, 12]
+    assert buckets[0]["min_price"] == 20
+    assert (
+        await price_history_repository.get_price_buckets(
+            "https://hotline.ua/other/",
+            "day",
+            datetime(2024, 1, 10),
+            datetime(2024, 1, 13),
+        )
+        == []
+    )
+
+
+async def test_too_many_buckets_rejected(database, monkeypatch):
+    monkeypatch.setattr(settings, "PRICE_HISTORY_MAX_BUCKETS", 3)
+    await _record(datetime(2024, 1, 1), added=[_offer(1, 10)])
+
+    assert len(await _buckets()) == 3
+    with pytest.raises(TooManyBucketsException):
+        await price_history_repository.get_price_buckets(
+            URL, "hour", datetime(2024, 1, 10), datetime(2024, 1, 13)
+        )
+
+
+async def test_last_point_before_window_carried(database):
+    await _record(datetime(2024, 1, 1), added=[_offer(1, 10), _offer(2, 20)])
+    await _record(datetime(2024, 1, 5), changed=[_offer(1, 15)])
+    await _record(datetime(2024, 1, 8), removed=[_offer(2, 20)])
+
+    buckets = await _buckets()
+
+    assert [bucket["min_price"] for bucket in buckets] == [15, 15, 15]
+    assert buckets[0]["max_price"] == 15
+
+
+def test_bucket_start():
+    ts = datetime(2024, 1, 17, 15, 42)
+    assert bucket_start(ts, "hour") == datetime(2024, 1, 17, 15)
+    assert bucket_start(ts, "day") == datetime(2024, 1, 17)
+    assert bucket_start(ts, "week") == datetime(2024, 1, 15)
+    assert bucket_start(ts, "month") == datetime(2024, 1, 1)
+
+
+async def test_record_changes_writes_removals(database):
+    recorded = await price_history_repository.record_changes(
+        URL,
+        {
+            "added": [_offer(1, 10)],
+            "changed": [_offer(2, 0)],
+            "removed": [_offer(3, 30)],
+        },
+    )
+
+    assert recorded == 2
+    points = await price_history_repository.collection.find(
+        {}, {"_id": 0, "meta.offer": 1, "price": 1}
+    ).to_list(None)
+    assert sorted(point["price"] or 0 for point in points) == [0, 10]
@@ -0,0 +1,104 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from src.core.auth import get_api_key
+from src.models.api_key import ApiKey
+from src.repositories.product_repository import product_repository
+from src.routers import products
+from src.schemas.product import OfferSchema, ProductResponse
+from src.services.product_parser import product_parser
+
+STORED = "https://hotline.ua/stored/"
+
+
+def _product(url: str) -> ProductResponse:
+    return ProductResponse(
+        url=url,
+        offers=[
+            OfferSchema(
+                url=f"{url}offer/{price}",
+                original_url=f"{url}offer/{price}",
+                title="Phone",
+                shop="Shop",
+                price=price,
+                is_used=False,
+            )
+            for price in (300.0, 100.0, 200.0)
+        ],
+    )
+
+
+@pytest.fixture
+async def client(database, monkeypatch):
+    """Products router for a key with a parse budget of three"""
+    api_key = ApiKey(
+        name="batch",
+        key_hash="hash",
+        prefix="bat",
+        parse_rate_per_minute=1,
+        parse_burst=3,
+    )
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    app.dependency_overrides[get_api_key] = lambda: api_key
+
+    async def parse_product(url, **options):
+        if url.endswith("gone/"):
+            raise HTTPException(status_code=404, detail="Product not found")
+        if url.endswith("broken/"):
+            raise RuntimeError("Browser crashed")
+        return _product(url)
+
+    monkeypatch.setattr(product_parser, "parse_product", parse_product)
+    await product_repository.create_product(_product(STORED))
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def test_batch_streams_partial_failures(client):
+    urls = [
+        "https://hotline.ua/new/",
+        STORED,
+        "https://hotline.ua/gone/",
+        "https://hotline.ua/broken/",
+        "https://hotline.ua/over-budget/",
+        STORED,
+    ]
+
+    response = await client.post(
+        "/products/batch", json={"urls": urls, "price_sort": "asc", "count_limit": 2}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    items = {item["url"]: item for item in lines}
+    # Duplicates answered once, stored products first
+    assert len(lines) == 5
+    assert lines[0]["url"] == STORED
+    assert items[STORED]["from_cache"] is True
+    assert [offer["price"] for offer in items[STORED]["product"]["offers"]] == [
+        100.0,
+        200.0,
+    ]
+    assert items["https://hotline.ua/new/"]["status_code"] == 200
+    assert items["https://hotline.ua/gone/"]["status_code"] == 404
+    assert items["https://hotline.ua/gone/"]["error"] == "Product not found"
+    assert items["https://hotline.ua/broken/"]["status_code"] == 500
+    assert items["https://hotline.ua/over-budget/"]["status_code"] == 429
+    assert items["https://hotline.ua/over-budget/"]["retry_after"] == 60
+
+
+async def test_batch_rejects_too_many_urls(client, monkeypatch):
+    monkeypatch.setattr(products.settings, "BATCH_MAX_URLS", 2)
+
+    response = await client.post(
+        "/products/batch", json={"urls": [f"https://hotline.ua/{n}/" for n in range(3)]}
+    )
+
+    assert response.status_code == 400
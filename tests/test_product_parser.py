@@ -0,0 +1,192 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from src.core.deadline import Deadline
+from src.core.exceptions import ParsingException, TimeoutException
+from src.repositories.product_repository import product_repository
+from src.schemas.product import OfferSchema, ProductResponse
+from src.services import product_parser as parser_module
+from src.services.product_parser import product_parser
+
+URL = "https://hotline.ua/mobile/phone/"
+
+OFFER = """<div><a href="/go/price/{n}/">Shop {n}</a>
+<div class="html-clamp">Phone {n}</div>
+<span class="_2FyrEE_quFxElmhGj53m">{price}</span></div>"""
+OFFERS_PAGE = (
+    "<html><body><div id='productOffersListContainer'><div></div><div>"
+    + "".join(OFFER.format(n=n, price=price) for n, price in enumerate((300, 100, 200)))
+    + "</div></div></body></html>"
+)
+
+
+class FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+
+
+class FakePage:
+    def __init__(
+        self,
+        status: int = 200,
+        error: Optional[Exception] = None,
+        html: str = "<html><body></body></html>",
+    ):
+        self.status = status
+        self.error = error
+        self.html = html
+
+    async def goto(self, url, **kwargs):
+        if self.error:
+            raise self.error
+        return FakeResponse(self.status)
+
+    async def evaluate(self, script):
+        return 100
+
+    async def content(self):
+        return self.html
+
+
+class FakeContext:
+    def __init__(self, page: FakePage):
+        self.page = page
+
+    async def new_page(self):
+        return self.page
+
+
+class FakeLease:
+    outcome = None
+
+    def report(self, outcome):
+        self.outcome = outcome
+
+    def context_options(self):
+        return {}
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    """Stand-in browser serving one FakePage, records saved products"""
+    state = {"page": FakePage(), "saved": []}
+
+    @asynccontextmanager
+    async def lease(url, deadline=None):
+        yield FakeLease()
+
+    @asynccontextmanager
+    async def new_context(deadline=None, **kwargs):
+        yield FakeContext(state["page"])
+
+    async def noop(*args, **kwargs):
+        pass
+
+    async def save(product):
+        state["saved"].append(product)
+
+    monkeypatch.setattr(parser_module.egress_pool, "lease", lease)
+    monkeypatch.setattr(parser_module.browser_client, "new_context", new_context)
+    monkeypatch.setattr(parser_module.har_recorder, "attach", noop)
+    monkeypatch.setattr(parser_module.asset_cache, "attach", noop)
+    monkeypatch.setattr(
+        parser_module.storage_state_store, "context_options", lambda url: {}
+    )
+    monkeypatch.setattr(parser_module.storage_state_store, "save", noop)
+    monkeypatch.setattr(product_parser, "_save", save)
+    return state
+
+
+async def _parse(count_limit=None, price_sort=None):
+    return await product_parser._parse_page(URL, count_limit, price_sort, Deadline(10))
+
+
+async def test_loaded_page_is_saved(browser):
+    result = await _parse()
+
+    assert result.partial is False
+    assert browser["saved"] == [result]
+
+
+async def test_count_limit_shapes_response_only(browser):
+    browser["page"] = FakePage(html=OFFERS_PAGE)
+
+    result = await _parse(count_limit=2, price_sort="asc")
+
+    assert [offer.price for offer in result.offers] == [100, 200]
+    assert result.offers_found == 3
+    [saved] = browser["saved"]
+    assert [offer.price for offer in saved.offers] == [300, 100, 200]
+
+
+@pytest.mark.parametrize(
+    "page, error",
+    [
+        (FakePage(error=Exception("net::ERR_NAME_NOT_RESOLVED")), ParsingException),
+        (FakePage(error=PlaywrightTimeoutError("Timeout exceeded")), TimeoutException),
+        (FakePage(status=500), ParsingException),
+    ],
+)
+async def test_page_that_did_not_load_is_not_saved(browser, page, error):
+    browser["page"] = page
+
+    with pytest.raises(error):
+        await _parse()
+    assert browser["saved"] == []
+
+
+class GrowingPage(FakePage):
+    """Infinite scroll: every height check finds more content"""
+
+    def __init__(self):
+        super().__init__(html=OFFERS_PAGE)
+        self.height = 100
+
+    async def evaluate(self, script):
+        if script == "document.body.scrollHeight":
+            self.height += 100
+            return self.height
+        return 100
+
+
+async def test_deadline_during_scroll_returns_partial_result(browser):
+    browser["page"] = GrowingPage()
+
+    result = await product_parser._parse_page(URL, None, None, Deadline(1))
+
+    assert result.partial is True
+    assert result.offers_found == 3
+    # Saved after the response, in the background
+    assert browser["saved"] == []
+    await asyncio.sleep(0)
+    assert browser["saved"] == [result]
+
+
+async def test_partial_result_keeps_complete_stored_offers(database):
+    complete = ProductResponse(
+        url=URL,
+        offers=[
+            OfferSchema(
+                url=f"{URL}{n}",
+                original_url=f"{URL}{n}",
+                title="Phone",
+                shop="Shop",
+                price=100 + n,
+                is_used=False,
+            )
+            for n in range(3)
+        ],
+    )
+    await product_repository.save_or_update_product(complete)
+
+    await product_repository.save_or_update_product(
+        complete.model_copy(update={"offers": complete.offers[:1], "partial": True})
+    )
+
+    stored = await product_repository.get_product_by_url(URL)
+    assert len(stored.offers) == 3
+    assert stored.partial is False
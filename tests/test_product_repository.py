@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from src.repositories.product_repository import product_repository
+
+URL = "https://hotline.ua/mobile/phone/"
+
+
+async def _store_legacy(**fields):
+    """Product stored before summaries existed"""
+    await product_repository.collection.insert_one(
+        {"url": URL, "partial": False, "updated_at": datetime(2024, 1, 1), **fields}
+    )
+
+
+async def test_legacy_summary_computed_once(database):
+    await _store_legacy(
+        offers=[
+            {"url": "a", "shop": "A", "price": 100.0, "is_used": False},
+            {"url": "b", "shop": "B", "price": 300.0, "is_used": False},
+        ]
+    )
+
+    summary = await product_repository.get_summary(URL)
+
+    assert (summary["summary"]["count"], summary["summary"]["min_price"]) == (2, 100)
+    stored = await product_repository.collection.find_one({"url": URL})
+    assert stored["summary"] == summary["summary"]
+
+
+async def test_legacy_summary_without_offers(database):
+    await _store_legacy()
+
+    fields = await product_repository.get_product_fields(URL, ["url", "summary"])
+
+    assert fields["summary"]["count"] == 0
+
+
+async def test_fields_of_product_deleted_meanwhile(database, monkeypatch):
+    await _store_legacy(offers=[])
+
+    async def deleted(url):
+        return None
+
+    monkeypatch.setattr(product_repository, "get_summary", deleted)
+
+    assert await product_repository.get_product_fields(URL, ["summary"]) is None
+    assert (
+        await product_repository.get_product_fields("https://other/", ["url"]) is None
+    )
@@ -0,0 +1,88 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.core import middleware
+from src.core.profiling import ProfileFormat, ProfilingService
+from src.models.api_key import ApiKey
+
+ADMIN, CLIENT = "admin-key", "client-key"
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    service = ProfilingService(str(tmp_path), max_profiles=2, interval=0.001)
+    keys = {
+        ADMIN: ApiKey(name="admin", key_hash="a", prefix="adm", is_admin=True),
+        CLIENT: ApiKey(name="client", key_hash="c", prefix="cli"),
+    }
+
+    async def resolve_api_key(plaintext):
+        return keys.get(plaintext)
+
+    monkeypatch.setattr(middleware, "profiling_service", service)
+    monkeypatch.setattr(middleware, "resolve_api_key", resolve_api_key)
+    return service
+
+
+@pytest.fixture
+async def client(profiler):
+    app = FastAPI()
+    app.add_middleware(middleware.ProfilingMiddleware)
+
+    @app.get("/products/summary")
+    async def summary():
+        return {"sum": sum(range(10000))}
+
+    @app.get("/news")
+    async def news():
+        return {}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def test_profile_header_needs_admin_key(client, profiler):
+    denied = await client.get(
+        "/products/summary", headers={"X-Profile": "1", "X-API-Key": CLIENT}
+    )
+    profiled = await client.get(
+        "/products/summary", headers={"X-Profile": "1", "X-API-Key": ADMIN}
+    )
+
+    assert "x-profile-id" not in denied.headers
+    profile_id = profiled.headers["x-profile-id"]
+    [stored] = profiler.list_profiles()
+    assert (stored["id"], stored["path"]) == (profile_id, "/products/summary")
+    speedscope = profiler.render(profile_id, ProfileFormat.SPEEDSCOPE)
+    assert "speedscope" in json.loads(speedscope)["$schema"]
+
+
+async def test_armed_profiles_next_matching_requests(client, profiler):
+    profiler.arm(2, path_prefix="/products")
+
+    responses = [
+        await client.get(path)
+        for path in ("/news", "/products/summary", "/products/summary")
+    ]
+    after = await client.get("/products/summary")
+
+    assert ["x-profile-id" in r.headers for r in responses] == [False, True, True]
+    assert "x-profile-id" not in after.headers
+    assert profiler.status()["armed"] is False
+    assert len(profiler.list_profiles()) == 2
+
+
+async def test_oldest_profiles_removed(client, profiler):
+    for _ in range(3):
+        await client.get(
+            "/products/summary", headers={"X-Profile": "1", "X-API-Key": ADMIN}
+        )
+
+    assert len(list(profiler.directory.glob("*.pyisession"))) == 2
+    assert len(profiler.list_profiles()) == 2
+    assert profiler.render("../missing", ProfileFormat.HTML) is None
@@ -0,0 +1,96 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.core.config import settings
+from src.core.rate_limit import rate_limiter
+from src.models.api_key import ApiKey
+from src.routers import stream
+from src.services.broadcaster import broadcaster, product_topic
+
+KEY = "stream-key"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Stream router whose only valid key has a read budget of four"""
+    api_key = ApiKey(
+        name="stream",
+        key_hash="hash",
+        prefix="str",
+        read_rate_per_minute=1,
+        read_burst=4,
+    )
+
+    async def resolve_api_key(plaintext):
+        return api_key if plaintext == KEY else None
+
+    monkeypatch.setattr(stream, "resolve_api_key", resolve_api_key)
+    monkeypatch.setattr(settings, "STREAM_MAX_TOPICS", 2)
+    app = FastAPI()
+    app.include_router(stream.router, prefix="/stream")
+    yield TestClient(app)
+    rate_limiter.reset((api_key.id, "read"))
+
+
+def _close_code(client, **kwargs):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/stream/ws", **kwargs) as websocket:
+            if "headers" not in kwargs:
+                websocket.send_json({"action": "auth", "api_key": "wrong"})
+            websocket.receive_json()
+    return closed.value.code
+
+
+def test_key_in_query_string_refused(client):
+    assert _close_code(client, params={"api_key": KEY}) == 1008
+
+
+def test_invalid_header_key_refused(client):
+    assert _close_code(client, headers={"X-API-Key": "wrong"}) == 1008
+
+
+def test_auth_message_then_subscribe(client):
+    with client.websocket_connect("/stream/ws") as websocket:
+        websocket.send_json({"action": "auth", "api_key": KEY})
+        websocket.send_json({"products": ["https://hotline.ua/product"]})
+        assert websocket.receive_json() == {
+            "type": "subscribed",
+            "topics": [product_topic("https://hotline.ua/product")],
+        }
+
+        broadcaster.publish(
+            product_topic("https://hotline.ua/product"), {"type": "offers"}
+        )
+        assert websocket.receive_json() == {"type": "offers"}
+
+
+def test_subscribe_commands_validated(client):
+    with client.websocket_connect(
+        "/stream/ws", headers={"X-API-Key": KEY}
+    ) as websocket:
+        # A string is not taken as a list of one-character URLs
+        websocket.send_json({"products": "https://hotline.ua/product"})
+        assert websocket.receive_json()["type"] == "error"
+
+        websocket.send_json({"products": ["a", "b", "c"]})
+        assert "At most 2 topics" in websocket.receive_json()["detail"]
+
+        websocket.send_json({"news": ["pravda.com.ua"]})
+        assert websocket.receive_json()["topics"] == ["news:pravda.com.ua"]
+
+
+def test_subscribes_take_read_budget(client):
+    with client.websocket_connect(
+        "/stream/ws", headers={"X-API-Key": KEY}
+    ) as websocket:
+        # One token went to the connection
+        for _ in range(3):
+            websocket.send_json({"news": ["pravda.com.ua"]})
+            assert websocket.receive_json()["type"] == "subscribed"
+
+        websocket.send_json({"news": ["epravda.com.ua"]})
+        refused = websocket.receive_json()
+        assert refused["type"] == "error"
+        assert refused["retry_after"] == 60
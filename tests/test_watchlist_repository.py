@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from src.repositories.watchlist_repository import watchlist_repository
+from src.schemas.watchlist import WatchlistEntryCreate, WatchlistKind
+
+
+async def _create(url: str):
+    return await watchlist_repository.create_entry(
+        WatchlistEntryCreate(url=url, kind=WatchlistKind.PRODUCT)
+    )
+
+
+async def test_claim_due_leases_entries(database):
+    await _create("https://hotline.ua/a")
+    await _create("https://hotline.ua/b")
+
+    claimed = await watchlist_repository.claim_due(limit=10, lease_seconds=60)
+
+    assert {entry.url for entry in claimed} == {
+        "https://hotline.ua/a",
+        "https://hotline.ua/b",
+    }
+    assert await watchlist_repository.claim_due(limit=10, lease_seconds=60) == []
+
+
+async def test_mark_due_keeps_active_leases(database):
+    await _create("https://hotline.ua/a")
+    [leased] = await watchlist_repository.claim_due(limit=1, lease_seconds=60)
+    await _create("https://hotline.ua/b")
+    await watchlist_repository.collection.update_one(
+        {"url": "https://hotline.ua/b"},
+        {"$set": {"next_run_at": datetime.utcnow() + timedelta(hours=1)}},
+    )
+
+    assert await watchlist_repository.mark_due() == 1
+
+    claimed = await watchlist_repository.claim_due(limit=10, lease_seconds=60)
+    assert [entry.url for entry in claimed] == ["https://hotline.ua/b"]
+    assert leased.url == "https://hotline.ua/a"
+
+
+async def test_mark_due_releases_expired_leases(database):
+    await _create("https://hotline.ua/a")
+    await watchlist_repository.claim_due(limit=1, lease_seconds=-1)
+
+    assert await watchlist_repository.mark_due() == 1